@@ -0,0 +1,189 @@
+"""
+⚡ Indicator Kernels
+Recursive indicator loops (Wilder smoothing, RSI, Supertrend) and tick resampling compiled with Numba when available
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; fall back to plain Python loops
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _wilder_rma(x, period):
+    """Wilder's moving average, seeded with the simple mean of the first period values"""
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    avg = 0.0
+    for i in range(period):
+        avg += x[i]
+    avg /= period
+    out[period - 1] = avg
+    for i in range(period, n):
+        avg = (avg * (period - 1) + x[i]) / period
+        out[i] = avg
+    return out
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _rsi_loop(close, period):
+    """Wilder-smoothed RSI over a contiguous float64 close array"""
+    n = len(close)
+    rsi = np.full(n, np.nan)
+    if n <= period:
+        return rsi
+
+    # Seed with the simple average of the first period moves
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period, n):
+        if i > period:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        rsi[i] = 100.0 if avg_loss == 0 else 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    return rsi
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _atr(high, low, close, period):
+    """Average true range smoothed with Wilder's moving average"""
+    n = len(close)
+    tr = np.empty(n)
+    if n == 0:
+        return tr
+    tr[0] = high[0] - low[0]
+    for i in range(1, n):
+        tr[i] = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+    return _wilder_rma(tr, period)
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _supertrend(high, low, close, period, factor):
+    """Supertrend final bands and direction (1 up, -1 down) using a Wilder ATR"""
+    n = len(close)
+    upper = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    direction = np.zeros(n, dtype=np.int8)
+    atr = _atr(high, low, close, period)
+
+    start = period - 1
+    if n <= start:
+        return upper, lower, direction
+
+    mid = (high[start] + low[start]) / 2
+    upper[start] = mid + factor * atr[start]
+    lower[start] = mid - factor * atr[start]
+    direction[start] = 1
+    for i in range(start + 1, n):
+        mid = (high[i] + low[i]) / 2
+        basic_upper = mid + factor * atr[i]
+        basic_lower = mid - factor * atr[i]
+
+        # Bands only tighten while price stays inside them
+        upper[i] = basic_upper if basic_upper < upper[i - 1] or close[i - 1] > upper[i - 1] else upper[i - 1]
+        lower[i] = basic_lower if basic_lower > lower[i - 1] or close[i - 1] < lower[i - 1] else lower[i - 1]
+
+        if close[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+    return upper, lower, direction
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _macd(close, fast=12, slow=26, sig=9):
+    """MACD line and signal line from fused EMA recurrences in one sweep"""
+    n = len(close)
+    macd = np.empty(n)
+    signal = np.empty(n)
+    if n == 0:
+        return macd, signal
+
+    a_f = 2.0 / (fast + 1)
+    a_s = 2.0 / (slow + 1)
+    a_g = 2.0 / (sig + 1)
+    ef = close[0]
+    es = close[0]
+    gsig = 0.0
+    for i in range(n):
+        ef = a_f * close[i] + (1 - a_f) * ef
+        es = a_s * close[i] + (1 - a_s) * es
+        gsig = a_g * (ef - es) + (1 - a_g) * gsig
+        macd[i] = ef - es
+        signal[i] = gsig
+    return macd, signal
+
+def _bbands(close, period=20, num_std=2.0):
+    """Bollinger Bands (mean, upper, lower) from cumulative sums in O(n)"""
+    cs = np.cumsum(close)
+    css = np.cumsum(close * close)
+    window_sum = cs[period - 1:] - np.concatenate(([0.0], cs[:-period]))
+    window_sq = css[period - 1:] - np.concatenate(([0.0], css[:-period]))
+    mean = window_sum / period
+    # Sample variance, matching pandas rolling().std()
+    var = (window_sq - period * mean * mean) / (period - 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+    return mean, mean + num_std * std, mean - num_std * std
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _macd_state(close, fast=12, slow=26, sig=9):
+    """Final fast EMA, slow EMA and signal EMA after one sweep over close"""
+    a_f = 2.0 / (fast + 1)
+    a_s = 2.0 / (slow + 1)
+    a_g = 2.0 / (sig + 1)
+    ef = close[0]
+    es = close[0]
+    gsig = 0.0
+    for i in range(len(close)):
+        ef = a_f * close[i] + (1 - a_f) * ef
+        es = a_s * close[i] + (1 - a_s) * es
+        gsig = a_g * (ef - es) + (1 - a_g) * gsig
+    return ef, es, gsig
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _ohlc(prices, timestamps, window):
+    """Resample time-ordered ticks into OHLC bars of width window (same units as timestamps)"""
+    n = len(prices)
+    starts = np.empty(n, dtype=np.int64)
+    o = np.empty(n)
+    h = np.empty(n)
+    l = np.empty(n)
+    c = np.empty(n)
+    if n == 0:
+        return starts[:0], o[:0], h[:0], l[:0], c[:0]
+
+    k = 0
+    starts[0] = timestamps[0] - timestamps[0] % window
+    o[0] = h[0] = l[0] = c[0] = prices[0]
+    for i in range(1, n):
+        bucket = timestamps[i] - timestamps[i] % window
+        if bucket != starts[k]:
+            k += 1
+            starts[k] = bucket
+            o[k] = h[k] = l[k] = c[k] = prices[i]
+        else:
+            if prices[i] > h[k]:
+                h[k] = prices[i]
+            if prices[i] < l[k]:
+                l[k] = prices[i]
+            c[k] = prices[i]
+    k += 1
+    return starts[:k], o[:k], h[:k], l[:k], c[:k]
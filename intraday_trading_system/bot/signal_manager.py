@@ -5,6 +5,7 @@ Manages trading signals, stores them in database, and tracks performance
 
 import sqlite3
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
@@ -25,6 +26,12 @@ class SignalManager:
         self.config = config
         self.db_path = os.path.join(config.DATA_DIR, 'trading_signals.db')
         self._init_database()
+        
+        # Long-lived connection used only to watch for commits from other connections;
+        # request threads and the background loop share it, so every use holds the lock
+        self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._watch_lock = threading.Lock()
+        self._data_version = None
         self.logger.info("Signal Manager initialized")
     
     def _init_database(self):
@@ -168,6 +175,55 @@ class SignalManager:
             self.logger.error(f"Error getting signals: {str(e)}")
             return []
     
+    def get_latest_signal_id(self) -> int:
+        """Get the highest signal ID stored so far (the new-signal watermark)"""
+        try:
+            with self._watch_lock:
+                return self._watch_conn.execute('SELECT COALESCE(MAX(id), 0) FROM signals').fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Error getting latest signal id: {str(e)}")
+            return 0
+    
+    def get_signals_since(self, last_id: int) -> List[Dict[str, Any]]:
+        """Get signals newer than the watermark, skipping the query when nothing was committed"""
+        try:
+            with self._watch_lock:
+                # data_version only changes when another connection commits to the database
+                data_version = self._watch_conn.execute('PRAGMA data_version').fetchone()[0]
+                if data_version == self._data_version:
+                    return []
+                self._data_version = data_version
+                
+                cursor = self._watch_conn.execute(
+                    'SELECT * FROM signals WHERE id > ? ORDER BY id ASC', (last_id,)
+                )
+                columns = [description[0] for description in cursor.description]
+                rows = cursor.fetchall()
+                
+            signals = []
+            for row in rows:
+                signal = dict(zip(columns, row))
+                if signal['technical_indicators']:
+                    signal['technical_indicators'] = json.loads(signal['technical_indicators'])
+                signals.append(signal)
+            
+            return signals
+            
+        except Exception as e:
+            self.logger.error(f"Error getting new signals: {str(e)}")
+            return []
+    
+    def count_signals_for_date(self, date: str) -> int:
+        """Count signals created on a date (YYYY-MM-DD)"""
+        try:
+            with self._watch_lock:
+                return self._watch_conn.execute(
+                    'SELECT COUNT(*) FROM signals WHERE DATE(created_at) = ?', (date,)
+                ).fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Error counting signals: {str(e)}")
+            return 0
+    
     def update_signal_status(self, signal_id: int, status: str, notes: Optional[str] = None) -> bool:
         """Update signal status"""
         try:
@@ -4,7 +4,10 @@ Centralizes all configuration settings and environment variables
 """
 
 import os
+import atexit
 import logging
+import logging.handlers
+import queue
 from datetime import datetime, time
 from typing import List, Dict, Any
 from dotenv import load_dotenv
@@ -72,6 +75,9 @@ class Config:
         # Redis Configuration
         self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
         
+        # Socket.IO message queue shared by all web workers (e.g. redis://localhost:6379/1)
+        self.SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+        
         # Logging Configuration
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
         self.LOG_FILE = os.path.join(self.LOGS_DIR, 'trading_bot.log')
@@ -131,16 +137,34 @@ class Config:
 class LoggingConfig:
     """Logging configuration"""
     
+    listener = None
+    
     @staticmethod
     def setup_logging(config: Config):
-        """Setup logging configuration"""
+        """Setup logging configuration
+        
+        Callers only enqueue records; a QueueListener thread does the file and
+        console I/O so logging never blocks request or socket handlers.
+        """
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        file_handler = logging.FileHandler(config.LOG_FILE, encoding='utf-8')
+        stream_handler = logging.StreamHandler()
+        file_handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+        
+        log_queue = queue.SimpleQueue()
+        LoggingConfig.listener = logging.handlers.QueueListener(
+            log_queue, file_handler, stream_handler, respect_handler_level=True
+        )
+        LoggingConfig.listener.start()
+        atexit.register(LoggingConfig.listener.stop)  # Flush queued records on exit
+        
+        # The queue carries the bare message; only the listener's handlers apply the real format
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
         logging.basicConfig(
             level=getattr(logging, config.LOG_LEVEL),
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
+            handlers=[queue_handler]
         )
         
         # Create logger
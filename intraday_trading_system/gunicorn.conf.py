@@ -0,0 +1,33 @@
+"""
+Gunicorn Configuration for the Premium Web Application
+Production server for REST and Socket.IO: gunicorn -c gunicorn.conf.py web_app.premium_app:app
+"""
+
+import multiprocessing
+import os
+
+# Binding
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5000')}"
+backlog = 4096
+reuse_port = True  # SO_REUSEPORT so the kernel balances accepts across workers
+
+# Workers: Flask-SocketIO needs an async worker; more than one worker
+# additionally needs SOCKETIO_MESSAGE_QUEUE and sticky sessions at the proxy
+worker_class = 'eventlet'
+workers = int(os.getenv('WEB_WORKERS', 1 if not os.getenv('SOCKETIO_MESSAGE_QUEUE') else multiprocessing.cpu_count()))
+worker_connections = 4096
+
+# Keep idle client/proxy connections open instead of re-handshaking per request
+keepalive = 75
+timeout = 60
+graceful_timeout = 30
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+def post_worker_init(worker):
+    """Start background updates once the worker is ready (socketio.run is bypassed under gunicorn)"""
+    from web_app.premium_app import start_background_tasks
+    start_background_tasks()
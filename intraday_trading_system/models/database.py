@@ -0,0 +1,68 @@
+"""
+SQLite Connection Pool
+Shares long-lived WAL-mode connections across requests instead of reopening the database per call
+"""
+
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+from typing import Iterator
+
+class ConnectionPool:
+    """Pool of SQLite connections: one writer plus N readers, all in WAL mode"""
+
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA mmap_size=268435456',   # 256 MB memory-mapped I/O
+        'PRAGMA cache_size=-65536',     # 64 MB page cache
+        'PRAGMA busy_timeout=5000'
+    )
+
+    def __init__(self, db_path: str, pool_size: int = 10):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        self._writer = self._connect()
+        self._write_lock = threading.Lock()
+
+        for _ in range(pool_size):
+            self._readers.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection and apply the pool-wide pragmas once"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read connection from the pool"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            # Readers never hold a transaction open between borrowers
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def write_connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the single writer connection; commits on success, rolls back on error"""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._write_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
@@ -5,12 +5,17 @@ Handles user authentication, subscriptions, and premium access
 
 import sqlite3
 import hashlib
+import hmac
 import jwt
 import datetime
-from typing import Optional, Dict, List, Any
+import time
+from typing import Optional, Dict, List, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import os
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHash
+from .database import ConnectionPool
 
 class UserRole(Enum):
     FREE = "free"
@@ -51,16 +56,30 @@ class SubscriptionPlan:
 class UserManager:
     """Manages user authentication and subscription system"""
     
-    def __init__(self, db_path: str, secret_key: str):
+    USER_CACHE_TTL = 120  # seconds a cached user may lag writes made by other processes
+    
+    # argon2id with low per-worker memory (19 MiB, 2 passes) so login bursts stay cheap
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    
+    def __init__(self, db_path: str, secret_key: str, pool_size: int = 10):
         self.db_path = db_path
         self.secret_key = secret_key
+        self.pool = ConnectionPool(db_path, pool_size=pool_size)
+        
+        # user_id -> (monotonic expiry, User); evicted on every write to that user
+        self._user_cache: Dict[int, Tuple[float, User]] = {}
         self.init_database()
     
     def init_database(self):
         """Initialize user management database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.pool.write_connection() as conn:
+            self._create_tables(conn.cursor())
         
+        # Insert default subscription plans
+        self.create_default_plans()
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """Create user, plan, payment and session tables"""
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -121,12 +140,6 @@ class UserManager:
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-        
-        # Insert default subscription plans
-        self.create_default_plans()
     
     def create_default_plans(self):
         """Create default subscription plans"""
@@ -170,38 +183,49 @@ class UserManager:
             }
         ]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for plan in plans:
-            cursor.execute('''
-                INSERT OR IGNORE INTO subscription_plans (name, price, duration_days, features)
-                VALUES (?, ?, ?, ?)
-            ''', (plan['name'], plan['price'], plan['duration_days'], str(plan['features'])))
-        
-        conn.commit()
-        conn.close()
+        with self.pool.write_connection() as conn:
+            cursor = conn.cursor()
+            
+            for plan in plans:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO subscription_plans (name, price, duration_days, features)
+                    VALUES (?, ?, ?, ?)
+                ''', (plan['name'], plan['price'], plan['duration_days'], str(plan['features'])))
     
     def hash_password(self, password: str) -> str:
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password using argon2id"""
+        return self.password_hasher.hash(password)
+    
+    def verify_password(self, password_hash: str, password: str) -> bool:
+        """Check a password against an argon2id hash or a legacy unsalted SHA-256 hash"""
+        if password_hash.startswith('$argon2'):
+            try:
+                return self.password_hasher.verify(password_hash, password)
+            except (VerificationError, InvalidHash):
+                return False
+        
+        legacy_hash = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy_hash, password_hash)
+    
+    def _password_needs_rehash(self, password_hash: str) -> bool:
+        """Legacy SHA-256 hashes and argon2 hashes with outdated parameters get upgraded on login"""
+        if not password_hash.startswith('$argon2'):
+            return True
+        return self.password_hasher.check_needs_rehash(password_hash)
     
     def create_user(self, username: str, email: str, phone: str, password: str) -> Dict[str, Any]:
         """Create new user account"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             password_hash = self.hash_password(password)
             
-            cursor.execute('''
-                INSERT INTO users (username, email, phone, password_hash)
-                VALUES (?, ?, ?, ?)
-            ''', (username, email, phone, password_hash))
-            
-            user_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self.pool.write_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO users (username, email, phone, password_hash)
+                    VALUES (?, ?, ?, ?)
+                ''', (username, email, phone, password_hash))
+                
+                user_id = cursor.lastrowid
             
             return {
                 'success': True,
@@ -222,24 +246,31 @@ class UserManager:
     def authenticate_user(self, username: str, password: str) -> Dict[str, Any]:
         """Authenticate user login"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            password_hash = self.hash_password(password)
-            
-            cursor.execute('''
-                SELECT * FROM users 
-                WHERE (username = ? OR email = ?) AND password_hash = ? AND is_active = 1
-            ''', (username, username, password_hash))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT * FROM users 
+                    WHERE (username = ? OR email = ?) AND is_active = 1
+                ''', (username, username))
+                
+                candidates = cursor.fetchall()
             
-            user_data = cursor.fetchone()
+            user_data = next(
+                (row for row in candidates if self.verify_password(row[4], password)), None
+            )
             
             if user_data:
-                # Update last login
-                cursor.execute('''
-                    UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
-                ''', (user_data[0],))
-                conn.commit()
+                # Update last login, upgrading the stored hash if needed
+                with self.pool.write_connection() as conn:
+                    if self._password_needs_rehash(user_data[4]):
+                        conn.execute('''
+                            UPDATE users SET password_hash = ?, last_login = CURRENT_TIMESTAMP WHERE id = ?
+                        ''', (self.hash_password(password), user_data[0]))
+                    else:
+                        conn.execute('''
+                            UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
+                        ''', (user_data[0],))
+                self.invalidate_user(user_data[0])
                 
                 # Generate JWT token
                 token = self.generate_jwt_token(user_data[0])
@@ -255,14 +286,12 @@ class UserManager:
                     'token': token
                 }
                 
-                conn.close()
                 return {
                     'success': True,
                     'user': user,
                     'message': 'Login successful'
                 }
             else:
-                conn.close()
                 return {
                     'success': False,
                     'message': 'Invalid credentials'
@@ -292,15 +321,28 @@ class UserManager:
         except jwt.InvalidTokenError:
             return None
     
+    def invalidate_user(self, user_id: int):
+        """Drop a user's cached record so the next lookup reads the database"""
+        self._user_cache.pop(user_id, None)
+    
     def get_user_by_id(self, user_id: int) -> Optional[User]:
-        """Get user by ID"""
+        """Get user by ID (served from a short-lived per-process cache)"""
+        cached = self._user_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        user = self._load_user(user_id)
+        if user:
+            self._user_cache[user_id] = (time.monotonic() + self.USER_CACHE_TTL, user)
+        return user
+    
+    def _load_user(self, user_id: int) -> Optional[User]:
+        """Read a user row from the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-            user_data = cursor.fetchone()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+                user_data = cursor.fetchone()
             
             if user_data:
                 return User(
@@ -345,48 +387,43 @@ class UserManager:
     def update_subscription_status(self, user_id: int, status: SubscriptionStatus):
         """Update user subscription status"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE users SET subscription_status = ? WHERE id = ?
-            ''', (status.value, user_id))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.write_connection() as conn:
+                conn.execute('''
+                    UPDATE users SET subscription_status = ? WHERE id = ?
+                ''', (status.value, user_id))
+            self.invalidate_user(user_id)
         except Exception as e:
             print(f"Error updating subscription status: {e}")
     
     def activate_subscription(self, user_id: int, plan_id: int, payment_id: str) -> bool:
         """Activate premium subscription for user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get plan details
-            cursor.execute('SELECT duration_days FROM subscription_plans WHERE id = ?', (plan_id,))
-            plan_data = cursor.fetchone()
-            
-            if not plan_data:
-                return False
-            
-            duration_days = plan_data[0]
-            start_date = datetime.datetime.now()
-            end_date = start_date + datetime.timedelta(days=duration_days)
-            
-            # Update user subscription
-            cursor.execute('''
-                UPDATE users SET 
-                    role = 'premium',
-                    subscription_status = 'active',
-                    subscription_start = ?,
-                    subscription_end = ?,
-                    payment_id = ?
-                WHERE id = ?
-            ''', (start_date.isoformat(), end_date.isoformat(), payment_id, user_id))
+            with self.pool.write_connection() as conn:
+                cursor = conn.cursor()
+                
+                # Get plan details
+                cursor.execute('SELECT duration_days FROM subscription_plans WHERE id = ?', (plan_id,))
+                plan_data = cursor.fetchone()
+                
+                if not plan_data:
+                    return False
+                
+                duration_days = plan_data[0]
+                start_date = datetime.datetime.now()
+                end_date = start_date + datetime.timedelta(days=duration_days)
+                
+                # Update user subscription
+                cursor.execute('''
+                    UPDATE users SET 
+                        role = 'premium',
+                        subscription_status = 'active',
+                        subscription_start = ?,
+                        subscription_end = ?,
+                        payment_id = ?
+                    WHERE id = ?
+                ''', (start_date.isoformat(), end_date.isoformat(), payment_id, user_id))
             
-            conn.commit()
-            conn.close()
+            self.invalidate_user(user_id)
             return True
         except Exception as e:
             print(f"Error activating subscription: {e}")
@@ -395,18 +432,18 @@ class UserManager:
     def get_subscription_plans(self) -> List[SubscriptionPlan]:
         """Get all active subscription plans"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, name, price, duration_days, features 
-                FROM subscription_plans 
-                WHERE is_active = 1
-                ORDER BY price ASC
-            ''')
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, name, price, duration_days, features 
+                    FROM subscription_plans 
+                    WHERE is_active = 1
+                    ORDER BY price ASC
+                ''')
+                rows = cursor.fetchall()
             
             plans = []
-            for row in cursor.fetchall():
+            for row in rows:
                 plans.append(SubscriptionPlan(
                     id=row[0],
                     name=row[1],
@@ -415,7 +452,6 @@ class UserManager:
                     features=eval(row[4])  # Convert string back to list
                 ))
             
-            conn.close()
             return plans
         except Exception as e:
             print(f"Error getting subscription plans: {e}")
@@ -424,26 +460,24 @@ class UserManager:
     def get_user_stats(self) -> Dict[str, Any]:
         """Get user statistics for admin dashboard"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Total users
-            cursor.execute('SELECT COUNT(*) FROM users')
-            total_users = cursor.fetchone()[0]
-            
-            # Premium users
-            cursor.execute("SELECT COUNT(*) FROM users WHERE subscription_status = 'active'")
-            premium_users = cursor.fetchone()[0]
-            
-            # New users today
-            cursor.execute('SELECT COUNT(*) FROM users WHERE DATE(created_at) = DATE("now")')
-            new_users_today = cursor.fetchone()[0]
-            
-            # Total revenue
-            cursor.execute('SELECT SUM(amount) FROM payments WHERE status = "completed"')
-            total_revenue = cursor.fetchone()[0] or 0
-            
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Total users
+                cursor.execute('SELECT COUNT(*) FROM users')
+                total_users = cursor.fetchone()[0]
+                
+                # Premium users
+                cursor.execute("SELECT COUNT(*) FROM users WHERE subscription_status = 'active'")
+                premium_users = cursor.fetchone()[0]
+                
+                # New users today
+                cursor.execute('SELECT COUNT(*) FROM users WHERE DATE(created_at) = DATE("now")')
+                new_users_today = cursor.fetchone()[0]
+                
+                # Total revenue
+                cursor.execute('SELECT SUM(amount) FROM payments WHERE status = "completed"')
+                total_revenue = cursor.fetchone()[0] or 0
             
             return {
                 'total_users': total_users,
@@ -33,6 +33,10 @@ class EnhancedTradingSystem:
         self.broker_type = None
         self.initialize_broker()
         
+        # NSE tradingsymbol -> instrument_token, refreshed once per day
+        self._instrument_tokens: Dict[str, int] = {}
+        self._instrument_tokens_date: Optional[datetime.date] = None
+        
         # News API (you can get free API key from newsapi.org)
         self.news_api = None
         try:
@@ -128,6 +132,18 @@ class EnhancedTradingSystem:
             logger.error(f"Error getting live data for {symbol}: {e}")
             return {}
     
+    def get_instrument_token(self, symbol: str) -> Optional[int]:
+        """Look up an NSE instrument token from the cached daily instrument dump"""
+        today = datetime.date.today()
+        if self._instrument_tokens_date != today:
+            instruments = self.api.instruments('NSE')
+            self._instrument_tokens = {
+                inst['tradingsymbol']: inst['instrument_token'] for inst in instruments
+            }
+            self._instrument_tokens_date = today
+        
+        return self._instrument_tokens.get(symbol.replace('NSE:', ''))
+    
     def get_historical_data(self, symbol: str, days: int = 30) -> pd.DataFrame:
         """Get historical data for technical analysis"""
         if not self.api or self.broker_type != 'zerodha':
@@ -135,13 +151,7 @@ class EnhancedTradingSystem:
             
         try:
             # Get instrument token
-            instruments = self.api.instruments('NSE')
-            instrument_token = None
-            
-            for inst in instruments:
-                if inst['tradingsymbol'] == symbol.replace('NSE:', ''):
-                    instrument_token = inst['instrument_token']
-                    break
+            instrument_token = self.get_instrument_token(symbol)
             
             if not instrument_token:
                 return pd.DataFrame()
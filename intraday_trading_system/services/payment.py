@@ -3,21 +3,62 @@ Payment Integration System
 Handles Razorpay payment processing for subscriptions
 """
 
-import razorpay
-import hashlib
 import hmac
 import json
-from typing import Dict, Any, Optional, List
+import time
+import orjson
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from models.user import UserManager, SubscriptionPlan
 
 class PaymentManager:
     """Manages subscription payments and Razorpay integration"""
     
+    ADMIN_STATS_TTL = 10  # seconds
+    
+    # User and revenue figures for the admin dashboard in a single round trip
+    ADMIN_STATS_QUERY = '''
+        WITH user_counts AS (
+            SELECT
+                COUNT(*) AS total_users,
+                COALESCE(SUM(subscription_status = 'active'), 0) AS premium_users,
+                COALESCE(SUM(DATE(created_at) = DATE('now')), 0) AS new_users_today
+            FROM users
+        ),
+        completed AS (
+            SELECT amount, created_at, COALESCE(payment_method, 'unknown') AS payment_method
+            FROM payments
+            WHERE status = 'completed'
+        ),
+        revenue AS (
+            SELECT
+                COALESCE(SUM(amount), 0) AS total_revenue,
+                COALESCE(SUM(CASE WHEN DATE(created_at) >= DATE('now', 'start of month') THEN amount END), 0) AS monthly_revenue,
+                COALESCE(SUM(CASE WHEN DATE(created_at) = DATE('now') THEN amount END), 0) AS daily_revenue
+            FROM completed
+        ),
+        methods AS (
+            SELECT json_group_object(payment_method, json_object('count', n, 'amount', total)) AS payment_methods
+            FROM (SELECT payment_method, COUNT(*) AS n, SUM(amount) AS total FROM completed GROUP BY payment_method)
+        )
+        SELECT * FROM user_counts, revenue, methods
+    '''
+    
     def __init__(self, razorpay_key: str, razorpay_secret: str, user_manager: UserManager):
-        self.client = razorpay.Client(auth=(razorpay_key, razorpay_secret))
         self.user_manager = user_manager
+        self.razorpay_key = razorpay_key
         self.razorpay_secret = razorpay_secret
+        self._secret_bytes = razorpay_secret.encode()
+        self._client = None
+        self._admin_stats_cache: Optional[Tuple[float, Dict[str, Any], Dict[str, Any]]] = None
+    
+    @property
+    def client(self):
+        """Razorpay client, created (and the SDK imported) on first use"""
+        if self._client is None:
+            import razorpay
+            self._client = razorpay.Client(auth=(self.razorpay_key, self.razorpay_secret))
+        return self._client
     
     def create_subscription_order(self, user_id: int, plan_id: int) -> Dict[str, Any]:
         """Create Razorpay order for subscription payment"""
@@ -76,14 +117,8 @@ class PaymentManager:
                 return False
             
             # Create signature
-            message = f"{razorpay_order_id}|{razorpay_payment_id}"
-            expected_signature = hmac.new(
-                self.razorpay_secret.encode(),
-                message.encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
-            return hmac.compare_digest(expected_signature, razorpay_signature)
+            message = f"{razorpay_order_id}|{razorpay_payment_id}".encode()
+            return self._signature_matches(message, razorpay_signature)
             
         except Exception as e:
             print(f"Signature verification error: {e}")
@@ -136,24 +171,18 @@ class PaymentManager:
     def _record_payment(self, user_id: int, plan_id: int, payment_info: Dict):
         """Record payment in database"""
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.user_manager.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO payments (user_id, plan_id, payment_id, amount, status, payment_method)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id,
-                plan_id,
-                payment_info['id'],
-                payment_info['amount'] / 100,  # Convert from paise to rupees
-                'completed',
-                payment_info.get('method', 'unknown')
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.user_manager.pool.write_connection() as conn:
+                conn.execute('''
+                    INSERT INTO payments (user_id, plan_id, payment_id, amount, status, payment_method)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    user_id,
+                    plan_id,
+                    payment_info['id'],
+                    payment_info['amount'] / 100,  # Convert from paise to rupees
+                    'completed',
+                    payment_info.get('method', 'unknown')
+                ))
             
         except Exception as e:
             print(f"Error recording payment: {e}")
@@ -200,21 +229,28 @@ class PaymentManager:
         except Exception as e:
             print(f"Error sending confirmation: {e}")
     
-    def handle_webhook(self, webhook_body: str, webhook_signature: str) -> Dict[str, Any]:
-        """Handle Razorpay webhook events"""
+    def _signature_matches(self, message: bytes, signature: Optional[str]) -> bool:
+        """Constant-time check of a hex HMAC-SHA256 signature (one-shot OpenSSL digest)"""
+        if not signature:
+            return False
+        expected = hmac.digest(self._secret_bytes, message, 'sha256')
         try:
-            # Verify webhook signature
-            expected_signature = hmac.new(
-                self.razorpay_secret.encode(),
-                webhook_body.encode(),
-                hashlib.sha256
-            ).hexdigest()
+            return hmac.compare_digest(expected, bytes.fromhex(signature))
+        except ValueError:
+            return False
+    
+    def handle_webhook(self, webhook_body: bytes, webhook_signature: Optional[str]) -> Dict[str, Any]:
+        """Handle Razorpay webhook events (body is the raw request bytes)"""
+        try:
+            if isinstance(webhook_body, str):
+                webhook_body = webhook_body.encode()
             
-            if not hmac.compare_digest(expected_signature, webhook_signature):
+            # Verify webhook signature
+            if not self._signature_matches(webhook_body, webhook_signature):
                 return {'success': False, 'message': 'Invalid webhook signature'}
             
-            # Parse webhook data
-            webhook_data = json.loads(webhook_body)
+            # Parse webhook data once, straight from bytes
+            webhook_data = orjson.loads(webhook_body)
             event = webhook_data.get('event')
             
             if event == 'payment.captured':
@@ -248,20 +284,19 @@ class PaymentManager:
     def get_payment_history(self, user_id: int) -> List[Dict[str, Any]]:
         """Get payment history for user"""
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.user_manager.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT p.*, sp.name as plan_name 
-                FROM payments p
-                JOIN subscription_plans sp ON p.plan_id = sp.id
-                WHERE p.user_id = ?
-                ORDER BY p.created_at DESC
-            ''', (user_id,))
+            with self.user_manager.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT p.*, sp.name as plan_name 
+                    FROM payments p
+                    JOIN subscription_plans sp ON p.plan_id = sp.id
+                    WHERE p.user_id = ?
+                    ORDER BY p.created_at DESC
+                ''', (user_id,))
+                rows = cursor.fetchall()
             
             payments = []
-            for row in cursor.fetchall():
+            for row in rows:
                 payments.append({
                     'id': row[0],
                     'plan_name': row[8],
@@ -271,7 +306,6 @@ class PaymentManager:
                     'created_at': row[7]
                 })
             
-            conn.close()
             return payments
             
         except Exception as e:
@@ -321,42 +355,39 @@ class PaymentManager:
     def get_revenue_stats(self) -> Dict[str, Any]:
         """Get revenue statistics for admin dashboard"""
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.user_manager.db_path)
-            cursor = conn.cursor()
-            
-            # Total revenue
-            cursor.execute('SELECT SUM(amount) FROM payments WHERE status = "completed"')
-            total_revenue = cursor.fetchone()[0] or 0
-            
-            # Monthly revenue
-            cursor.execute('''
-                SELECT SUM(amount) FROM payments 
-                WHERE status = "completed" 
-                AND DATE(created_at) >= DATE('now', 'start of month')
-            ''')
-            monthly_revenue = cursor.fetchone()[0] or 0
-            
-            # Today's revenue
-            cursor.execute('''
-                SELECT SUM(amount) FROM payments 
-                WHERE status = "completed" 
-                AND DATE(created_at) = DATE('now')
-            ''')
-            daily_revenue = cursor.fetchone()[0] or 0
-            
-            # Payment method breakdown
-            cursor.execute('''
-                SELECT payment_method, COUNT(*), SUM(amount) 
-                FROM payments 
-                WHERE status = "completed" 
-                GROUP BY payment_method
-            ''')
-            payment_methods = {}
-            for row in cursor.fetchall():
-                payment_methods[row[0]] = {'count': row[1], 'amount': row[2]}
-            
-            conn.close()
+            with self.user_manager.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Total revenue
+                cursor.execute('SELECT SUM(amount) FROM payments WHERE status = "completed"')
+                total_revenue = cursor.fetchone()[0] or 0
+                
+                # Monthly revenue
+                cursor.execute('''
+                    SELECT SUM(amount) FROM payments 
+                    WHERE status = "completed" 
+                    AND DATE(created_at) >= DATE('now', 'start of month')
+                ''')
+                monthly_revenue = cursor.fetchone()[0] or 0
+                
+                # Today's revenue
+                cursor.execute('''
+                    SELECT SUM(amount) FROM payments 
+                    WHERE status = "completed" 
+                    AND DATE(created_at) = DATE('now')
+                ''')
+                daily_revenue = cursor.fetchone()[0] or 0
+                
+                # Payment method breakdown
+                cursor.execute('''
+                    SELECT payment_method, COUNT(*), SUM(amount) 
+                    FROM payments 
+                    WHERE status = "completed" 
+                    GROUP BY payment_method
+                ''')
+                payment_methods = {}
+                for row in cursor.fetchall():
+                    payment_methods[row[0]] = {'count': row[1], 'amount': row[2]}
             
             return {
                 'total_revenue': total_revenue,
@@ -367,4 +398,39 @@ class PaymentManager:
             
         except Exception as e:
             print(f"Error getting revenue stats: {e}")
-            return {}
\ No newline at end of file
+            return {}
+    
+    def get_admin_stats(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Get (user_stats, revenue_stats) for the admin dashboard, memoized briefly"""
+        cached = self._admin_stats_cache
+        if cached and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+        
+        try:
+            with self.user_manager.pool.connection() as conn:
+                row = conn.execute(self.ADMIN_STATS_QUERY).fetchone()
+            
+            (total_users, premium_users, new_users_today,
+             total_revenue, monthly_revenue, daily_revenue, payment_methods) = row
+            
+            user_stats = {
+                'total_users': total_users,
+                'premium_users': premium_users,
+                'free_users': total_users - premium_users,
+                'new_users_today': new_users_today,
+                'total_revenue': total_revenue,
+                'conversion_rate': (premium_users / total_users * 100) if total_users > 0 else 0
+            }
+            revenue_stats = {
+                'total_revenue': total_revenue,
+                'monthly_revenue': monthly_revenue,
+                'daily_revenue': daily_revenue,
+                'payment_methods': json.loads(payment_methods)
+            }
+            
+            self._admin_stats_cache = (time.monotonic() + self.ADMIN_STATS_TTL, user_stats, revenue_stats)
+            return user_stats, revenue_stats
+            
+        except Exception as e:
+            print(f"Error getting admin stats: {e}")
+            return {}, {}
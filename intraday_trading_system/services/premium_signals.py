@@ -10,6 +10,16 @@ from models.user import UserManager, UserRole, SubscriptionStatus
 class PremiumSignalManager:
     """Manages premium signal access and filtering"""
     
+    # Fields masked out of every demo signal shown to free users
+    DEMO_SIGNAL_FIELDS = {
+        'entry_price': 'Premium Only',
+        'target_price': 'Premium Only',
+        'stop_loss': 'Premium Only',
+        'confidence': 'Premium Only',
+        'is_demo': True,
+        'message': 'Upgrade to Premium to see full signal details'
+    }
+    
     def __init__(self, user_manager: UserManager):
         self.user_manager = user_manager
         self.market_start_time = datetime.time(9, 15)  # 9:15 AM
@@ -142,24 +152,16 @@ class PremiumSignalManager:
     
     def _get_demo_signals(self, signals: List[Dict], limit: int = 2) -> List[Dict[str, Any]]:
         """Get demo/sample signals for free users with limited information"""
-        demo_signals = []
-        
-        for i, signal in enumerate(signals[:limit]):
-            demo_signal = {
+        return [
+            {
                 'id': signal.get('id', i+1),
-                'timestamp': signal.get('timestamp', datetime.datetime.now().isoformat()),
+                'timestamp': signal.get('timestamp') or datetime.datetime.now().isoformat(),
                 'instrument': signal.get('instrument', 'NIFTY'),
                 'signal_type': signal.get('signal_type', 'BUY'),
-                'entry_price': 'Premium Only',
-                'target_price': 'Premium Only',
-                'stop_loss': 'Premium Only',
-                'confidence': 'Premium Only',
-                'is_demo': True,
-                'message': 'Upgrade to Premium to see full signal details'
+                **self.DEMO_SIGNAL_FIELDS
             }
-            demo_signals.append(demo_signal)
-        
-        return demo_signals
+            for i, signal in enumerate(signals[:limit])
+        ]
     
     def get_signal_access_message(self, user_id: Optional[int]) -> Dict[str, Any]:
         """Get user-specific message about signal access"""
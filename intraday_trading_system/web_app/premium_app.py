@@ -3,15 +3,22 @@ Enhanced Web Application with Premium Features
 Premium subscription management, user authentication, and payment integration
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session, g
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
+from jinja2 import FileSystemBytecodeCache
+from pydantic import BaseModel, Field, ValidationError
 import json
+import decimal
+import orjson
 from datetime import datetime, timedelta
 import threading
 import asyncio
+import random
+import time
 from typing import Dict, List, Any, Optional
-from functools import wraps
+from functools import wraps, lru_cache
 import os
 import sys
 
@@ -19,51 +26,220 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import config, logger
-from bot.signal_manager import SignalManager
-from bot.market_data import MarketDataManager
-from bot.telegram_bot import TelegramBot
-from models.user import UserManager, UserRole, SubscriptionStatus
-from services.premium_signals import PremiumSignalManager
-from services.payment import PaymentManager
-from services.multi_broker import enhanced_trading_system
-from services.scheduler import initialize_scheduler, scheduled_alert_system
+from models.user import User, UserManager, UserRole, SubscriptionStatus
+
+# JSON serialization via orjson (native datetime, dataclass and numpy support)
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _orjson_default(obj: Any) -> Any:
+    """Fallback for the types Flask's default provider handles but orjson does not"""
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class ORJSONModule:
+    """json-module shim so Socket.IO packets are encoded with orjson too"""
+    
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS).decode()
+    
+    @staticmethod
+    def loads(s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return ORJSONModule.dumps(obj)
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return ORJSONModule.loads(s)
+
+# Request payloads, validated in a single pydantic-core pass
+class LoginForm(BaseModel):
+    username: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+class RegisterForm(BaseModel):
+    username: str = Field(min_length=1)
+    email: str = Field(min_length=1)
+    phone: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+class BotCommand(BaseModel):
+    command: str
+
+class PaymentPayload(BaseModel):
+    razorpay_order_id: str
+    razorpay_payment_id: str
+    razorpay_signature: str
+
+def invalid_payload(error: ValidationError):
+    """422 response for a JSON body that failed validation"""
+    return jsonify({'success': False, 'message': 'Invalid request payload',
+                    'errors': error.errors(include_url=False)}), 422
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = config.FLASK_SECRET_KEY
 app.config['DEBUG'] = config.FLASK_DEBUG
 
+# Persist compiled templates so each new worker skips parsing them
+JINJA_CACHE_DIR = os.path.join(config.DATA_DIR, 'jinja_cache')
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
 # Enable CORS
 CORS(app, origins=["*"])
 
 # Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Initialize managers
-signal_manager = SignalManager()
-market_data_manager = MarketDataManager()
-telegram_bot = TelegramBot()
-
-# Initialize premium features
-user_manager = UserManager(
-    db_path=os.path.join(config.DATA_DIR, 'users.db'),
-    secret_key=config.FLASK_SECRET_KEY
-)
-premium_signal_manager = PremiumSignalManager(user_manager)
-
-# Initialize payment system (you'll need to add these to your .env file)
+socketio = SocketIO(app, cors_allowed_origins="*", json=ORJSONModule,
+                    message_queue=config.SOCKETIO_MESSAGE_QUEUE)
+
+# Lazily-constructed managers: heavy SDK imports and database handles are only
+# created on first use, so forked workers never inherit half-initialized state
+@lru_cache(maxsize=1)
+def get_signal_manager():
+    """Signal storage and history"""
+    from bot.signal_manager import SignalManager
+    return SignalManager()
+
+@lru_cache(maxsize=1)
+def get_market_data_manager():
+    """Market overview data"""
+    from bot.market_data import MarketDataManager
+    return MarketDataManager()
+
+@lru_cache(maxsize=1)
+def get_user_manager() -> UserManager:
+    """User accounts and subscriptions"""
+    return UserManager(
+        db_path=os.path.join(config.DATA_DIR, 'users.db'),
+        secret_key=config.FLASK_SECRET_KEY
+    )
+
+@lru_cache(maxsize=1)
+def get_premium_signal_manager():
+    """Premium signal filtering and access control"""
+    from services.premium_signals import PremiumSignalManager
+    return PremiumSignalManager(get_user_manager())
+
+# Payment system credentials (you'll need to add these to your .env file)
 RAZORPAY_KEY = os.getenv('RAZORPAY_KEY_ID', 'your_razorpay_key')
 RAZORPAY_SECRET = os.getenv('RAZORPAY_KEY_SECRET', 'your_razorpay_secret')
-payment_manager = PaymentManager(RAZORPAY_KEY, RAZORPAY_SECRET, user_manager)
+
+@lru_cache(maxsize=1)
+def get_payment_manager():
+    """Razorpay payment processing (imports the Razorpay SDK on first use)"""
+    from services.payment import PaymentManager
+    return PaymentManager(RAZORPAY_KEY, RAZORPAY_SECRET, get_user_manager())
+
+@lru_cache(maxsize=1)
+def get_trading_system():
+    """Multi-broker market scanner and news feed"""
+    from services.multi_broker import enhanced_trading_system
+    return enhanced_trading_system
+
+# Request-scoped market data: each upstream call runs at most once per request
+def get_market_scan() -> Dict[str, Any]:
+    """Market scan result for the current request"""
+    if 'market_scan' not in g:
+        g.market_scan = get_trading_system().run_market_scan()
+    return g.market_scan
+
+def get_market_news() -> List[Dict[str, str]]:
+    """Market news for the current request, reusing the scan's copy when present"""
+    if 'market_news' not in g:
+        scan = g.get('market_scan')
+        if scan and 'news' in scan:
+            g.market_news = scan['news']
+        else:
+            g.market_news = get_trading_system().get_market_news()
+    return g.market_news
+
+def get_market_open() -> bool:
+    """Market open flag for the current request"""
+    if 'market_open' not in g:
+        g.market_open = get_trading_system().is_market_open()
+    return g.market_open
+
+# Process-wide market overview snapshot, refreshed by the background task
+MARKET_OVERVIEW_MAX_AGE = 60  # seconds before a request refreshes a stale snapshot itself
+_market_overview_snapshot = (0.0, None)  # (monotonic timestamp, overview)
+
+def refresh_market_overview() -> Dict[str, Any]:
+    """Fetch the market overview upstream and publish it as the current snapshot"""
+    global _market_overview_snapshot
+    overview = get_market_data_manager().get_market_overview()
+    _market_overview_snapshot = (time.monotonic(), overview)
+    return overview
+
+def get_market_overview() -> Dict[str, Any]:
+    """Current market overview without upstream I/O while the snapshot is fresh"""
+    updated, overview = _market_overview_snapshot
+    if overview is None or time.monotonic() - updated > MARKET_OVERVIEW_MAX_AGE:
+        return refresh_market_overview()
+    return overview
 
 # Global bot status
 bot_status = {
     'running': False,
     'last_signal': None,
     'signals_today': 0,
-    'uptime': datetime.now().isoformat()
+    'uptime': datetime.now()
 }
 
+# Request-scoped user helpers
+def current_user() -> Optional[User]:
+    """Load the logged-in user at most once per request"""
+    if 'user' not in g:
+        user_id = session.get('user_id')
+        g.user = get_user_manager().get_user_by_id(user_id) if user_id else None
+    return g.user
+
+def store_session_claims(role: str, subscription_status: str, subscription_end: Optional[str]):
+    """Embed role and premium expiry in the signed session cookie"""
+    session['role'] = role
+    if subscription_status == SubscriptionStatus.ACTIVE.value and subscription_end:
+        session['premium_until'] = subscription_end
+    else:
+        session.pop('premium_until', None)
+
+def store_user_claims(user: User):
+    """Refresh session claims from a loaded user record"""
+    store_session_claims(
+        user.role.value,
+        user.subscription_status.value,
+        user.subscription_end.isoformat() if user.subscription_end else None
+    )
+
+def session_has_premium() -> bool:
+    """Premium check from session claims alone, no database round trip"""
+    if session.get('role') == UserRole.ADMIN.value:
+        return True
+    premium_until = session.get('premium_until')
+    return bool(premium_until) and datetime.fromisoformat(premium_until) > datetime.now()
+
+def has_premium(user_id: int) -> bool:
+    """Session fast path, falling back to the database so fresh upgrades are picked up"""
+    if session_has_premium():
+        return True
+    if not get_user_manager().has_premium_access(user_id):
+        return False
+    user = current_user()
+    if user:
+        store_user_claims(user)
+    return True
+
+def user_room(user_id: int) -> str:
+    """Socket.IO room joined by every socket of a logged-in user"""
+    return f'user:{user_id}'
+
 # Authentication decorator
 def login_required(f):
     @wraps(f)
@@ -80,7 +256,7 @@ def premium_required(f):
             return redirect(url_for('login'))
         
         user_id = session['user_id']
-        if not user_manager.has_premium_access(user_id):
+        if not has_premium(user_id):
             flash('Premium subscription required for this feature.', 'warning')
             return redirect(url_for('subscribe'))
         return f(*args, **kwargs)
@@ -92,8 +268,15 @@ def admin_required(f):
         if 'user_id' not in session:
             return redirect(url_for('login'))
         
-        user = user_manager.get_user_by_id(session['user_id'])
-        if not user or user.role != UserRole.ADMIN:
+        if session.get('role') != UserRole.ADMIN.value:
+            flash('Admin access required.', 'error')
+            return redirect(url_for('index'))
+        
+        # The session claim outlives a demotion or ban; confirm it against the cached user record
+        user = current_user()
+        if user is None or not user.is_active or user.role != UserRole.ADMIN:
+            if user:
+                store_user_claims(user)
             flash('Admin access required.', 'error')
             return redirect(url_for('index'))
         return f(*args, **kwargs)
@@ -104,15 +287,22 @@ def admin_required(f):
 def login():
     """User login page"""
     if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
+        try:
+            form = LoginForm.model_validate(request.form.to_dict())
+        except ValidationError:
+            flash('Please enter your username and password.', 'error')
+            return render_template('auth/login.html')
         
-        result = user_manager.authenticate_user(username, password)
+        result = get_user_manager().authenticate_user(form.username, form.password)
         
         if result['success']:
             session['user_id'] = result['user']['id']
             session['username'] = result['user']['username']
-            session['role'] = result['user']['role']
+            store_session_claims(
+                result['user']['role'],
+                result['user']['subscription_status'],
+                result['user']['subscription_end']
+            )
             
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
@@ -125,12 +315,13 @@ def login():
 def register():
     """User registration page"""
     if request.method == 'POST':
-        username = request.form['username']
-        email = request.form['email']
-        phone = request.form['phone']
-        password = request.form['password']
+        try:
+            form = RegisterForm.model_validate(request.form.to_dict())
+        except ValidationError:
+            flash('Please fill in all registration fields.', 'error')
+            return render_template('auth/register.html')
         
-        result = user_manager.create_user(username, email, phone, password)
+        result = get_user_manager().create_user(form.username, form.email, form.phone, form.password)
         
         if result['success']:
             flash('Registration successful! Please login.', 'success')
@@ -154,14 +345,14 @@ def index():
     user_id = session.get('user_id')
     
     # Get recent signals (limited for non-premium users)
-    recent_signals = signal_manager.get_recent_signals(limit=5)
-    signal_data = premium_signal_manager.filter_signals_for_user(recent_signals, user_id)
+    recent_signals = get_signal_manager().get_recent_signals(limit=5)
+    signal_data = get_premium_signal_manager().filter_signals_for_user(recent_signals, user_id)
     
     # Get market data
-    market_data = market_data_manager.get_market_overview()
+    market_data = get_market_overview()
     
     # Get subscription benefits
-    benefits = premium_signal_manager.get_subscription_benefits()
+    benefits = get_premium_signal_manager().get_subscription_benefits()
     
     return render_template('index.html', 
                          signal_data=signal_data,
@@ -174,13 +365,12 @@ def index():
 def dashboard():
     """Enhanced premium dashboard with modern UI"""
     try:
-        user_id = session['user_id']
-        user = user_manager.get_user_by_id(user_id)
+        user = current_user()
         subscription_status = user.subscription_status.value if user.subscription_status else 'free'
         
         # Get market status and data
-        market_open = enhanced_trading_system.is_market_open()
-        market_scan = enhanced_trading_system.run_market_scan()
+        market_open = get_market_open()
+        market_scan = get_market_scan()
         
         # Get trading statistics
         stats = {
@@ -208,7 +398,7 @@ def dashboard():
             latest_signal['time'] = datetime.now().strftime('%I:%M %p')
         
         # Get market news
-        market_news = enhanced_trading_system.get_market_news()
+        market_news = get_market_news()
         
         return render_template('dashboard_modern.html', 
                              user=user, 
@@ -217,8 +407,7 @@ def dashboard():
                              latest_signal=latest_signal,
                              market_news=market_news,
                              market_open=market_open,
-                             subscription_status=subscription_status,
-                             **stats, **indicators)
+                             subscription_status=subscription_status)
                              
     except Exception as e:
         logger.error(f"Dashboard error: {e}")
@@ -233,22 +422,22 @@ def signals():
         user_id = session.get('user_id')
         
         # Check premium access
-        if not user_manager.has_premium_access(user_id):
+        if not has_premium(user_id):
             flash('Premium subscription required for live signals', 'warning')
             return redirect(url_for('subscribe'))
         
         # Get market scan with enhanced analysis
-        market_scan = enhanced_trading_system.run_market_scan()
+        market_scan = get_market_scan()
         signals = market_scan.get('breakouts', [])
         
         # Get signal history
-        signal_history = signal_manager.get_recent_signals(limit=20)
+        signal_history = get_signal_manager().get_recent_signals(limit=20)
         
         return render_template('signals.html', 
                              signals=signals,
                              signal_history=signal_history,
                              market_status=market_scan.get('status'),
-                             market_open=enhanced_trading_system.is_market_open())
+                             market_open=get_market_open())
                              
     except Exception as e:
         logger.error(f"Signals error: {e}")
@@ -263,11 +452,10 @@ def signals():
 @app.route('/subscribe')
 def subscribe():
     """Subscription plans page"""
-    plans = user_manager.get_subscription_plans()
-    benefits = premium_signal_manager.get_subscription_benefits()
+    plans = get_user_manager().get_subscription_plans()
+    benefits = get_premium_signal_manager().get_subscription_benefits()
     
-    user_id = session.get('user_id')
-    user = user_manager.get_user_by_id(user_id) if user_id else None
+    user = current_user()
     
     return render_template('subscription/plans.html',
                          plans=plans,
@@ -281,7 +469,7 @@ def payment(plan_id):
     user_id = session['user_id']
     
     # Create payment order
-    order_result = payment_manager.create_subscription_order(user_id, plan_id)
+    order_result = get_payment_manager().create_subscription_order(user_id, plan_id)
     
     if not order_result['success']:
         flash(order_result['message'], 'error')
@@ -296,13 +484,13 @@ def payment(plan_id):
 def account():
     """User account management"""
     user_id = session['user_id']
-    user = user_manager.get_user_by_id(user_id)
+    user = current_user()
     
     # Get payment history
-    payment_history = payment_manager.get_payment_history(user_id)
+    payment_history = get_payment_manager().get_payment_history(user_id)
     
     # Get subscription status
-    access_info = premium_signal_manager.can_access_premium_signals(user_id)
+    access_info = get_premium_signal_manager().can_access_premium_signals(user_id)
     
     return render_template('account/profile.html',
                          user=user,
@@ -314,15 +502,12 @@ def account():
 @admin_required
 def admin_dashboard():
     """Admin dashboard"""
-    # Get user statistics
-    user_stats = user_manager.get_user_stats()
-    
-    # Get revenue statistics
-    revenue_stats = payment_manager.get_revenue_stats()
+    # Get user and revenue statistics in one query
+    user_stats, revenue_stats = get_payment_manager().get_admin_stats()
     
     # Get system status
     system_stats = {
-        'signals_today': len(signal_manager.get_signals_by_date(datetime.now().date())),
+        'signals_today': get_signal_manager().count_signals_for_date(datetime.now().strftime('%Y-%m-%d')),
         'bot_uptime': bot_status['uptime'],
         'bot_running': bot_status['running']
     }
@@ -346,30 +531,35 @@ def api_signals():
     user_id = session.get('user_id')
     
     limit = int(request.args.get('limit', 20))
-    recent_signals = signal_manager.get_recent_signals(limit=limit)
+    recent_signals = get_signal_manager().get_recent_signals(limit=limit)
     
     # Filter signals based on user subscription
-    signal_data = premium_signal_manager.filter_signals_for_user(recent_signals, user_id)
+    signal_data = get_premium_signal_manager().filter_signals_for_user(recent_signals, user_id)
     
     return jsonify(signal_data)
 
 @app.route('/api/payment/success', methods=['POST'])
 def payment_success():
     """Handle successful payment"""
-    payment_data = request.json
+    try:
+        payment = PaymentPayload.model_validate_json(request.get_data())
+    except ValidationError as e:
+        return invalid_payload(e)
     
-    result = payment_manager.process_successful_payment(payment_data)
+    result = get_payment_manager().process_successful_payment(payment.model_dump())
     
     if result['success']:
         # Update session if it's the current user
         if session.get('user_id') == result['user_id']:
-            session['role'] = 'premium'
+            user = get_user_manager().get_user_by_id(result['user_id'])
+            if user:
+                store_user_claims(user)
         
-        # Send real-time update
+        # Send real-time update to the paying user's sockets only
         socketio.emit('subscription_activated', {
             'user_id': result['user_id'],
             'plan_id': result['plan_id']
-        })
+        }, to=user_room(result['user_id']))
     
     return jsonify(result)
 
@@ -377,9 +567,9 @@ def payment_success():
 def payment_webhook():
     """Handle Razorpay webhooks"""
     webhook_signature = request.headers.get('X-Razorpay-Signature')
-    webhook_body = request.get_data(as_text=True)
+    webhook_body = request.get_data()
     
-    result = payment_manager.handle_webhook(webhook_body, webhook_signature)
+    result = get_payment_manager().handle_webhook(webhook_body, webhook_signature)
     
     return jsonify(result)
 
@@ -389,7 +579,7 @@ def cancel_subscription():
     """Cancel user subscription"""
     user_id = session['user_id']
     
-    result = payment_manager.cancel_subscription(user_id)
+    result = get_payment_manager().cancel_subscription(user_id)
     
     return jsonify(result)
 
@@ -400,8 +590,8 @@ def analysis():
     """Market analysis page"""
     try:
         # Get comprehensive market analysis
-        market_scan = enhanced_trading_system.run_market_scan()
-        news = enhanced_trading_system.get_market_news()
+        market_scan = get_market_scan()
+        news = get_market_news()
         
         analysis_data = {
             'breakouts': market_scan.get('breakouts', []),
@@ -422,18 +612,22 @@ def analysis():
 def bot_command():
     """Handle bot command requests"""
     try:
-        command = request.json.get('command')
+        command = BotCommand.model_validate_json(request.get_data()).command
+    except ValidationError as e:
+        return invalid_payload(e)
+    
+    try:
         response = {}
         
         if command == 'market_status':
-            market_scan = enhanced_trading_system.run_market_scan()
+            market_scan = get_market_scan()
             response = {
                 'status': 'success',
-                'message': f"Market Status: {'OPEN' if enhanced_trading_system.is_market_open() else 'CLOSED'}",
+                'message': f"Market Status: {'OPEN' if get_market_open() else 'CLOSED'}",
                 'data': market_scan
             }
         elif command == 'latest_signals':
-            market_scan = enhanced_trading_system.run_market_scan()
+            market_scan = get_market_scan()
             signals = market_scan.get('breakouts', [])
             response = {
                 'status': 'success',
@@ -441,7 +635,7 @@ def bot_command():
                 'data': signals
             }
         elif command == 'news_update':
-            news = enhanced_trading_system.get_market_news()
+            news = get_market_news()
             response = {
                 'status': 'success',
                 'message': f"Latest {len(news)} news items",
@@ -463,42 +657,90 @@ def bot_command():
 @socketio.on('connect')
 def on_connect():
     """Handle client connection"""
-    print(f"Client connected: {request.sid}")
+    logger.debug("Client connected: %s", request.sid)
+    
+    # Per-user room so account events reach only that user's sockets
+    user_id = session.get('user_id')
+    if user_id:
+        join_room(user_room(user_id))
     
     # Send current bot status
     emit('bot_status', bot_status)
+    
+    # Late joiners get the last snapshot since unchanged updates are not re-broadcast
+    if latest_market_update is not None:
+        emit('market_update', latest_market_update)
 
 @socketio.on('disconnect')
 def on_disconnect():
     """Handle client disconnection"""
-    print(f"Client disconnected: {request.sid}")
+    logger.debug("Client disconnected: %s", request.sid)
 
 # Background task for real-time updates
+BACKGROUND_INTERVAL = 30  # seconds between market updates
+BACKGROUND_JITTER = 5     # random spread so restarts and workers don't hit upstream in lockstep
+background_stop = threading.Event()
+_background_leader_lock = None
+latest_market_update = None
+
+def acquire_background_leadership() -> bool:
+    """Elect a single worker to run background updates when workers share a message queue"""
+    global _background_leader_lock
+    
+    # Without a shared queue every worker must update its own connected clients
+    if not config.SOCKETIO_MESSAGE_QUEUE:
+        return True
+    
+    try:
+        import fcntl
+    except ImportError:
+        return True  # No flock on Windows; the dev server runs a single process there
+    
+    lock_file = open(os.path.join(config.DATA_DIR, 'background_tasks.lock'), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    
+    # Held for the life of the process; released by the OS on exit
+    _background_leader_lock = lock_file
+    return True
+
 def background_tasks():
     """Background tasks for real-time updates"""
-    while True:
+    global latest_market_update
+    last_signal_id = get_signal_manager().get_latest_signal_id()
+    
+    while not background_stop.is_set():
+        delay = BACKGROUND_INTERVAL
         try:
-            # Update market data every 30 seconds
-            market_data = market_data_manager.get_market_overview()
-            socketio.emit('market_update', market_data)
+            # Broadcast market data only when it changed since the last tick
+            market_data = refresh_market_overview()
+            if market_data != latest_market_update:
+                latest_market_update = market_data
+                socketio.emit('market_update', market_data)
             
-            # Check for new signals
-            new_signals = signal_manager.get_recent_signals(limit=1)
-            if new_signals and new_signals[0].timestamp > datetime.now() - timedelta(minutes=1):
+            # Push only signals committed since the last watermark
+            for signal in get_signal_manager().get_signals_since(last_signal_id):
+                last_signal_id = signal['id']
                 socketio.emit('new_signal', {
-                    'signal': new_signals[0].__dict__,
-                    'timestamp': datetime.now().isoformat()
+                    'signal': signal,
+                    'timestamp': datetime.now()
                 })
             
-            socketio.sleep(30)
-            
         except Exception as e:
             logger.error(f"Background task error: {e}")
-            socketio.sleep(60)
+            delay = BACKGROUND_INTERVAL * 2
+        
+        socketio.sleep(delay + random.uniform(0, BACKGROUND_JITTER))
 
 # Start background tasks
 def start_background_tasks():
-    """Start background tasks"""
+    """Start background tasks on the elected worker"""
+    if not acquire_background_leadership():
+        logger.info("Background updates handled by another worker")
+        return
     socketio.start_background_task(background_tasks)
 
 # Initialize enhanced system
@@ -509,6 +751,8 @@ def init_enhanced_system():
         telegram_token = config.TELEGRAM_BOT_TOKEN
         premium_chat_id = config.TELEGRAM_CHAT_ID
         
+        from services.scheduler import initialize_scheduler
+        
         scheduler = initialize_scheduler(telegram_token, premium_chat_id)
         scheduler.start_scheduler()
         
@@ -6,18 +6,27 @@ Real-time FnO signal generation with market data integration
 import asyncio
 import json
 import os
+import queue
 import random
 import threading
 import time
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import date, datetime, time as dt_time, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 import requests
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import logging
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+from indicators_numba import _atr, _bbands, _macd, _macd_state, _rsi_loop, _supertrend, _wilder_rma
 from pro_trader_setups import ProTraderSetups
 from signal_validation import SignalValidator
 from signal_generator import SignalGenerator
@@ -27,7 +36,129 @@ from signal_manager import SignalManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Indicator parameters used by the signal checks
+RSI_PERIOD = 14
+BB_PERIOD = 20
+BB_STD = 2.0
+SR_LOOKBACK = 20
+SUPERTREND_PERIOD = 10
+SUPERTREND_FACTOR = 3.0
+
+# Warmup windows (in multiples of the indicator period) for last-value-only indicator checks;
+# 12x keeps the Wilder seed error in the final RSI under 0.01 points (3x left ~1-4 points)
+RSI_WARMUP_BARS = 12
+MACD_WARMUP_BARS = 4
+
+# Telegram message for new signals, filled with str.format_map
+SIGNAL_MESSAGE_TEMPLATE = """
+🎯 *NEW PREMIUM TRADING SIGNAL*
+------------------
+📊 *{instrument}* ({option_symbol})
+▶️ *Signal*: {signal_type}
+💰 *Strike*: {strike_price}
+📈 *Entry*: {entry}
+🎯 *Target*: {target}
+🛑 *Stop Loss*: {stop_loss}
+📦 *Lot Size*: {lot_size}
+
+💡 *Setup*: {setup_description}
+⚖️ *Risk/Reward*: {risk_reward_ratio:.2f}
+🎲 *Confidence*: {confidence}%
+
+📊 *Risk Analysis*:
+• Account Risk: {account_risk:.2f}
+• Open Positions: {open_positions}
+• Daily P&L: ₹{daily_pnl:.2f}
+
+⏰ *{time}*
+📅 *{date}*
+
+💫 _Premium Signal Service_
+        """
+
+# Telegram broadcast for generated signals; technical indicators are listed between header and footer
+BROADCAST_HEADER_TEMPLATE = (
+    "🎯 *FnO Trading Signal*\n\n"
+    "Symbol: `{instrument}`\n"
+    "Option: `{option_symbol}`\n"
+    "Type: `{signal_type}`\n\n"
+    "Entry: `₹{option_entry_price:.2f}`\n"
+    "Target: `₹{option_target_price:.2f}` 🎯\n"
+    "Stop Loss: `₹{option_stop_loss:.2f}` 🛑\n\n"
+    "Lot Size: `{lot_size}`\n"
+    "Risk/Reward: `{risk_reward_ratio:.2f}`\n"
+    "Confidence: `{confidence:.1f}%`\n\n"
+    "*Technical Analysis:*\n"
+)
+BROADCAST_FOOTER_TEMPLATE = "\nSetup: _{setup_description}_\n\n⏰ `{time}`"
+
+# Kite instrument tokens of the tracked indices, streamed instead of polled;
+# names match the engine's instruments list
+INDEX_TOKENS = {
+    256265: 'NIFTY50',    # NSE:NIFTY 50
+    260105: 'BANKNIFTY',  # NSE:NIFTY BANK
+    265: 'SENSEX'         # BSE:SENSEX
+}
+
+# Yahoo Finance tickers for the fallback feed; other instruments use <name>.NS
+YF_SYMBOLS = {
+    'NIFTY': '^NSEI',
+    'NIFTY50': '^NSEI',
+    'BANKNIFTY': '^NSEBANK',
+    'SENSEX': '^BSESN'
+}
+
+# Seconds after the last streamed tick before an index quote is treated as stale
+STREAM_STALE_AFTER = 60
+
+# Index move (percent) since the last analysis that triggers an immediate signal loop run
+WAKE_MOVE_PERCENT = 0.25
+
+# Most signals folded into one Telegram message (Telegram caps messages at 4096 characters)
+MAX_NOTIFY_BATCH = 4
+
+# Telegram's per-message character limit; queued broadcasts are joined up to it
+TELEGRAM_MAX_MESSAGE = 4096
+
+# Seconds without ticks for open paper positions before prices are polled instead
+POSITION_POLL_INTERVAL = 30
+
+# Uniform draws pre-drawn per RNG batch for simulated prices (power of two so the index can wrap with a mask)
+RAND_BATCH = 8192
+
+# Simulated indicator ranges; support/resistance are multiples of the LTP
+SIM_INDICATOR_KEYS = ('rsi', 'macd', 'volume_ratio', 'support', 'resistance')
+SIM_INDICATOR_LOW = (30, -50, 0.8, 0.95, 1.02)
+SIM_INDICATOR_HIGH = (70, 50, 2.5, 0.98, 1.05)
+SIM_TRENDS = ('BULLISH', 'BEARISH', 'SIDEWAYS')
+
+# Setup descriptions for simulated signals; one is picked and formatted per signal
+SETUP_DESCRIPTION_TEMPLATES = (
+    "📈 **{instrument} showing strong {outlook} momentum.** Breakout above key resistance at {key_level}. Volume confirmation suggests a strong upward move.",
+    "📉 **Potential reversal pattern forming in {instrument}.** Price action indicates a {outlook} bias. Watching for a break of the {key_level} level.",
+    "📊 **{instrument} is consolidating near a critical support level.** A {outlook} move is anticipated. Entry triggered on high volume.",
+    "🚀 **High-probability {outlook} setup for {instrument}.** The current trend is strong, and we're seeing signs of continuation above {key_level}."
+)
+
+# Quote snapshots kept per instrument for market condition analysis
+BAR_HISTORY = 300
+
+# Trading session for index options
+MARKET_OPEN = dt_time(9, 15)
+MARKET_CLOSE = dt_time(15, 30)
+
+# Contract lot sizes and strike spacing; other instruments use the defaults
+LOT_SIZES = {'NIFTY': 50, 'BANKNIFTY': 15}
+DEFAULT_LOT_SIZE = 50
+STRIKE_STEPS = {'NIFTY': 50}
+DEFAULT_STRIKE_STEP = 100
+
+def _yf():
+    """Import yfinance on first use; it is slow to import and only needed for the fallback feed"""
+    import yfinance
+    return yfinance
+
+@dataclass(slots=True)
 class TradingSignal:
     """Trading signal data structure"""
     id: str
@@ -47,35 +178,348 @@ class TradingSignal:
     lot_size: int
     status: str = "ACTIVE"
 
+# Slotted signals have no __dict__; templates read fields by these names
+SIGNAL_FIELDS = tuple(f.name for f in fields(TradingSignal))
+
+class SignalStore:
+    """Struct-of-arrays storage for trading signals; numeric fields live in NumPy buffers
+    
+    The tick thread, the generation executor and the services loop all write here,
+    so every access to the columns goes through one lock.
+    """
+    
+    STATUSES = ("ACTIVE", "EXPIRED", "TRIGGERED", "TEST")
+    NUMERIC_FIELDS = ('ts', 'conf', 'strike', 'entry', 'target', 'stop', 'rr', 'lot_size', 'status')
+    
+    def __init__(self, capacity: int = 256):
+        self.statuses = list(self.STATUSES)
+        self.ids: List[str] = []
+        self.ts = np.empty(capacity, dtype=np.float64)  # epoch seconds need full precision
+        # Prices, confidence and ratios fit float32's 7 significant digits
+        self.conf = np.empty(capacity, dtype=np.float32)
+        self.strike = np.empty(capacity, dtype=np.float32)
+        self.entry = np.empty(capacity, dtype=np.float32)
+        self.target = np.empty(capacity, dtype=np.float32)
+        self.stop = np.empty(capacity, dtype=np.float32)
+        self.rr = np.empty(capacity, dtype=np.float32)
+        self.lot_size = np.empty(capacity, dtype=np.int32)
+        self.status = np.empty(capacity, dtype=np.int8)
+        self.meta: List[Dict[str, Any]] = []  # text fields, only needed to materialize a signal
+        self._lock = threading.RLock()
+        
+    def __len__(self):
+        return len(self.ids)
+        
+    def __iter__(self):
+        # Materialize a snapshot so no lock is held between yields
+        with self._lock:
+            signals = [self.get(i) for i in range(len(self))]
+        return iter(signals)
+        
+    def _status_code(self, status: str) -> int:
+        """Map a status string to its int8 code"""
+        if status not in self.statuses:
+            self.statuses.append(status)
+        return self.statuses.index(status)
+        
+    def append(self, signal: TradingSignal):
+        """Store a signal, growing the buffers when full"""
+        with self._lock:
+            i = len(self.ids)
+            if i == len(self.ts):
+                for name in self.NUMERIC_FIELDS:
+                    arr = getattr(self, name)
+                    setattr(self, name, np.concatenate([arr, np.empty_like(arr)]))
+                    
+            # Fill the columns before publishing the id, so row i is complete once len() counts it
+            self.ts[i] = signal.timestamp.timestamp()
+            self.conf[i] = signal.confidence
+            self.strike[i] = signal.strike_price
+            self.entry[i] = signal.option_entry_price
+            self.target[i] = signal.option_target_price
+            self.stop[i] = signal.option_stop_loss
+            self.rr[i] = signal.risk_reward_ratio
+            self.lot_size[i] = signal.lot_size
+            self.status[i] = self._status_code(signal.status)
+            self.meta.append({
+                'instrument': signal.instrument,
+                'option_symbol': signal.option_symbol,
+                'signal_type': signal.signal_type,
+                'setup_description': signal.setup_description,
+                'technical_indicators': signal.technical_indicators,
+                'expiry_date': signal.expiry_date
+            })
+            self.ids.append(signal.id)
+        
+    def get(self, i: int) -> TradingSignal:
+        """Materialize the signal at position i"""
+        with self._lock:
+            return TradingSignal(
+                id=self.ids[i],
+                timestamp=datetime.fromtimestamp(self.ts[i]),
+                strike_price=round(float(self.strike[i]), 2),
+                option_entry_price=round(float(self.entry[i]), 2),
+                option_target_price=round(float(self.target[i]), 2),
+                option_stop_loss=round(float(self.stop[i]), 2),
+                confidence=round(float(self.conf[i]), 2),
+                risk_reward_ratio=round(float(self.rr[i]), 2),
+                lot_size=int(self.lot_size[i]),
+                status=self.statuses[self.status[i]],
+                **self.meta[i]
+            )
+        
+    def expire(self, max_age: float, now: Optional[float] = None):
+        """Mark active signals older than max_age seconds as expired"""
+        now = time.time() if now is None else now
+        with self._lock:
+            n = len(self)
+            expired = ((now - self.ts[:n]) > max_age) & (self.status[:n] == self._status_code("ACTIVE"))
+            self.status[:n][expired] = self._status_code("EXPIRED")
+        
+    def prune(self, max_age: float, now: Optional[float] = None):
+        """Drop signals older than max_age seconds"""
+        now = time.time() if now is None else now
+        cutoff = now - max_age
+        
+        with self._lock:
+            n = len(self)
+            # Signals are stamped before market data is refreshed, so appends are
+            # not strictly in time order; select the fresh rows instead of a prefix
+            keep = np.flatnonzero(self.ts[:n] > cutoff)
+            k = len(keep)
+            if k == n:
+                return
+                
+            for name in self.NUMERIC_FIELDS:
+                arr = getattr(self, name)
+                arr[:k] = arr[keep]
+            rows = keep.tolist()
+            self.ids[:] = [self.ids[i] for i in rows]
+            self.meta[:] = [self.meta[i] for i in rows]
+        
+    def recent(self, limit: int = 10) -> List[TradingSignal]:
+        """Most recent signals first"""
+        with self._lock:
+            n = len(self)
+            return [self.get(i) for i in range(n - 1, max(n - limit, 0) - 1, -1)]
+
+@dataclass
+class Features:
+    """Indicator values for the latest closed bar of a (symbol, interval) series"""
+    bars: int
+    close: float
+    rsi: float
+    macd: float
+    macd_signal: float
+    bb_mid: float
+    bb_upper: float
+    bb_lower: float
+    sma20: float
+    sma50: float
+    support: float
+    resistance: float
+    atr: float
+    supertrend_upper: float
+    supertrend_lower: float
+    supertrend_direction: int
+
 class LiveSignalEngine:
     """Real-time signal generation engine with advanced technical analysis"""
     
-    def check_support_resistance(self, symbol, interval="1d", lookback=20):
+    def _get_hist(self, symbol, interval="1d", ttl=30):
+        """Get historical data, reusing a frame fetched within the last ttl seconds"""
+        key = (symbol, interval)
+        cached = self._hist_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+            
+        data = self.market_data.get_historical_data(symbol, interval)
+        if data is not None:
+            self._hist_cache[key] = (time.monotonic(), data)
+        return data
+        
+    def _evaluate_all_indicators(self, symbol, interval="1d"):
+        """Fetch historical data once and run every indicator check on it"""
+        data = self._get_hist(symbol, interval)
+        if data is None:
+            return [None] * len(self.indicators)
+        return [indicator(symbol, interval=interval, data=data) for indicator in self.indicators]
+        
+    def evaluate_all(self, symbols=None, interval="1d"):
+        """Evaluate every indicator for several symbols concurrently"""
+        symbols = symbols or self.instruments
+        futures = {
+            symbol: self._ind_pool.submit(self._evaluate_all_indicators, symbol, interval)
+            for symbol in symbols
+        }
+        return {symbol: future.result() for symbol, future in futures.items()}
+        
+    def _features(self, symbol, interval="1d", data=None) -> Optional[Features]:
+        """Get indicator features for the latest closed bar, computing them once per closed bar"""
+        if data is None:
+            data = self._get_hist(symbol, interval)
+        if data is None or len(data) < 2:
+            return None
+            
+        # The last row is the bar still forming; its values change until it closes
+        data = data.iloc[:-1]
+        
+        key = (symbol, interval)
+        last_bar = data.index[-1]
+        cached = self._feature_cache.get(key)
+        if cached and cached[0] == last_bar:
+            return cached[1]
+            
+        # Pull the columns out of pandas once; the kernels only see float64 arrays
+        arrays = {col: data[col].to_numpy(dtype=np.float64, copy=False) for col in ('high', 'low', 'close')}
+        close = arrays['close']
+        
+        # One new bar on top of a known one: advance the recurrences by a single step
+        state = self._indicator_state.get(key)
+        if (state and not np.isnan(state['atr']) and len(close) > 1 and
+                data.index[-2] == state['bar'] and close[-2] == state['close']):
+            state = self._bar_closed(state, last_bar, arrays['high'][-1], arrays['low'][-1], close[-1])
+        else:
+            state = self._seed_state(last_bar, arrays)
+        self._indicator_state[key] = state
+        
+        features = self._compute_features(arrays, state)
+        self._feature_cache[key] = (last_bar, features)
+        return features
+        
+    def _seed_state(self, bar, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Run the indicator recurrences over history to get their state at the latest bar"""
+        close = arrays['close']
+        high = arrays['high']
+        low = arrays['low']
+        
+        # RSI and MACD over warmup tails; older bars no longer affect the last value
+        delta = np.diff(close[-RSI_WARMUP_BARS * RSI_PERIOD:])
+        avg_gain = _wilder_rma(np.maximum(delta, 0.0), RSI_PERIOD)
+        avg_loss = _wilder_rma(np.maximum(-delta, 0.0), RSI_PERIOD)
+        ema12, ema26, ema9 = _macd_state(close[-MACD_WARMUP_BARS * 26:], 12, 26, 9)
+        
+        # ATR and Supertrend
+        atr = _atr(high, low, close, SUPERTREND_PERIOD)
+        st_upper, st_lower, st_direction = _supertrend(high, low, close, SUPERTREND_PERIOD, SUPERTREND_FACTOR)
+        
+        return {
+            'bar': bar,
+            'close': close[-1],
+            'rsi_avg_g': avg_gain[-1] if len(avg_gain) else np.nan,
+            'rsi_avg_l': avg_loss[-1] if len(avg_loss) else np.nan,
+            'ema12': ema12,
+            'ema26': ema26,
+            'ema9': ema9,
+            'atr': atr[-1],
+            'st_upper': st_upper[-1],
+            'st_lower': st_lower[-1],
+            'st_direction': int(st_direction[-1])
+        }
+        
+    def _bar_closed(self, state: Dict[str, Any], bar, high: float, low: float, close: float) -> Dict[str, Any]:
+        """Apply one update step of every indicator recurrence for a newly closed bar"""
+        prev_close = state['close']
+        p = RSI_PERIOD
+        
+        # Wilder-smoothed RSI gains and losses
+        delta = close - prev_close
+        avg_gain = (state['rsi_avg_g'] * (p - 1) + max(delta, 0.0)) / p
+        avg_loss = (state['rsi_avg_l'] * (p - 1) + max(-delta, 0.0)) / p
+        
+        # MACD EMAs
+        a_f, a_s, a_g = 2.0 / 13, 2.0 / 27, 2.0 / 10
+        ema12 = a_f * close + (1 - a_f) * state['ema12']
+        ema26 = a_s * close + (1 - a_s) * state['ema26']
+        ema9 = a_g * (ema12 - ema26) + (1 - a_g) * state['ema9']
+        
+        # ATR and Supertrend bands
+        n = SUPERTREND_PERIOD
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr = (state['atr'] * (n - 1) + tr) / n
+        mid = (high + low) / 2
+        basic_upper = mid + SUPERTREND_FACTOR * atr
+        basic_lower = mid - SUPERTREND_FACTOR * atr
+        prev_upper, prev_lower = state['st_upper'], state['st_lower']
+        st_upper = basic_upper if basic_upper < prev_upper or prev_close > prev_upper else prev_upper
+        st_lower = basic_lower if basic_lower > prev_lower or prev_close < prev_lower else prev_lower
+        if close > prev_upper:
+            st_direction = 1
+        elif close < prev_lower:
+            st_direction = -1
+        else:
+            st_direction = state['st_direction']
+            
+        return {
+            'bar': bar,
+            'close': close,
+            'rsi_avg_g': avg_gain,
+            'rsi_avg_l': avg_loss,
+            'ema12': ema12,
+            'ema26': ema26,
+            'ema9': ema9,
+            'atr': atr,
+            'st_upper': st_upper,
+            'st_lower': st_lower,
+            'st_direction': st_direction
+        }
+        
+    def _compute_features(self, arrays: Dict[str, np.ndarray], state: Dict[str, Any]) -> Features:
+        """Combine recurrence state with the windowed indicators the signal checks read"""
+        close = arrays['close']
+        high = arrays['high']
+        low = arrays['low']
+        
+        # Bollinger Bands over the last window only
+        if len(close) >= BB_PERIOD:
+            bb_mid, bb_upper, bb_lower = _bbands(close[-BB_PERIOD:], BB_PERIOD, BB_STD)
+            bb = (bb_mid[-1], bb_upper[-1], bb_lower[-1])
+        else:
+            bb = (np.nan, np.nan, np.nan)
+            
+        # Moving averages over the tail only; NaN until enough bars exist, as with rolling()
+        sma20 = close[-20:].mean() if len(close) >= 20 else np.nan
+        sma50 = close[-50:].mean() if len(close) >= 50 else np.nan
+        
+        # Support and resistance from recent highs and lows
+        resistance = high[-SR_LOOKBACK:].max()
+        support = low[-SR_LOOKBACK:].min()
+        
+        avg_loss = state['rsi_avg_l']
+        rsi = 100.0 if avg_loss == 0 else 100 - (100 / (1 + state['rsi_avg_g'] / avg_loss))
+        
+        return Features(
+            bars=len(close),
+            close=close[-1],
+            rsi=rsi,
+            macd=state['ema12'] - state['ema26'],
+            macd_signal=state['ema9'],
+            bb_mid=bb[0],
+            bb_upper=bb[1],
+            bb_lower=bb[2],
+            sma20=sma20,
+            sma50=sma50,
+            support=support,
+            resistance=resistance,
+            atr=state['atr'],
+            supertrend_upper=state['st_upper'],
+            supertrend_lower=state['st_lower'],
+            supertrend_direction=state['st_direction']
+        )
+        
+    def check_support_resistance(self, symbol, interval="1d", data=None):
         """Calculate support and resistance levels and generate signals."""
         try:
-            # Get historical data
-            data = self.market_data.get_historical_data(symbol, interval)
-            if data is None or len(data) < lookback:
+            features = self._features(symbol, interval, data)
+            if features is None or features.bars < SR_LOOKBACK:
                 return None
                 
-            # Find recent highs and lows
-            recent_data = data.tail(lookback)
-            highs = recent_data['high']
-            lows = recent_data['low']
-            
-            # Calculate support and resistance
-            resistance = highs.max()
-            support = lows.min()
-            
-            # Get current price
-            current_price = data['close'].iloc[-1]
-            
             # Calculate price position
-            range_size = resistance - support
+            range_size = features.resistance - features.support
             if range_size == 0:
                 return None
                 
-            position = (current_price - support) / range_size
+            position = (features.close - features.support) / range_size
             
             # Generate signals
             if position > 0.95:  # Near resistance
@@ -93,33 +537,21 @@ class LiveSignalEngine:
             logger.error(f"Error checking support/resistance: {str(e)}")
             return None
             
-    def check_bollinger_bands(self, symbol, interval="1d", period=20, num_std=2):
+    def check_bollinger_bands(self, symbol, interval="1d", data=None):
         """Calculate Bollinger Bands and generate signals."""
         try:
-            # Get historical data
-            data = self.market_data.get_historical_data(symbol, interval)
-            if data is None or len(data) < period:
+            features = self._features(symbol, interval, data)
+            if features is None or features.bars < BB_PERIOD:
                 return None
                 
-            # Calculate Bollinger Bands
-            sma = data['close'].rolling(window=period).mean()
-            std = data['close'].rolling(window=period).std()
-            upper_band = sma + (std * num_std)
-            lower_band = sma - (std * num_std)
-            
-            # Get current values
-            current_price = data['close'].iloc[-1]
-            current_upper = upper_band.iloc[-1]
-            current_lower = lower_band.iloc[-1]
-            current_sma = sma.iloc[-1]
-            
             # Generate signals
-            if current_price > current_upper:
+            current_price = features.close
+            if current_price > features.bb_upper:
                 return {'signal': 'SELL', 'strength': 'strong'}
-            elif current_price < current_lower:
+            elif current_price < features.bb_lower:
                 return {'signal': 'BUY', 'strength': 'strong'}
             else:
-                position = (current_price - current_lower) / (current_upper - current_lower)
+                position = (current_price - features.bb_lower) / (features.bb_upper - features.bb_lower)
                 if position > 0.8:
                     return {'signal': 'SELL', 'strength': 'weak'}
                 elif position < 0.2:
@@ -131,52 +563,33 @@ class LiveSignalEngine:
             logger.error(f"Error calculating Bollinger Bands: {str(e)}")
             return None
             
-    def check_macd(self, symbol, interval="1d"):
+    def check_macd(self, symbol, interval="1d", data=None):
         """Calculate MACD and generate signals."""
         try:
-            # Get historical data
-            data = self.market_data.get_historical_data(symbol, interval)
-            if data is None:
+            features = self._features(symbol, interval, data)
+            if features is None:
                 return None
                 
-            # Calculate MACD
-            exp1 = data['close'].ewm(span=12, adjust=False).mean()
-            exp2 = data['close'].ewm(span=26, adjust=False).mean()
-            macd = exp1 - exp2
-            signal = macd.ewm(span=9, adjust=False).mean()
-            
-            # Get current values
-            current_macd = macd.iloc[-1]
-            current_signal = signal.iloc[-1]
-            
             # Generate signals
-            if current_macd > current_signal:
-                strength = 'strong' if current_macd > 0 else 'weak'
+            if features.macd > features.macd_signal:
+                strength = 'strong' if features.macd > 0 else 'weak'
                 return {'signal': 'BUY', 'strength': strength}
             else:
-                strength = 'strong' if current_macd < 0 else 'weak'
+                strength = 'strong' if features.macd < 0 else 'weak'
                 return {'signal': 'SELL', 'strength': strength}
                 
         except Exception as e:
             logger.error(f"Error calculating MACD: {str(e)}")
             return None
             
-    def check_rsi(self, symbol, period=14, interval="1d"):
+    def check_rsi(self, symbol, interval="1d", data=None):
         """Calculate RSI and generate signals."""
         try:
-            # Get historical data
-            data = self.market_data.get_historical_data(symbol, interval)
-            if data is None or len(data) < period:
+            features = self._features(symbol, interval, data)
+            if features is None or features.bars < RSI_PERIOD:
                 return None
                 
-            # Calculate RSI
-            delta = data['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            current_rsi = rsi.iloc[-1]
+            current_rsi = features.rsi
             
             # Generate signals
             if current_rsi > 70:
@@ -190,24 +603,17 @@ class LiveSignalEngine:
             logger.error(f"Error calculating RSI: {str(e)}")
             return None
             
-    def check_moving_averages(self, symbol, interval="1d", lookback=20):
+    def check_moving_averages(self, symbol, interval="1d", data=None):
         """Check moving average signals for a symbol."""
         try:
-            # Get historical data
-            data = self.market_data.get_historical_data(symbol, interval)
-            if data is None or len(data) < lookback:
+            features = self._features(symbol, interval, data)
+            if features is None or features.bars < 20:
                 return None
                 
-            # Calculate moving averages
-            data['SMA20'] = data['close'].rolling(window=20).mean()
-            data['SMA50'] = data['close'].rolling(window=50).mean()
-            
-            # Get current values
-            current_price = data['close'].iloc[-1]
-            sma20 = data['SMA20'].iloc[-1]
-            sma50 = data['SMA50'].iloc[-1]
-            
             # Generate signals
+            current_price = features.close
+            sma20 = features.sma20
+            sma50 = features.sma50
             if current_price > sma20 and sma20 > sma50:
                 return {'signal': 'BUY', 'strength': 'strong'}
             elif current_price < sma20 and sma20 < sma50:
@@ -227,8 +633,15 @@ class LiveSignalEngine:
         
         # Initialize market data components
         self.market_data = MarketDataProvider(use_kite=True)
+        self._hist_cache: Dict[tuple, tuple] = {}  # (symbol, interval) -> (fetched_at, DataFrame)
+        self._feature_cache: Dict[tuple, tuple] = {}  # (symbol, interval) -> (last_bar, Features)
+        self._indicator_state: Dict[tuple, Dict[str, Any]] = {}  # (symbol, interval) -> recurrence state at last bar
         self.streamer = MarketDataStreamer()
         self.streamer.add_callback(self.on_market_data)
+        self.streamer.subscribe(list(INDEX_TOKENS))
+        self._stream_quotes: Dict[str, tuple] = {}  # instrument -> (received_at, quote)
+        self._quotes: Dict[str, Dict] = {}  # instrument -> latest quote used by the signal loop
+        self._analyzed_ltp: Dict[str, float] = {}  # instrument -> price the signal loop last analyzed
         
         # Initialize Telegram bot
         self.telegram = TelegramBot(
@@ -261,6 +674,9 @@ class LiveSignalEngine:
         from paper_trading_system import PaperTradingSystem
         self.paper_trader = PaperTradingSystem(initial_capital=100000.0)
         
+        # Bind the signal message template once
+        self._signal_tpl = SIGNAL_MESSAGE_TEMPLATE.format_map
+        
         # Initialize dashboard
         from dashboard_manager import DashboardManager
         self.dashboard = DashboardManager(self)
@@ -268,16 +684,34 @@ class LiveSignalEngine:
         # Initialize signal generation state
         self.is_running = False
         self.instruments = ["NIFTY50", "BANKNIFTY", "SENSEX"]  # Default instruments to track
-        self.signals = []
+        self.signals = SignalStore()
         self.last_signal_time = {}
+        self._lot_sizes = {k: LOT_SIZES.get(k, DEFAULT_LOT_SIZE) for k in (*self.instruments, *LOT_SIZES)}
+        self._strike_steps = {k: STRIKE_STEPS.get(k, DEFAULT_STRIKE_STEP) for k in (*self.instruments, *STRIKE_STEPS)}
+        self._services_loop = asyncio.new_event_loop()
+        self._position_q = asyncio.Queue()  # (option_symbol, last_price) ticks for open positions
+        self._notified_ids: Dict[int, set] = {}  # time bucket -> ids of signals already sent in it
+        self._notify_q = queue.Queue()  # signals waiting for Telegram/dashboard/paper trading
+        self._signal_future = None  # signal generation task on the services loop
+        self._wake = asyncio.Event()  # set to run the signal loop before its timeout
+        self._option_cache: Dict[str, Dict[str, np.ndarray]] = {}  # instrument -> relevant option arrays
+        self._bars = {k: np.zeros((2 * BAR_HISTORY, 5)) for k in self.instruments}  # mirrored OHLCV ring
+        self._bar_count = dict.fromkeys(self.instruments, 0)
+        self._rng = np.random.default_rng()
+        self._rand_buf = self._rng.uniform(size=RAND_BATCH)  # pre-drawn uniforms in [0, 1)
+        self._rand_idx = 0
         
         # Initialize signal components
         self.validator = SignalValidator()
         self.generator = SignalGenerator()
         self.signal_manager = SignalManager(self)
         
+        # Professional setups used to judge market conditions and trade setups
+        self.pro_setups = ProTraderSetups()
+        
         # Signal generation settings
         self.min_signal_interval = 300  # 5 minutes between signals
+        self.min_confidence = 75  # Minimum setup confidence for a signal
         self.max_active_signals = 5  # Maximum concurrent signals
         self.signal_expiry = 3600  # Signals expire after 1 hour if not triggered
         self.signal_cooldown = 300  # 5 minutes between signals for same instrument
@@ -296,12 +730,35 @@ class LiveSignalEngine:
             self.check_support_resistance
         ]
         
+        # Indicator kernels release the GIL, so symbols can be evaluated in parallel
+        self._ind_pool = ThreadPoolExecutor(
+            max_workers=len(self.instruments),
+            thread_name_prefix="indicators"
+        )
+        
+        # Fallback market data fetches run side by side; kept alive across loop iterations
+        self._fetch_pool = ThreadPoolExecutor(
+            max_workers=len(self.instruments),
+            thread_name_prefix="market-data"
+        )
+        
+        # (message, option_symbol) broadcasts waiting for the Telegram worker
+        self._broadcast_q = queue.Queue()
+        
         # Start background services
         import threading
         
-        # Start monitoring
-        self.monitor_thread = threading.Thread(target=self.monitor.start_monitoring, daemon=True)
-        self.monitor_thread.start()
+        # Start system and position monitoring on one event loop
+        self.services_thread = threading.Thread(target=self._run_services, daemon=True)
+        self.services_thread.start()
+        
+        # Start signal notification delivery
+        self.notify_thread = threading.Thread(target=self._notify_worker, daemon=True)
+        self.notify_thread.start()
+        
+        # Single broadcast worker so messages go out in order without blocking signal generation
+        self.broadcast_thread = threading.Thread(target=self._broadcast_worker, daemon=True)
+        self.broadcast_thread.start()
         
         # Start dashboard
         self.dashboard_thread = threading.Thread(
@@ -311,13 +768,6 @@ class LiveSignalEngine:
         )
         self.dashboard_thread.start()
         
-        # Start position monitoring
-        self.position_monitor_thread = threading.Thread(
-            target=self.monitor_paper_positions,
-            daemon=True
-        )
-        self.position_monitor_thread.start()
-        
         # Start market data stream
         self.streamer.start()
         
@@ -329,6 +779,15 @@ class LiveSignalEngine:
             last_price = data['last_price']
             volume = data.get('volume', 0)
             
+            # Keep the latest streamed index quotes for the signal loop
+            if instrument_token in INDEX_TOKENS:
+                self._on_index_tick(INDEX_TOKENS[instrument_token], data)
+            
+            # Hand ticks for open paper positions straight to the position monitor
+            symbol = data.get('tradingsymbol') or self.get_instrument_name(instrument_token)
+            if symbol in self._open_position_symbols():
+                self._services_loop.call_soon_threadsafe(self._position_q.put_nowait, (symbol, last_price))
+            
             # Add to data buffer for analysis
             self.update_market_data_buffer(instrument_token, data)
             
@@ -348,6 +807,9 @@ class LiveSignalEngine:
         """Analyze market data and generate signals"""
         instrument = self.get_instrument_name(instrument_token)
         
+        # Expire signals that were never triggered
+        self.signals.expire(self.signal_expiry)
+        
         # Get option chain data for the instrument
         option_data = self.market_data.get_option_chain(instrument)
         
@@ -373,32 +835,47 @@ class LiveSignalEngine:
                 opportunity['lot_size'] = lots
                 
                 # Generate and send signal
-                self.generate_signal_from_opportunity(opportunity)
+                self._emit_signal(instrument_token, opportunity)
             else:
                 logger.info(f"Trade rejected by risk management: {reason}")
-        
-        for signal_data in self.signals:
-            # Create trading signal
-            signal = TradingSignal(
-                id=f"SIGNAL_{int(time.time())}",
-                timestamp=datetime.now(),
-                instrument=self.get_instrument_name(instrument_token),
-                option_symbol=self.get_option_symbol(instrument_token, signal_data),
-                signal_type=signal_data['signal'],
-                strike_price=self.calculate_strike_price(instrument_token, signal_data),
-                option_entry_price=signal_data['price_level'],
-                option_target_price=self.calculate_target(signal_data),
-                option_stop_loss=self.calculate_stop_loss(signal_data),
-                confidence=signal_data['strength'],
-                setup_description=self.get_signal_description(signal_data),
-                technical_indicators=self.get_technical_indicators(instrument_token),
-                risk_reward_ratio=2.0,  # Configurable
-                expiry_date=self.get_next_expiry(),
-                lot_size=50  # Standard lot size
-            )
+                
+    def _emit_signal(self, instrument_token, opportunity):
+        """Create a trading signal from an opportunity and notify it once"""
+        # Same setup on the same strike within one signal interval is the same signal
+        strike = self.calculate_strike_price(instrument_token, opportunity)
+        bucket = int(time.time() // self.min_signal_interval)
+        signal_id = f"{self.get_instrument_name(instrument_token)}_{opportunity['signal']}_{strike}_{bucket}"
+        notified = self._notified_ids.get(bucket)
+        if notified is None:
+            # Ids embed their bucket, so ids from earlier buckets can never repeat; drop them
+            notified = set()
+            self._notified_ids = {bucket: notified}
+        elif signal_id in notified:
+            return
             
-            # Send signal notification
-            self.send_signal_notification(signal)
+        # Create trading signal
+        signal = TradingSignal(
+            id=signal_id,
+            timestamp=datetime.now(),
+            instrument=self.get_instrument_name(instrument_token),
+            option_symbol=self.get_option_symbol(instrument_token, opportunity),
+            signal_type=opportunity['signal'],
+            strike_price=strike,
+            option_entry_price=opportunity['price_level'],
+            option_target_price=self.calculate_target(opportunity),
+            option_stop_loss=self.calculate_stop_loss(opportunity),
+            confidence=opportunity['strength'],
+            setup_description=self.get_signal_description(opportunity),
+            technical_indicators=self.get_technical_indicators(instrument_token),
+            risk_reward_ratio=2.0,  # Configurable
+            expiry_date=self.get_next_expiry(),
+            lot_size=opportunity.get('lot_size', 50)  # Standard lot size
+        )
+        notified.add(signal_id)
+        self.signals.append(signal)
+        
+        # Send signal notification
+        self.send_signal_notification(signal)
             
     def get_instrument_name(self, instrument_token):
         """Get instrument name from token"""
@@ -454,97 +931,145 @@ class LiveSignalEngine:
             next_month = today.month + 1
             next_year = today.year
         return f"{next_month:02d}-{next_year}"
-        
-        # Initialize ProTrader setups
-        self.pro_setups = ProTraderSetups()
-        logger.info("LiveSignalEngine initialized successfully")
     
     def send_signal_notification(self, signal: TradingSignal):
-        """Send formatted signal notification via Telegram"""
-        current_time = datetime.now()
+        """Queue a signal for Telegram, monitoring, dashboard and paper trading"""
+        self._notify_q.put(signal)
         
-        # Prepare signal data
-        signal_data = {
-            "timestamp": current_time,
-            "signal_type": signal.signal_type,
-            "instrument": signal.instrument,
-            "option_symbol": signal.option_symbol,
-            "confidence": signal.confidence,
-            "option_entry_price": signal.option_entry_price,
-            "option_target_price": signal.option_target_price,
-            "option_stop_loss": signal.option_stop_loss,
-            "status": "ACTIVE",
-            "profit": 0,
-            "lot_size": signal.lot_size
-        }
+    def _notify_worker(self):
+        """Deliver queued signals off the signal generation path"""
+        while True:
+            batch = [self._notify_q.get()]
+            
+            # Fold signals that queued up meanwhile into the same Telegram message
+            while len(batch) < MAX_NOTIFY_BATCH:
+                try:
+                    batch.append(self._notify_q.get_nowait())
+                except queue.Empty:
+                    break
+                    
+            try:
+                self._deliver_signals(batch)
+            except Exception as e:
+                logger.error(f"Error delivering signal notifications: {e}", exc_info=True)
+                
+    def _deliver_signals(self, signals: List[TradingSignal]):
+        """Send formatted signal notifications via Telegram and record the signals"""
+        current_time = datetime.now()
+        time_str = current_time.strftime('%I:%M:%S %p')
+        date_str = current_time.strftime('%d-%b-%Y')
         
         # Get risk metrics
         risk_metrics = self.risk_manager.get_risk_metrics()
         
         # Format Telegram message
-        message = f"""
-🎯 *NEW PREMIUM TRADING SIGNAL*
-------------------
-📊 *{signal.instrument}* ({signal.option_symbol})
-▶️ *Signal*: {signal.signal_type}
-💰 *Strike*: {signal.strike_price}
-📈 *Entry*: {signal.option_entry_price}
-🎯 *Target*: {signal.option_target_price}
-🛑 *Stop Loss*: {signal.option_stop_loss}
-📦 *Lot Size*: {signal.lot_size}
-
-💡 *Setup*: {signal.setup_description}
-⚖️ *Risk/Reward*: {signal.risk_reward_ratio:.2f}
-🎲 *Confidence*: {signal.confidence}%
-
-📊 *Risk Analysis*:
-• Account Risk: {signal.lot_size * abs(signal.option_entry_price - signal.option_stop_loss):.2f}
-• Open Positions: {risk_metrics['open_positions']}
-• Daily P&L: ₹{risk_metrics['daily_pnl']:.2f}
-
-⏰ *{current_time.strftime('%I:%M:%S %p')}*
-📅 *{current_time.strftime('%d-%b-%Y')}*
-
-💫 _Premium Signal Service_
-        """
+        message = "\n".join(
+            self._signal_tpl({
+                'instrument': signal.instrument,
+                'option_symbol': signal.option_symbol,
+                'signal_type': signal.signal_type,
+                'strike_price': signal.strike_price,
+                'entry': signal.option_entry_price,
+                'target': signal.option_target_price,
+                'stop_loss': signal.option_stop_loss,
+                'lot_size': signal.lot_size,
+                'setup_description': signal.setup_description,
+                'risk_reward_ratio': signal.risk_reward_ratio,
+                'confidence': signal.confidence,
+                'account_risk': signal.lot_size * abs(signal.option_entry_price - signal.option_stop_loss),
+                'open_positions': risk_metrics['open_positions'],
+                'daily_pnl': risk_metrics['daily_pnl'],
+                'time': time_str,
+                'date': date_str
+            })
+            for signal in signals
+        )
         
         # Send to Telegram
         try:
             self.telegram.send_message(message, parse_mode="Markdown")
         except Exception as e:
             logger.error(f"Failed to send Telegram message: {e}")
+            
+        for signal in signals:
+            # Prepare signal data
+            signal_data = {
+                "timestamp": current_time,
+                "signal_type": signal.signal_type,
+                "instrument": signal.instrument,
+                "option_symbol": signal.option_symbol,
+                "confidence": signal.confidence,
+                "option_entry_price": signal.option_entry_price,
+                "option_target_price": signal.option_target_price,
+                "option_stop_loss": signal.option_stop_loss,
+                "status": "ACTIVE",
+                "profit": 0,
+                "lot_size": signal.lot_size
+            }
+            
+            # Log in monitoring system
+            self.monitor.log_signal(signal_data)
+            
+            # Update dashboard
+            self.dashboard.add_signal(signal_data)
+            
+            # Execute paper trade
+            paper_trade = self.paper_trader.enter_trade(signal_data)
+            if paper_trade:
+                # Add to risk manager tracking
+                self.risk_manager.add_position(paper_trade.trade_id, signal_data)
+                logger.info(f"Paper trade entered: {paper_trade.trade_id}")
+            
+    def _open_position_symbols(self) -> frozenset:
+        """Option symbols of the currently open paper positions
         
-        # Log in monitoring system
-        self.monitor.log_signal(signal_data)
+        Read from the tick thread, so this uses the set the paper trader republishes
+        on entry and exit instead of walking positions it may be deleting from.
+        """
+        return self.paper_trader.open_symbols
         
-        # Update dashboard
-        self.dashboard.add_signal(signal_data)
+    def _poll_position_prices(self) -> Dict[str, Dict[str, float]]:
+        """Fetch prices for open positions from the market data provider in one batch"""
+        symbols = list(self._open_position_symbols())
+        if not symbols:
+            return {}
+        prices = self.market_data.get_ltps(symbols)
+        return {symbol: {'last_price': price} for symbol, price in prices.items() if price}
         
-        # Execute paper trade
-        paper_trade = self.paper_trader.enter_trade(signal_data)
-        if paper_trade:
-            # Add to risk manager tracking
-            self.risk_manager.add_position(paper_trade.trade_id, signal_data)
-            logger.info(f"Paper trade entered: {paper_trade.trade_id}")
+    def _run_services(self):
+        """Run the background monitors as tasks on a single asyncio event loop"""
+        asyncio.set_event_loop(self._services_loop)
+        self._services_loop.run_until_complete(asyncio.gather(
+            self._monitor_loop(),
+            self._positions_loop()
+        ))
+        
+    async def _monitor_loop(self):
+        """Save system metrics every minute"""
+        while True:
+            try:
+                await self._services_loop.run_in_executor(None, self.monitor.save_system_metrics)
+            except Exception as e:
+                logger.error(f"Monitoring error: {e}", exc_info=True)
+            await asyncio.sleep(60)  # Update every minute
             
-    def monitor_paper_positions(self):
-        """Monitor and update paper trading positions"""
+    async def _positions_loop(self):
+        """Update paper trading positions as ticks for them arrive"""
         while True:
             try:
-                # Get current market data for active positions
-                symbols = [
-                    trade.option_symbol
-                    for trade in self.paper_trader.account.current_positions.values()
-                ]
-                
-                if symbols:
-                    market_data = {}
-                    for symbol in symbols:
-                        # Get real-time price from market data provider
-                        price = self.market_data.get_ltp(symbol)
-                        if price:
-                            market_data[symbol] = {'last_price': price}
+                try:
+                    symbol, price = await asyncio.wait_for(self._position_q.get(), POSITION_POLL_INTERVAL)
+                    market_data = {symbol: {'last_price': price}}
                     
+                    # Coalesce a burst of ticks into a single update
+                    while not self._position_q.empty():
+                        symbol, price = self._position_q.get_nowait()
+                        market_data[symbol] = {'last_price': price}
+                except asyncio.TimeoutError:
+                    # No ticks for open positions lately; fall back to polling prices
+                    market_data = await self._services_loop.run_in_executor(None, self._poll_position_prices)
+                
+                if market_data:
                     # Update paper trading positions
                     self.paper_trader.update_positions(market_data)
                     
@@ -552,106 +1077,9 @@ class LiveSignalEngine:
                     metrics = self.paper_trader.get_performance_metrics()
                     logger.debug(f"Paper trading metrics: {metrics}")
                 
-                time.sleep(1)  # Check every second
-                
             except Exception as e:
                 logger.error(f"Error monitoring positions: {e}", exc_info=True)
-                time.sleep(5)  # Wait before retrying
-        
-        # Get system health
-        health = self.monitor.get_health_status()
-        
-        message = f"""
-🎯 *NEW TRADING SIGNAL*
-------------------
-📊 *{signal.instrument}* ({signal.option_symbol})
-▶️ *Signal*: {signal.signal_type}
-💰 *Strike*: {signal.strike_price}
-📈 *Entry*: {signal.option_entry_price}
-🎯 *Target*: {signal.option_target_price}
-🛑 *Stop Loss*: {signal.option_stop_loss}
-📊 *Risk/Reward*: {signal.risk_reward_ratio:.2f}
-🎲 *Confidence*: {signal.confidence}%
-📅 *Expiry*: {signal.expiry_date}
-📦 *Lot Size*: {signal.lot_size}
-
-💡 *Setup*: {signal.setup_description}
-
-🔄 *System Health*: {'✅' if health['status'] == 'healthy' else '⚠️'}
-        """
-        try:
-            self.telegram.send_message(message, parse_mode="Markdown")
-            logger.info(f"Signal notification sent successfully: {signal.id}")
-        except Exception as e:
-            logger.error(f"Failed to send signal notification: {e}", exc_info=True)
-        self.signals = []
-        self.market_data = {}
-        self.pro_setups = ProTraderSetups()  # Initialize professional setups
-        
-        # Enhanced strategy parameters
-        self.strategy_params = {
-            'vwap': {
-                'reversal_confirmation_period': 3,
-                'volume_threshold': 1.5
-            },
-            'momentum': {
-                'ema_fast': 9,
-                'ema_slow': 21,
-                'rsi_period': 14,
-                'rsi_overbought': 70,
-                'rsi_oversold': 30
-            },
-            'breakout': {
-                'volume_surge_threshold': 2.0,
-                'consolidation_periods': 3,
-                'minimum_consolidation_width': 0.5  # % of price
-            },
-            'risk_management': {
-                'max_risk_per_trade': 1.0,  # % of capital
-                'minimum_risk_reward': 1.5,
-                'trailing_stop': 0.5  # % of price
-            }
-        }
-        self.is_running = False
-        self.signal_thread = None
-        self.market_data_provider = market_data_provider
-        self.telegram_bot = telegram_bot
-        
-        # Instruments to monitor
-        self.instruments = {
-            'NIFTY': {
-                'lot_size': 50,
-                'atm_range': 500,  # Monitor strikes within ±500 of ATM
-                'min_premium': 50,  # Minimum option premium
-                'max_premium': 300  # Maximum option premium
-            },
-            'BANKNIFTY': {
-                'lot_size': 25,
-                'atm_range': 1000,
-                'min_premium': 70,
-                'max_premium': 400
-            }
-        }
-        
-        # Technical indicators configuration
-        self.indicators = {
-            'RSI': {'period': 14, 'overbought': 70, 'oversold': 30},
-            'MACD': {'fast': 12, 'slow': 26, 'signal': 9},
-            'Supertrend': {'period': 10, 'multiplier': 3},
-            'Volume': {'avg_period': 20, 'min_ratio': 1.5}
-        }
-        
-        # Signal generation parameters
-        self.min_confidence = 75  # Increased minimum confidence
-        self.max_signals_per_hour = 4  # Reduced for higher quality
-        self.signal_cooldown = 900  # 15 minutes between signals
-        self.last_signal_time = {}
-        
-        # Risk management
-        self.max_risk_per_trade = 2.0  # Maximum % of capital to risk
-        self.min_risk_reward = 1.5  # Minimum risk-reward ratio
-        
-        logger.info("Live Signal Engine initialized with advanced configuration")
+                await asyncio.sleep(5)  # Wait before retrying
 
     def calculate_indicators(self, data: pd.DataFrame) -> dict:
         """Calculate technical indicators for signal generation"""
@@ -659,34 +1087,34 @@ class LiveSignalEngine:
         
         try:
             # RSI Calculation
-            delta = data['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=self.indicators['RSI']['period']).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=self.indicators['RSI']['period']).mean()
-            rs = gain / loss
-            indicators['RSI'] = 100 - (100 / (1 + rs))
+            close = data['close'].to_numpy(dtype=np.float64, copy=False)
+            rsi = _rsi_loop(close, self.indicators['RSI']['period'])
+            indicators['RSI'] = pd.Series(rsi, index=data.index)
             
             # MACD Calculation
-            exp1 = data['close'].ewm(span=self.indicators['MACD']['fast']).mean()
-            exp2 = data['close'].ewm(span=self.indicators['MACD']['slow']).mean()
-            macd = exp1 - exp2
-            signal = macd.ewm(span=self.indicators['MACD']['signal']).mean()
-            indicators['MACD'] = macd
-            indicators['MACD_Signal'] = signal
+            macd, signal = _macd(
+                close,
+                self.indicators['MACD']['fast'],
+                self.indicators['MACD']['slow'],
+                self.indicators['MACD']['signal']
+            )
+            indicators['MACD'] = pd.Series(macd, index=data.index)
+            indicators['MACD_Signal'] = pd.Series(signal, index=data.index)
             
             # Supertrend Calculation
             atr_period = self.indicators['Supertrend']['period']
             factor = self.indicators['Supertrend']['multiplier']
             
-            tr1 = data['high'] - data['low']
-            tr2 = abs(data['high'] - data['close'].shift())
-            tr3 = abs(data['low'] - data['close'].shift())
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            atr = tr.rolling(window=atr_period).mean()
-            
-            upperband = ((data['high'] + data['low']) / 2) + (factor * atr)
-            lowerband = ((data['high'] + data['low']) / 2) - (factor * atr)
-            indicators['Supertrend_Upper'] = upperband
-            indicators['Supertrend_Lower'] = lowerband
+            upperband, lowerband, direction = _supertrend(
+                data['high'].to_numpy(dtype=np.float64, copy=False),
+                data['low'].to_numpy(dtype=np.float64, copy=False),
+                close,
+                atr_period,
+                float(factor)
+            )
+            indicators['Supertrend_Upper'] = pd.Series(upperband, index=data.index)
+            indicators['Supertrend_Lower'] = pd.Series(lowerband, index=data.index)
+            indicators['Supertrend_Direction'] = pd.Series(direction, index=data.index)
             
             # Volume Analysis
             indicators['Volume_Ratio'] = data['volume'] / data['volume'].rolling(window=self.indicators['Volume']['avg_period']).mean()
@@ -712,11 +1140,21 @@ class LiveSignalEngine:
             min_strike = atm_strike - config['atm_range']
             max_strike = atm_strike + config['atm_range']
             
-            relevant_options = []
-            for option in option_chain:
-                if (min_strike <= option['strike'] <= max_strike and 
-                    config['min_premium'] <= option['last_price'] <= config['max_premium']):
-                    relevant_options.append(option)
+            # Keep the relevant strikes as parallel arrays for vectorized selection
+            chain = pd.DataFrame(option_chain, columns=['strike', 'last_price', 'type', 'expiry'])
+            strikes = chain['strike'].to_numpy(dtype=np.float64)
+            prices = chain['last_price'].to_numpy(dtype=np.float64)
+            mask = ((strikes >= min_strike) & (strikes <= max_strike) &
+                    (prices >= config['min_premium']) & (prices <= config['max_premium']))
+            option_types = chain['type'].to_numpy()[mask]
+            relevant_options = {
+                'strike': strikes[mask],
+                'last_price': prices[mask],
+                'is_ce': option_types == 'CE',
+                'is_pe': option_types == 'PE',
+                'expiry': chain['expiry'].to_numpy()[mask]
+            }
+            self._option_cache[instrument] = relevant_options
             
             return {
                 'spot_price': spot_price,
@@ -728,8 +1166,9 @@ class LiveSignalEngine:
             logger.error(f"Error analyzing option chain: {e}")
             return {}
 
-    def generate_signal(self, instrument: str) -> Optional[TradingSignal]:
+    def generate_signal(self, instrument: str, now: Optional[datetime] = None) -> Optional[TradingSignal]:
         """Generate trading signal based on technical analysis and option chain"""
+        now = now or datetime.now()
         try:
             # Get historical data for analysis
             data = self.market_data_provider.get_historical_data(
@@ -764,34 +1203,35 @@ class LiveSignalEngine:
                 volume_ratio > self.indicators['Volume']['min_ratio']):
                 
                 # Find suitable CE option
-                for option in option_data['options']:
-                    if option['type'] == 'CE':
-                        entry = option['last_price']
-                        target = entry * 1.5  # 50% target
-                        stop_loss = entry * 0.8  # 20% stop loss
-                        
-                        signal = TradingSignal(
-                            id=f"{instrument}_CE_{int(time.time())}",
-                            timestamp=datetime.now(),
-                            instrument=instrument,
-                            option_symbol=f"{instrument}{option['strike']}CE",
-                            signal_type="BUY_CALL",
-                            strike_price=option['strike'],
-                            option_entry_price=entry,
-                            option_target_price=target,
-                            option_stop_loss=stop_loss,
-                            confidence=min(85.0, rsi + volume_ratio * 10),
-                            setup_description="Oversold RSI with MACD bullish crossover and high volume",
-                            technical_indicators={
-                                'RSI': round(rsi, 2),
-                                'MACD': 'Bullish Crossover',
-                                'Volume': f"{round(volume_ratio, 1)}x average"
-                            },
-                            risk_reward_ratio=(target - entry) / (entry - stop_loss),
-                            expiry_date=option['expiry'],
-                            lot_size=self.instruments[instrument]['lot_size']
-                        )
-                        break
+                options = option_data['options']
+                if options['is_ce'].any():
+                    idx = int(np.argmax(options['is_ce']))
+                    strike = options['strike'][idx]
+                    entry = options['last_price'][idx]
+                    target = entry * 1.5  # 50% target
+                    stop_loss = entry * 0.8  # 20% stop loss
+                    
+                    signal = TradingSignal(
+                        id=f"{instrument}_CE_{int(now.timestamp())}",
+                        timestamp=now,
+                        instrument=instrument,
+                        option_symbol=f"{instrument}{strike:g}CE",
+                        signal_type="BUY_CALL",
+                        strike_price=float(strike),
+                        option_entry_price=float(entry),
+                        option_target_price=float(target),
+                        option_stop_loss=float(stop_loss),
+                        confidence=min(85.0, rsi + volume_ratio * 10),
+                        setup_description="Oversold RSI with MACD bullish crossover and high volume",
+                        technical_indicators={
+                            'RSI': round(rsi, 2),
+                            'MACD': 'Bullish Crossover',
+                            'Volume': f"{round(volume_ratio, 1)}x average"
+                        },
+                        risk_reward_ratio=float((target - entry) / (entry - stop_loss)),
+                        expiry_date=options['expiry'][idx],
+                        lot_size=self._lot_sizes[instrument]
+                    )
                         
             # Bearish setup
             elif (rsi > self.indicators['RSI']['overbought'] and 
@@ -799,34 +1239,35 @@ class LiveSignalEngine:
                   volume_ratio > self.indicators['Volume']['min_ratio']):
                   
                 # Find suitable PE option
-                for option in option_data['options']:
-                    if option['type'] == 'PE':
-                        entry = option['last_price']
-                        target = entry * 1.5
-                        stop_loss = entry * 0.8
-                        
-                        signal = TradingSignal(
-                            id=f"{instrument}_PE_{int(time.time())}",
-                            timestamp=datetime.now(),
-                            instrument=instrument,
-                            option_symbol=f"{instrument}{option['strike']}PE",
-                            signal_type="BUY_PUT",
-                            strike_price=option['strike'],
-                            option_entry_price=entry,
-                            option_target_price=target,
-                            option_stop_loss=stop_loss,
-                            confidence=min(85.0, (100 - rsi) + volume_ratio * 10),
-                            setup_description="Overbought RSI with MACD bearish crossover and high volume",
-                            technical_indicators={
-                                'RSI': round(rsi, 2),
-                                'MACD': 'Bearish Crossover',
-                                'Volume': f"{round(volume_ratio, 1)}x average"
-                            },
-                            risk_reward_ratio=(target - entry) / (entry - stop_loss),
-                            expiry_date=option['expiry'],
-                            lot_size=self.instruments[instrument]['lot_size']
-                        )
-                        break
+                options = option_data['options']
+                if options['is_pe'].any():
+                    idx = int(np.argmax(options['is_pe']))
+                    strike = options['strike'][idx]
+                    entry = options['last_price'][idx]
+                    target = entry * 1.5
+                    stop_loss = entry * 0.8
+                    
+                    signal = TradingSignal(
+                        id=f"{instrument}_PE_{int(now.timestamp())}",
+                        timestamp=now,
+                        instrument=instrument,
+                        option_symbol=f"{instrument}{strike:g}PE",
+                        signal_type="BUY_PUT",
+                        strike_price=float(strike),
+                        option_entry_price=float(entry),
+                        option_target_price=float(target),
+                        option_stop_loss=float(stop_loss),
+                        confidence=min(85.0, (100 - rsi) + volume_ratio * 10),
+                        setup_description="Overbought RSI with MACD bearish crossover and high volume",
+                        technical_indicators={
+                            'RSI': round(rsi, 2),
+                            'MACD': 'Bearish Crossover',
+                            'Volume': f"{round(volume_ratio, 1)}x average"
+                        },
+                        risk_reward_ratio=float((target - entry) / (entry - stop_loss)),
+                        expiry_date=options['expiry'][idx],
+                        lot_size=self._lot_sizes[instrument]
+                    )
             
             return signal
             
@@ -841,101 +1282,61 @@ class LiveSignalEngine:
                 logger.warning("Telegram bot not configured")
                 return
                 
-            message = (
-                "🎯 *FnO Trading Signal*\n\n"
-                f"Symbol: `{signal.instrument}`\n"
-                f"Option: `{signal.option_symbol}`\n"
-                f"Type: `{signal.signal_type}`\n\n"
-                f"Entry: `₹{signal.option_entry_price:.2f}`\n"
-                f"Target: `₹{signal.option_target_price:.2f}` 🎯\n"
-                f"Stop Loss: `₹{signal.option_stop_loss:.2f}` 🛑\n\n"
-                f"Lot Size: `{signal.lot_size}`\n"
-                f"Risk/Reward: `{signal.risk_reward_ratio:.2f}`\n"
-                f"Confidence: `{signal.confidence:.1f}%`\n\n"
-                "*Technical Analysis:*\n"
-            )
+            message = "".join((
+                BROADCAST_HEADER_TEMPLATE.format_map({name: getattr(signal, name) for name in SIGNAL_FIELDS}),
+                "".join(f"{indicator}: `{value}`\n" for indicator, value in signal.technical_indicators.items()),
+                BROADCAST_FOOTER_TEMPLATE.format(
+                    setup_description=signal.setup_description,
+                    time=signal.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                )
+            ))
+            
+            # Hand the network call to the Telegram worker so the signal loop never waits on it
+            self._broadcast_q.put((message, signal.option_symbol))
+            
+        except Exception as e:
+            logger.error(f"Error broadcasting signal: {e}")
+            
+    def _broadcast_worker(self):
+        """Send queued broadcasts off the signal generation path"""
+        carry = None
+        while True:
+            message, option_symbol = carry or self._broadcast_q.get()
+            carry = None
+            parts, symbols, size = [message], [option_symbol], len(message)
             
-            for indicator, value in signal.technical_indicators.items():
-                message += f"{indicator}: `{value}`\n"
+            # Fold broadcasts that queued up meanwhile into one message, within Telegram's limit
+            while True:
+                try:
+                    message, option_symbol = self._broadcast_q.get_nowait()
+                except queue.Empty:
+                    break
+                if size + 1 + len(message) > TELEGRAM_MAX_MESSAGE:
+                    carry = (message, option_symbol)
+                    break
+                parts.append(message)
+                symbols.append(option_symbol)
+                size += 1 + len(message)
                 
-            message += f"\nSetup: _{signal.setup_description}_\n\n"
-            message += f"⏰ `{signal.timestamp.strftime('%Y-%m-%d %H:%M:%S')}`"
+            self._send_broadcast("\n".join(parts), ", ".join(symbols))
             
+    def _send_broadcast(self, message: str, option_symbol: str):
+        """Send a broadcast message to Telegram"""
+        try:
             self.telegram_bot.send_message(message)
-            logger.info(f"Signal broadcast for {signal.option_symbol}")
-            
+            logger.info(f"Signal broadcast for {option_symbol}")
         except Exception as e:
             logger.error(f"Error broadcasting signal: {e}")
 
-    def start_signal_generation(self):
-        """Start the signal generation engine"""
-        if self.is_running:
-            logger.warning("Signal generation already running")
-            return
-            
-        self.is_running = True
-        self.signal_thread = threading.Thread(target=self._signal_generation_loop)
-        self.signal_thread.daemon = True
-        self.signal_thread.start()
-        logger.info("Signal generation started")
-        
-    def _signal_generation_loop(self):
-        """Main signal generation loop"""
-        while self.is_running:
-            try:
-                # Check market hours (9:15 AM to 3:30 PM, Monday to Friday)
-                now = datetime.now()
-                if (now.weekday() >= 5 or  # Weekend
-                    now.hour < 9 or  # Before market
-                    (now.hour == 9 and now.minute < 15) or  # Before market
-                    now.hour > 15 or  # After market
-                    (now.hour == 15 and now.minute > 30)):  # After market
-                    time.sleep(60)
-                    continue
-                
-                # Process each instrument
-                for instrument in self.instruments:
-                    try:
-                        # Check signal cooldown
-                        last_time = self.last_signal_time.get(instrument)
-                        if last_time and (datetime.now() - last_time).seconds < self.signal_cooldown:
-                            continue
-                            
-                        # Generate signal
-                        signal = self.generate_signal(instrument)
-                        
-                        if signal and signal.confidence >= self.min_confidence:
-                            # Broadcast signal
-                            self.broadcast_signal(signal)
-                            self.signals.append(signal)
-                            self.last_signal_time[instrument] = datetime.now()
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing {instrument}: {e}")
-                        
-                # Sleep for 5 minutes before next check
-                time.sleep(300)
-                
-            except Exception as e:
-                logger.error(f"Error in signal generation loop: {e}")
-                time.sleep(60)  # Wait a minute before retrying
-                
-    def stop_signal_generation(self):
-        """Stop the signal generation engine"""
-        self.is_running = False
-        if self.signal_thread:
-            self.signal_thread.join(timeout=1)
-        logger.info("Signal generation stopped")
-        
-        logger.info("Live Signal Engine initialized")
-    
     def start_signal_generation(self):
         """Start the signal generation process"""
         if not self.is_running:
             self.is_running = True
-            self.signal_thread = threading.Thread(target=self._signal_generation_loop)
-            self.signal_thread.daemon = True
-            self.signal_thread.start()
+            # Runs as a task on the engine's services event loop rather than its own thread
+            self._signal_future = asyncio.run_coroutine_threadsafe(
+                self._signal_generation_loop(),
+                self._services_loop
+            )
             logger.info("🚀 Signal generation started")
         else:
             logger.info("Signal generation already running")
@@ -943,98 +1344,206 @@ class LiveSignalEngine:
     def stop_signal_generation(self):
         """Stop the signal generation process"""
         self.is_running = False
-        if self.signal_thread:
-            self.signal_thread.join(timeout=5)
+        self.wake_signal_loop()
         logger.info("⏹️ Signal generation stopped")
     
-    def _signal_generation_loop(self):
+    async def _signal_generation_loop(self):
         """Main signal generation loop"""
+        loop = asyncio.get_running_loop()
         while self.is_running:
             try:
+                # One clock read per iteration, shared by every instrument
+                now = datetime.now()
+                
+                # No fetches or signals outside trading hours
+                if not self._is_market_open(now):
+                    await self._wait_for_wake(60)
+                    continue
+                    
                 # Update market data
-                self._update_market_data()
+                await self._update_market_data()
                 
-                # Generate signals based on market conditions
-                self._generate_signals()
+                # Generate signals based on market conditions; broadcasting blocks on Telegram
+                await loop.run_in_executor(None, self._generate_signals, now)
                 
                 # Clean old signals
-                self._cleanup_old_signals()
+                self._cleanup_old_signals(now)
                 
-                # Sleep for 30 seconds before next iteration
-                time.sleep(30)
+                # Wait 30 seconds before next iteration, or less if woken by a big move or stop
+                await self._wait_for_wake(30)
                 
             except Exception as e:
                 logger.error(f"Error in signal generation loop: {e}")
-                time.sleep(60)  # Wait longer on error
+                await self._wait_for_wake(60)  # Wait longer on error
+                
+    @staticmethod
+    def _is_market_open(now: datetime) -> bool:
+        """Check market hours (9:15 AM to 3:30 PM, Monday to Friday)"""
+        return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+        
+    async def _wait_for_wake(self, timeout: float):
+        """Sleep until the timeout passes or the signal loop is woken"""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+        
+    def wake_signal_loop(self):
+        """Run the next signal generation iteration now; safe to call from any thread"""
+        self._services_loop.call_soon_threadsafe(self._wake.set)
     
-    def _update_market_data(self):
+    def _on_index_tick(self, instrument: str, tick: Dict):
+        """Store a streamed index quote for the signal loop to pick up"""
+        last_price = tick['last_price']
+        prev_close = tick.get('ohlc', {}).get('close') or last_price
+        change = last_price - prev_close
+        
+        # A large move since the last analysis should not wait for the next loop iteration
+        analyzed = self._analyzed_ltp.get(instrument)
+        if self.is_running and analyzed and abs(last_price - analyzed) / analyzed * 100 >= WAKE_MOVE_PERCENT:
+            self._analyzed_ltp[instrument] = last_price
+            self.wake_signal_loop()
+        
+        # Replace the whole entry in one assignment so readers never see a partial quote
+        self._stream_quotes[instrument] = (time.monotonic(), {
+            'ltp': round(last_price, 2),
+            'open': round(tick.get('ohlc', {}).get('open', last_price), 2),
+            'high': round(tick.get('ohlc', {}).get('high', last_price), 2),
+            'low': round(tick.get('ohlc', {}).get('low', last_price), 2),
+            'volume': int(tick.get('volume_traded', tick.get('volume', 0))),
+            'change': round(change, 2),
+            'change_percent': round((change / prev_close) * 100, 2) if prev_close else 0,
+            'timestamp': datetime.now().strftime('%H:%M:%S')
+        })
+        
+    def _fetch_one(self, instrument: str) -> Optional[Dict]:
+        """Fetch the latest quote for an instrument from Yahoo Finance"""
+        symbol = YF_SYMBOLS.get(instrument, f"{instrument}.NS")
+            
+        # Get live data using yfinance; it keeps one shared session of its own, so
+        # connections are reused without passing a session (newer releases reject requests sessions)
+        ticker = _yf().Ticker(symbol)
+        hist = ticker.history(period="1d", interval="1m")
+        if hist.empty:
+            return None
+            
+        # Plain array indexing; avoids building a Series per row
+        arr = hist[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64)
+        o, h, l, c, v = arr[-1].tolist()
+        prev_close = float(arr[-2, 3]) if arr.shape[0] > 1 else c
+        change = c - prev_close
+        return {
+            'ltp': round(c, 2),
+            'open': round(o, 2),
+            'high': round(h, 2),
+            'low': round(l, 2),
+            'volume': int(v),
+            'change': round(change, 2),
+            'change_percent': round(change / prev_close * 100, 2),
+            'timestamp': datetime.now().strftime('%H:%M:%S')
+        }
+        
+    async def _update_market_data(self):
         """Update live market data"""
         try:
+            stale = []
             for instrument in self.instruments:
-                # Simulate live data (replace with actual API calls)
-                if instrument == 'NIFTY':
-                    symbol = '^NSEI'
-                elif instrument == 'BANKNIFTY':
-                    symbol = '^NSEBANK'
+                # Prefer the quote pushed by the market data stream
+                streamed = self._stream_quotes.get(instrument)
+                if streamed and time.monotonic() - streamed[0] < STREAM_STALE_AFTER:
+                    self._quotes[instrument] = streamed[1]
+                    self._analyzed_ltp[instrument] = streamed[1]['ltp']
+                    self._record_bar(instrument)
                 else:
-                    symbol = f"{instrument}.NS"
-                
-                try:
-                    # Get live data using yfinance
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="1d", interval="1m")
+                    stale.append(instrument)
                     
-                    if not hist.empty:
-                        latest = hist.iloc[-1]
-                        prev_close = hist.iloc[-2]['Close'] if len(hist) > 1 else latest['Close']
-                        
-                        self.market_data[instrument] = {
-                            'ltp': round(float(latest['Close']), 2),
-                            'open': round(float(latest['Open']), 2),
-                            'high': round(float(latest['High']), 2),
-                            'low': round(float(latest['Low']), 2),
-                            'volume': int(latest['Volume']),
-                            'change': round(float(latest['Close'] - prev_close), 2),
-                            'change_percent': round(((float(latest['Close'] - prev_close) / prev_close) * 100), 2),
-                            'timestamp': datetime.now().strftime('%H:%M:%S')
-                        }
-                    else:
-                        # Fallback to simulated data
-                        self._generate_simulated_data(instrument)
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to get real data for {instrument}, using simulated: {e}")
+            if not stale:
+                return
+                
+            # Stream not connected or quiet; poll Yahoo Finance for all stale instruments at once
+            loop = asyncio.get_running_loop()
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(
+                        *[loop.run_in_executor(self._fetch_pool, self._fetch_one, instrument) for instrument in stale],
+                        return_exceptions=True
+                    ),
+                    timeout=5
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out fetching market data for {stale}, using simulated")
+                results = [None] * len(stale)
+                
+            for instrument, quote in zip(stale, results):
+                if isinstance(quote, Exception):
+                    logger.warning(f"Failed to get real data for {instrument}, using simulated: {quote}")
+                    quote = None
+                if quote:
+                    self._quotes[instrument] = quote
+                else:
+                    # Fallback to simulated data
                     self._generate_simulated_data(instrument)
+                self._record_bar(instrument)
                     
         except Exception as e:
             logger.error(f"Error updating market data: {e}")
+            
+    def _record_bar(self, instrument: str):
+        """Append the instrument's current quote to its OHLCV ring"""
+        quote = self._quotes[instrument]
+        slot = self._bar_count[instrument] % BAR_HISTORY
+        bars = self._bars[instrument]
+        
+        # Each bar is written twice so any window of the last BAR_HISTORY is contiguous
+        bars[slot] = bars[slot + BAR_HISTORY] = (quote['open'], quote['high'], quote['low'], quote['ltp'], quote['volume'])
+        self._bar_count[instrument] += 1
+        
+    def get_last_n(self, instrument: str, n: int = BAR_HISTORY) -> np.ndarray:
+        """View of the last n recorded OHLCV bars (oldest first) without copying"""
+        count = self._bar_count.get(instrument, 0)
+        n = min(n, count, BAR_HISTORY)
+        end = count % BAR_HISTORY + BAR_HISTORY
+        return self._bars[instrument][end - n:end] if n else np.empty((0, 5))
     
+    def _rand(self, lo: float, hi: float) -> float:
+        """Uniform draw in [lo, hi) served from a pre-drawn batch"""
+        v = self._rand_buf[self._rand_idx]
+        self._rand_idx = (self._rand_idx + 1) & (RAND_BATCH - 1)
+        if self._rand_idx == 0:
+            self._rand_buf = self._rng.uniform(size=RAND_BATCH)
+        return lo + float(v) * (hi - lo)
+        
+    def _randint(self, lo: int, hi: int) -> int:
+        """Integer draw in [lo, hi], inclusive like random.randint"""
+        return lo + int(self._rand(0, hi - lo + 1))
+        
     def _generate_simulated_data(self, instrument: str):
         """Generate simulated market data"""
-        base_prices = {'NIFTY': 24800, 'BANKNIFTY': 55000}  # Removed FINNIFTY
+        base_prices = {'NIFTY': 24800, 'NIFTY50': 24800, 'BANKNIFTY': 55000, 'SENSEX': 81000}  # Removed FINNIFTY
         base_price = base_prices.get(instrument, 25000)
         
         # Add some randomness
-        change_percent = random.uniform(-2.0, 2.0)
+        change_percent = self._rand(-2.0, 2.0)
         ltp = base_price * (1 + change_percent / 100)
         
-        self.market_data[instrument] = {
+        self._quotes[instrument] = {
             'ltp': round(ltp, 2),
             'open': round(base_price, 2),
             'high': round(ltp * 1.01, 2),
             'low': round(ltp * 0.99, 2),
-            'volume': random.randint(100000, 500000),
+            'volume': self._randint(100000, 500000),
             'change': round(ltp - base_price, 2),
             'change_percent': round(change_percent, 2),
             'timestamp': datetime.now().strftime('%H:%M:%S')
         }
     
-    def _generate_signals(self):
+    def _generate_signals(self, now: datetime):
         """Generate trading signals based on professional setups and market analysis"""
         try:
             for instrument in self.instruments:
                 # 1. Check cooldown period
-                if self._is_in_cooldown(instrument):
+                if self._is_in_cooldown(instrument, now):
                     continue
                 
                 # 2. Analyze market conditions using pro setups
@@ -1044,7 +1553,7 @@ class LiveSignalEngine:
                     continue
                 
                 # 3. Get pro trader setups for current conditions
-                market_data = self.market_data[instrument]
+                market_data = self._quotes[instrument]
                 df = pd.DataFrame([market_data])
                 
                 # 4. Get trade setup from pro analysis
@@ -1052,11 +1561,11 @@ class LiveSignalEngine:
                 
                 # 5. Generate signal only for high-confidence setups
                 if setup['confidence'] >= self.min_confidence:
-                    signal = self._create_signal_from_setup(instrument, setup, conditions)
+                    signal = self._create_signal_from_setup(instrument, setup, conditions, now)
                     
                     if signal:
                         self.signals.append(signal)
-                        self.last_signal_time[instrument] = datetime.now()
+                        self.last_signal_time[instrument] = now
                         logger.info(f"🎯 High-quality signal generated: {signal.instrument} {signal.signal_type} (Confidence: {setup['confidence']}%)")
                         
                         # Broadcast signal
@@ -1065,26 +1574,27 @@ class LiveSignalEngine:
         except Exception as e:
             logger.error(f"Error generating signals: {e}")
     
-    def _is_in_cooldown(self, instrument: str) -> bool:
+    def _is_in_cooldown(self, instrument: str, now: datetime) -> bool:
         """Check if instrument is in signal cooldown period"""
         if instrument not in self.last_signal_time:
             return False
         
         last_time = self.last_signal_time[instrument]
-        now = datetime.now()
         return (now - last_time).total_seconds() < self.signal_cooldown
     
     def _check_market_conditions(self, instrument: str) -> dict:
         """Check if market conditions are suitable for signal generation"""
-        if instrument not in self.market_data:
+        if instrument not in self._quotes:
             return {'suitable': False, 'reason': 'No market data available'}
         
         try:
-            data = self.market_data[instrument]
-            df = pd.DataFrame([data])
+            data = self._quotes[instrument]
             
-            # 1. Get market analysis from pro setups
-            market_condition = self.pro_setups.analyze_market_condition(df)
+            # 1. Get market analysis from pro setups over the recorded quote history
+            bars = self.get_last_n(instrument)
+            if not len(bars):
+                return {'suitable': False, 'reason': 'No market data history'}
+            market_condition = self.pro_setups.analyze_market_condition_bars(bars)
             
             # 2. Check volatility conditions
             if market_condition['volatility'] == 'high' and abs(data['change_percent']) > 5.0:
@@ -1114,14 +1624,14 @@ class LiveSignalEngine:
             logger.error(f"Error checking market conditions: {e}")
             return {'suitable': False, 'reason': f'Analysis error: {str(e)}'}
     
-    def _create_signal_from_setup(self, instrument: str, setup: Dict, conditions: Dict) -> Optional[TradingSignal]:
+    def _create_signal_from_setup(self, instrument: str, setup: Dict, conditions: Dict, now: datetime) -> Optional[TradingSignal]:
         """Create a detailed, actionable trading signal based on professional setup analysis."""
         try:
-            if instrument not in self.market_data:
+            if instrument not in self._quotes:
                 logger.warning(f"No market data for {instrument} to create signal.")
                 return None
 
-            data = self.market_data[instrument]
+            data = self._quotes[instrument]
             ltp = data['ltp']
             
             # 1. Determine Signal Direction from Setup
@@ -1138,18 +1648,18 @@ class LiveSignalEngine:
             target = setup['target']
 
             # 2. Select Strike Price
-            strike_step = 50 if instrument == 'NIFTY' else 100
+            strike_step = self._strike_steps[instrument]
             base_strike = round(ltp / strike_step) * strike_step
             strike_price = base_strike
             option_type = "CE" if signal_type == 'BUY_CALL' else "PE"
 
             # 3. Simulate Option Premium
-            simulated_premium = round(random.uniform(70, 150), 2)
+            simulated_premium = round(self._rand(70, 150), 2)
             
             # 4. Define Entry, Target, and Stop-Loss
             entry_price = simulated_premium
-            target_price = round(entry_price * random.uniform(1.20, 1.50), 2)
-            stop_loss = round(entry_price * random.uniform(0.80, 0.90), 2)
+            target_price = round(entry_price * self._rand(1.20, 1.50), 2)
+            stop_loss = round(entry_price * self._rand(0.80, 0.90), 2)
 
             # 5. Calculate Risk-Reward Ratio
             risk = abs(entry_price - stop_loss)
@@ -1157,7 +1667,7 @@ class LiveSignalEngine:
             rr_ratio = round(reward / risk, 2) if risk > 0 else 1.0
 
             # 6. Generate Confidence and Description
-            confidence = random.uniform(70, 95)
+            confidence = self._rand(70, 95)
             setup_desc = self._generate_setup_description(instrument, signal_type)
             
             # 7. Construct the Signal
@@ -1165,8 +1675,8 @@ class LiveSignalEngine:
             option_symbol = f"{instrument} {int(strike_price)} {option_type}"
 
             signal = TradingSignal(
-                id=f"{instrument}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                timestamp=datetime.now(),
+                id=f"{instrument}_{now.strftime('%Y%m%d_%H%M%S')}",
+                timestamp=now,
                 instrument=instrument,
                 option_symbol=option_symbol,
                 signal_type=signal_type,
@@ -1179,7 +1689,7 @@ class LiveSignalEngine:
                 technical_indicators=self._generate_technical_indicators(data),
                 risk_reward_ratio=rr_ratio,
                 expiry_date=expiry,
-                lot_size=self._get_lot_size(instrument),
+                lot_size=self._lot_sizes[instrument],
                 status="ACTIVE"
             )
             
@@ -1194,60 +1704,54 @@ class LiveSignalEngine:
         
         market_outlook = "bullish" if "CALL" in signal_type else "bearish"
         
-        if instrument not in self.market_data:
+        if instrument not in self._quotes:
             return f"A {market_outlook} signal was generated for {instrument}."
 
-        key_level = round(self.market_data[instrument]['ltp'] * random.uniform(0.995, 1.005), 2)
+        key_level = round(self._quotes[instrument]['ltp'] * self._rand(0.995, 1.005), 2)
         
-        templates = [
-            f"📈 **{instrument} showing strong {market_outlook} momentum.** Breakout above key resistance at {key_level}. Volume confirmation suggests a strong upward move.",
-            f"📉 **Potential reversal pattern forming in {instrument}.** Price action indicates a {market_outlook} bias. Watching for a break of the {key_level} level.",
-            f"📊 **{instrument} is consolidating near a critical support level.** A {market_outlook} move is anticipated. Entry triggered on high volume.",
-            f"🚀 **High-probability {market_outlook} setup for {instrument}.** The current trend is strong, and we're seeing signs of continuation above {key_level}."
-        ]
-        return random.choice(templates)
+        # Only the chosen template is formatted
+        template = SETUP_DESCRIPTION_TEMPLATES[self._rng.integers(len(SETUP_DESCRIPTION_TEMPLATES))]
+        return template.format(instrument=instrument, outlook=market_outlook, key_level=key_level)
     
     def _generate_technical_indicators(self, data: Dict) -> Dict[str, Any]:
         """Generate technical indicators"""
-        return {
-            'rsi': round(random.uniform(30, 70), 1),
-            'macd': round(random.uniform(-50, 50), 2),
-            'volume_ratio': round(random.uniform(0.8, 2.5), 2),
-            'support': round(data['ltp'] * random.uniform(0.95, 0.98), 2),
-            'resistance': round(data['ltp'] * random.uniform(1.02, 1.05), 2),
-            'trend': random.choice(['BULLISH', 'BEARISH', 'SIDEWAYS'])
-        }
+        ltp = data['ltp']
+        vals = self._rng.uniform(SIM_INDICATOR_LOW, SIM_INDICATOR_HIGH) * (1, 1, 1, ltp, ltp)
+        indicators = dict(zip(SIM_INDICATOR_KEYS, np.round(vals, 2).tolist()))
+        indicators['rsi'] = round(indicators['rsi'], 1)
+        indicators['trend'] = SIM_TRENDS[self._rng.integers(len(SIM_TRENDS))]
+        return indicators
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _expiry_for_date(day_ord: int) -> str:
+        """Next Thursday expiry after the given day; only changes once a day"""
+        today = date.fromordinal(day_ord)
+        days_ahead = (3 - today.weekday()) % 7 or 7  # Thursday is 3; on Thursday use next week
+        return (today + timedelta(days=days_ahead)).strftime('%d-%b-%Y')
     
     def _get_next_expiry(self) -> str:
         """Get next Thursday expiry"""
-        today = datetime.now()
-        days_ahead = 3 - today.weekday()  # Thursday is 3
-        if days_ahead <= 0:  # Target day already happened this week
-            days_ahead += 7
-        next_thursday = today + timedelta(days_ahead)
-        return next_thursday.strftime('%d-%b-%Y')
-    
-    def _get_lot_size(self, instrument: str) -> int:
-        """Get lot size for instrument"""
-        lot_sizes = {'NIFTY': 50, 'BANKNIFTY': 15}
-        return lot_sizes.get(instrument, 50)
+        return self._expiry_for_date(date.today().toordinal())
     
-    def _cleanup_old_signals(self):
+    def _cleanup_old_signals(self, now: datetime):
         """Remove old signals"""
-        now = datetime.now()
-        self.signals = [
-            signal for signal in self.signals
-            if (now - signal.timestamp).total_seconds() < 3600  # Keep for 1 hour
-        ]
+        self.signals.prune(3600, now.timestamp())  # Keep for 1 hour
     
     def get_recent_signals(self, limit: int = 10) -> List[Dict]:
         """Get recent signals"""
-        recent = sorted(self.signals, key=lambda x: x.timestamp, reverse=True)[:limit]
-        return [self._signal_to_dict(signal) for signal in recent]
+        return [self._signal_to_dict(signal) for signal in self.signals.recent(limit)]
+    
+    def get_recent_signals_json(self, limit: int = 10) -> bytes:
+        """Recent signals encoded as JSON bytes, ready to hand to an HTTP response"""
+        signals = self.get_recent_signals(limit)
+        if orjson is not None:
+            return orjson.dumps(signals, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(signals).encode()
     
     def get_live_market_data(self) -> Dict:
         """Get current market data"""
-        return self.market_data.copy()
+        return self._quotes.copy()
     
     def generate_test_signal(self) -> None:
         """Generate and broadcast a test signal for validation"""
@@ -1321,7 +1825,7 @@ class LiveSignalEngine:
             instrument = random.choice(self.instruments)
         
         # Update market data first
-        self._update_market_data()
+        asyncio.run_coroutine_threadsafe(self._update_market_data(), self._services_loop).result(timeout=10)
         
         # Force generate a signal
         signal = self._create_signal(instrument)
@@ -3,27 +3,81 @@
 Generates pre-market and post-market analysis reports.
 """
 import random
-import yfinance as yf
 import logging
-from datetime import datetime
+from datetime import date
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from market_data_provider import download_indices
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+KEY_DRIVERS = (
+    "strong buying in banking and IT stocks.",
+    "weakness in the energy sector due to falling crude prices.",
+    "positive global cues from European markets.",
+    "profit booking in the second half of the session."
+)
+
+POST_MARKET_TEMPLATE = """
+🌇 **Post-Market Report - {date}** 🌇
+
+**NIFTY Today's Performance:**
+- **Open:** ₹{opening:,.2f}
+- **High:** ₹{high:,.2f}
+- **Low:** ₹{low:,.2f}
+- **Close:** ₹{closing:,.2f}
+- **Change:** {change:,.2f} ({change_percent:.2f}%)
+
+**Market Summary:**
+The market {move_direction} today, driven primarily by {primary_driver}. After a volatile opening, the index found support near the day's low and rallied, though it faced some {late_driver}.
+
+**Key Takeaways:**
+- The overall trend remains {trend}.
+- Key drivers today were {secondary_driver}
+
+This analysis is for educational purposes.
+"""
+
 class MarketAnalysisEngine:
     def __init__(self, telegram_bot=None):
         self.telegram_bot = telegram_bot
+        self._date_cache = (None, "")  # (day, formatted report date)
         logger.info("Market Analysis Engine initialized")
 
+    def _today_str(self) -> str:
+        """Report date, formatted once per day."""
+        today = date.today()
+        if today != self._date_cache[0]:
+            self._date_cache = (today, today.strftime('%d %b %Y'))
+        return self._date_cache[1]
+
+    def _fetch_indices(self, tickers: List[str], period: str, interval: str = '1d') -> Dict[str, pd.DataFrame]:
+        """Fetches all report tickers in a single yfinance request, keyed by ticker."""
+        return download_indices(tickers, period=period, interval=interval)
+
+    @staticmethod
+    def _change_percent(hist: Optional[pd.DataFrame]) -> float:
+        """Percent change between the last two closes, 0 when there is not enough history."""
+        if hist is None or len(hist) < 2:
+            return 0.0
+        prev_close, last_close = hist['Close'].to_numpy()[-2:]
+        return round(float((last_close - prev_close) / prev_close * 100), 2)
+
     def generate_pre_market_report(self):
         """Generates and sends a pre-market analysis report."""
         logger.info("Generating pre-market report...")
         try:
-            # In a real scenario, you'd fetch data from news APIs, global indices, etc.
+            # NIFTY and the overnight US indices come from one download
+            indices = self._fetch_indices(["^NSEI", "^GSPC", "^IXIC"], period="5d")
+            
+            # In a real scenario, you'd fetch GIFT NIFTY and news from dedicated APIs
             global_indices = {
-                "S&P 500": round(random.uniform(-1.5, 1.5), 2),
-                "NASDAQ": round(random.uniform(-2.0, 2.0), 2),
+                "S&P 500": self._change_percent(indices.get("^GSPC")),
+                "NASDAQ": self._change_percent(indices.get("^IXIC")),
                 "GIFT NIFTY": round(random.uniform(-0.8, 0.8), 2),
             }
             
@@ -33,13 +87,13 @@ class MarketAnalysisEngine:
                 "Crude oil prices stabilize after recent volatility.",
             ]
 
-            nifty_data = yf.Ticker("^NSEI").history(period="5d")
+            nifty_data = indices["^NSEI"]
             prev_close = nifty_data['Close'].iloc[-1]
             support = round(prev_close * 0.985, 2)
             resistance = round(prev_close * 1.015, 2)
 
             report = f"""
-🌅 **Pre-Market Analysis - {datetime.now().strftime('%d %b %Y')}** 🌅
+🌅 **Pre-Market Analysis - {self._today_str()}** 🌅
 
 **Global Market Snapshot:**
 - S&P 500: {global_indices['S&P 500']}%
@@ -75,43 +129,29 @@ Good luck, traders! 📈
         """Generates and sends a post-market analysis report."""
         logger.info("Generating post-market report...")
         try:
-            nifty_data = yf.Ticker("^NSEI").history(period="1d", interval="15m")
-            opening = nifty_data['Open'].iloc[0]
-            closing = nifty_data['Close'].iloc[-1]
-            high = nifty_data['High'].max()
-            low = nifty_data['Low'].min()
+            nifty_data = self._fetch_indices(["^NSEI"], period="1d", interval="15m")["^NSEI"]
+            arr = nifty_data[['Open', 'High', 'Low', 'Close']].to_numpy()
+            opening, high, low, closing = arr[0, 0], arr[:, 1].max(), arr[:, 2].min(), arr[-1, 3]
             change = closing - opening
             change_percent = (change / opening) * 100
 
-            move_direction = "gained" if change > 0 else "fell"
-            
-            key_drivers = [
-                "strong buying in banking and IT stocks.",
-                "weakness in the energy sector due to falling crude prices.",
-                "positive global cues from European markets.",
-                "profit booking in the second half of the session."
-            ]
-            random.shuffle(key_drivers)
-
-            report = f"""
-🌇 **Post-Market Report - {datetime.now().strftime('%d %b %Y')}** 🌇
-
-**NIFTY Today's Performance:**
-- **Open:** ₹{opening:,.2f}
-- **High:** ₹{high:,.2f}
-- **Low:** ₹{low:,.2f}
-- **Close:** ₹{closing:,.2f}
-- **Change:** {change:,.2f} ({change_percent:.2f}%)
-
-**Market Summary:**
-The market {move_direction} today, driven primarily by {key_drivers[0]}. After a volatile opening, the index found support near the day's low and rallied, though it faced some {key_drivers[3]}.
-
-**Key Takeaways:**
-- The overall trend remains {'bullish' if change > 0 else 'cautious'}.
-- Key drivers today were {key_drivers[1]}
-
-This analysis is for educational purposes.
-"""
+            # Three distinct drivers, as the shuffled list used to provide
+            primary, secondary, late = random.sample(KEY_DRIVERS, 3)
+
+            report = POST_MARKET_TEMPLATE.format(
+                date=self._today_str(),
+                opening=opening,
+                high=high,
+                low=low,
+                closing=closing,
+                change=change,
+                change_percent=change_percent,
+                move_direction="gained" if change > 0 else "fell",
+                trend='bullish' if change > 0 else 'cautious',
+                primary_driver=primary,
+                secondary_driver=secondary,
+                late_driver=late
+            )
             if self.telegram_bot:
                 self.telegram_bot.send_message(report)
                 logger.info("Post-market report sent via Telegram.")
@@ -7,15 +7,39 @@ import yfinance as yf
 from typing import Dict, List
 from kiteconnect import KiteConnect
 import pandas as pd
+import numpy as np
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 from datetime import datetime, timedelta
 from config.settings import KITE_API_KEY, KITE_API_SECRET, KITE_ACCESS_TOKEN
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def download_indices(tickers: List[str], period: str, interval: str = '1d') -> Dict[str, pd.DataFrame]:
+    """
+    Downloads several Yahoo Finance tickers in one request.
+    Returns a DataFrame per ticker, keeping only the rows that ticker traded on.
+    """
+    hist = yf.download(
+        tickers=" ".join(tickers),
+        period=period,
+        interval=interval,
+        group_by='ticker',
+        threads=True,
+        progress=False
+    )
+    if hist.empty:
+        return {}
+    if not isinstance(hist.columns, pd.MultiIndex):
+        return {tickers[0]: hist.dropna(how='all')}
+    available = set(hist.columns.get_level_values(0))
+    return {ticker: hist[ticker].dropna(how='all') for ticker in tickers if ticker in available}
+
 class MarketDataProvider:
     def __init__(self, use_kite=True):
         self.indices = {
@@ -23,8 +47,14 @@ class MarketDataProvider:
             "NIFTY BANK": {"kite": "NSE:NIFTY BANK", "yf": "^NSEBANK", "nse": "BANKNIFTY"},
             "SENSEX": {"kite": "BSE:SENSEX", "yf": "^BSESN", "nse": "SENSEX"}
         }
+        # Per-source symbol lists built once, in the same order as the index names
+        self._names = list(self.indices)
+        self._yf_tickers = [inst["yf"] for inst in self.indices.values()]
+        self._kite_names = {inst["kite"]: name for name, inst in self.indices.items()}
         self.cache = {}
         self.cache_ttl = 5  # Cache TTL in seconds
+        self.history_cache_ttl = 60  # OHLCV history changes at most once a candle
+        self.instrument_cache_ttl = 90 * 24 * 3600  # Instrument tokens are stable for months
         self.instrument_tokens = {
             "NSE:NIFTY 50": 256265,
             "NSE:NIFTY BANK": 260105,
@@ -33,50 +63,89 @@ class MarketDataProvider:
         self.data_sources = ["kite", "yf", "nse"]
         self.source_failures = {source: 0 for source in self.data_sources}
         self.max_failures = 3  # Switch source after 3 consecutive failures
+        self._pulse_pool = ThreadPoolExecutor(max_workers=len(self.data_sources), thread_name_prefix="pulse")
+        
+        # Shared HTTP session so repeated API calls reuse pooled keep-alive connections
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
         
         self.kite = None
         if use_kite:
             try:
                 self.kite = KiteConnect(api_key=KITE_API_KEY)
+                self.kite.reqsession = self.session
                 self.kite.set_access_token(KITE_ACCESS_TOKEN)
                 logger.info("Successfully initialized Kite Connect")
                 print("KiteConnect initialized.")
             except Exception as e:
                 print(f"Could not initialize KiteConnect: {e}")
 
+    def _cached_fetch(self, key, ttl: float, fn, *args, valid=None):
+        """
+        Returns the cached value for key if younger than ttl seconds,
+        otherwise calls fn(*args) and caches the result if it is non-None
+        and passes the optional valid(value) check; failures are never cached.
+        """
+        entry = self.cache.get(key)
+        if entry and time.time() - entry[0] <= ttl:
+            return entry[1]
+
+        value = fn(*args)
+        if value is not None and (valid is None or valid(value)):
+            self.cache[key] = (time.time(), value)
+        else:
+            self.cache.pop(key, None)
+        return value
+
     def get_market_pulse(self) -> Dict[str, Dict]:
+        """
+        Fetches live market data, reusing the last snapshot for cache_ttl seconds.
+        """
+        return self._cached_fetch(
+            "pulse", self.cache_ttl, self._fetch_market_pulse,
+            valid=lambda pulse: pulse.get('success')
+        )
+
+    def _fetch_market_pulse(self) -> Dict[str, Dict]:
         """
         Fetches live market data from multiple sources with automatic failover.
         """
-        for source in self.data_sources:
-            try:
-                if source == "kite" and self.source_failures["kite"] < self.max_failures:
-                    data = self._get_market_pulse_kite()
-                    if data:
-                        self.source_failures["kite"] = 0
-                        return data
-                    self.source_failures["kite"] += 1
-                
-                elif source == "yf" and self.source_failures["yf"] < self.max_failures:
-                    data = self._get_market_pulse_yf()
-                    if data:
-                        self.source_failures["yf"] = 0
-                        return data
-                    self.source_failures["yf"] += 1
-                
-                elif source == "nse" and self.source_failures["nse"] < self.max_failures:
-                    data = self._get_market_pulse_nse()
-                    if data:
-                        self.source_failures["nse"] = 0
-                        return data
-                    self.source_failures["nse"] += 1
-                    
-            except Exception as e:
-                logger.error(f"Error fetching data from {source}: {e}")
+        fetchers = {
+            "kite": self._get_market_pulse_kite,
+            "yf": self.get_market_pulse_yfinance
+        }
+        futures = {
+            self._pulse_pool.submit(fetchers[source]): source
+            for source in self.data_sources
+            if source in fetchers and self.source_failures[source] < self.max_failures
+        }
+        
+        # Query every healthy source at once and take the first good answer
+        try:
+            for future in as_completed(futures, timeout=5):
+                source = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching data from {source}: {e}")
+                    data = None
+                if data and data.get('success'):
+                    self.source_failures[source] = 0
+                    return data
                 self.source_failures[source] += 1
+        except FuturesTimeoutError:
+            logger.warning("Timed out waiting for market pulse sources")
                 
         return self._get_empty_pulse_data("All data sources failed")
 
+    def _get_market_pulse_kite(self) -> Dict[str, Dict]:
+        """
+        Fetches index quotes from Kite in a single quote call.
+        """
         try:
             quotes = self.kite.quote(list(self.instrument_tokens.values()))
             
@@ -94,7 +163,7 @@ class MarketDataProvider:
                     change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
                     
                     # The instrument name from Kite might be slightly different, so we find the key by value
-                    index_name = next((name for name, inst in self.indices.items() if inst == instrument), None)
+                    index_name = self._kite_names.get(instrument)
                     if index_name:
                         data[index_name] = {
                             'value': round(last_price, 2),
@@ -102,7 +171,7 @@ class MarketDataProvider:
                             'change_percent': round(change_percent, 2)
                         }
                 else:
-                    index_name = next((name for name, inst in self.indices.items() if inst == instrument), None)
+                    index_name = self._kite_names.get(instrument)
                     if index_name:
                          data[index_name] = self._get_empty_pulse_data(f"No quote data for {index_name}")['data'][index_name]
 
@@ -134,26 +203,46 @@ class MarketDataProvider:
         }
         token = instrument_map.get(tradingsymbol.upper())
         if not token:
-            print(f"Warning: Instrument token not found for {tradingsymbol}. Using a placeholder. Please update instrument map.")
-            # Fallback for symbols not in our map
-            try:
-                # This is not a real Kite API call, but simulates searching
-                search_result = self.kite.instruments(exchange=exchange)
-                for inst in search_result:
-                    if inst['tradingsymbol'] == tradingsymbol.upper():
-                        return inst['instrument_token']
-            except Exception as e:
-                print(f"Could not dynamically find instrument token for {tradingsymbol}: {e}")
+            # Fallback for symbols not in our map: the exchange's full instrument dump
+            tokens = self._cached_fetch(
+                ("instruments", exchange),
+                self.instrument_cache_ttl,
+                self._load_instrument_tokens, exchange
+            )
+            token = (tokens or {}).get(tradingsymbol.upper())
+            if not token:
+                print(f"Warning: Instrument token not found for {tradingsymbol}. Please update instrument map.")
         return token
 
+    def _load_instrument_tokens(self, exchange):
+        """Downloads the exchange's instrument list once as a tradingsymbol -> token map."""
+        try:
+            return {
+                inst['tradingsymbol']: inst['instrument_token']
+                for inst in self.kite.instruments(exchange=exchange)
+            }
+        except Exception as e:
+            print(f"Could not download instrument list for {exchange}: {e}")
+            return None
+
     def get_historical_data_kite(self, tradingsymbol, interval='day', period=30):
         """
         Fetches historical data for a given instrument using Kite API.
+        Returns a copy, so callers may modify it without touching the cached frame.
         """
         if not self.kite or not self.kite.access_token:
             print("Kite API not available for historical data.")
             return None
 
+        df = self._cached_fetch(
+            ("history", tradingsymbol.upper(), interval, period),
+            self.history_cache_ttl,
+            self._fetch_historical_data_kite, tradingsymbol, interval, period
+        )
+        return df.copy() if df is not None else None
+
+    def _fetch_historical_data_kite(self, tradingsymbol, interval, period):
+        """Fetches historical data from Kite without caching."""
         instrument_token = self.get_instrument_token(tradingsymbol)
         if not instrument_token:
             return None
@@ -172,41 +261,69 @@ class MarketDataProvider:
             print(f"Error fetching historical data for {tradingsymbol} from Kite: {e}")
             return None
 
+    def get_ltps(self, symbols: List[str], exchange='NFO') -> Dict[str, float]:
+        """
+        Fetches last traded prices for several instruments in a single Kite call.
+        Symbols without an exchange prefix are looked up on the given exchange.
+        """
+        if not symbols or not self.kite:
+            return {}
+
+        instruments = {
+            symbol if ':' in symbol else f"{exchange}:{symbol}": symbol
+            for symbol in symbols
+        }
+        try:
+            quotes = self.kite.ltp(list(instruments))
+        except Exception as e:
+            logger.error(f"Error fetching LTPs from Kite: {e}")
+            return {}
+
+        return {
+            instruments[instrument]: quote['last_price']
+            for instrument, quote in quotes.items()
+            if instrument in instruments
+        }
+
     def get_market_pulse_yfinance(self) -> Dict[str, Dict]:
         """
         Fetches live market data for major indices using yfinance.
         """
         data = {}
-        tickers = " ".join(self.indices.values())
         
         try:
-            # Use download for more efficient fetching of multiple tickers
-            hist = yf.download(tickers=tickers, period="2d", progress=False)
-            if hist.empty:
+            # One download for all indices
+            hist = download_indices(self._yf_tickers, period="2d")
+            if not hist:
                 return self._get_empty_pulse_data("yfinance download returned no data.")
 
-            for name, ticker_symbol in self.indices.items():
+            # Last two closes of every index with enough history, as one (n, 2) array
+            names, pairs = [], []
+            for name, ticker in zip(self._names, self._yf_tickers):
                 # Check if data for the ticker is present
-                if ticker_symbol in hist['Close']:
-                    ticker_hist = hist.loc[:, (slice(None), ticker_symbol)]
-                    if len(ticker_hist) >= 2:
-                        last_close = ticker_hist['Close', ticker_symbol].iloc[-1]
-                        prev_close = ticker_hist['Close', ticker_symbol].iloc[-2]
-                        
-                        change = last_close - prev_close
-                        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-                        
-                        data[name] = {
-                            'value': round(last_close, 2),
-                            'change': round(change, 2),
-                            'change_percent': round(change_percent, 2)
-                        }
-                    else:
-                        data[name] = self._get_empty_pulse_data(f"Not enough history for {name}")['data']
+                ticker_hist = hist.get(ticker)
+                if ticker_hist is None:
+                    data[name] = self._get_empty_pulse_data(f"No data for {name}")['data'][name]
+                elif len(ticker_hist) < 2:
+                    data[name] = self._get_empty_pulse_data(f"Not enough history for {name}")['data'][name]
                 else:
-                    data[name] = self._get_empty_pulse_data(f"No data for {name}")['data']
+                    names.append(name)
+                    pairs.append(ticker_hist['Close'].to_numpy()[-2:])
 
-            return {'success': True, 'data': data}
+            if names:
+                closes = np.asarray(pairs, dtype=np.float64)
+                prev_close, last_close = closes[:, 0], closes[:, 1]
+                change = last_close - prev_close
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    change_percent = np.where(prev_close != 0, change / prev_close * 100, 0.0)
+                for name, value, chg, pct in zip(names, last_close.tolist(), change.tolist(), change_percent.tolist()):
+                    data[name] = {
+                        'value': round(value, 2),
+                        'change': round(chg, 2),
+                        'change_percent': round(pct, 2)
+                    }
+
+            return {'success': True, 'data': {name: data[name] for name in self._names}}
 
         except Exception as e:
             return self._get_empty_pulse_data(str(e))
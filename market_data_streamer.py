@@ -7,12 +7,19 @@ import logging
 import json
 from config import kite_api_key, kite_access_token
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 class MarketDataStreamer:
     def __init__(self):
         self.kws = None
         self.callbacks = []
+        self._callbacks = ()  # immutable snapshot read on every tick
         self.subscribed_tokens = set()
         
     def on_connect(self, ws, response):
@@ -29,15 +36,22 @@ class MarketDataStreamer:
         
     def on_message(self, ws, data):
         """Handle incoming market data"""
+        callbacks = self._callbacks
+        if not callbacks:
+            return
         try:
-            for callback in self.callbacks:
+            for callback in callbacks:
                 callback(data)
         except Exception as e:
             logger.error(f"Error processing market data: {e}", exc_info=True)
             
     def on_order_update(self, ws, data):
         """Handle order updates"""
-        logger.info(f"Order update: {json.dumps(data, indent=2)}")
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+        else:
+            payload = json.dumps(data, indent=2, default=str)
+        logger.info(f"Order update: {payload}")
             
     def start(self):
         """Start market data stream"""
@@ -78,4 +92,5 @@ class MarketDataStreamer:
             
     def add_callback(self, callback: Callable):
         """Add callback for market data updates"""
-        self.callbacks.append(callback)
\ No newline at end of file
+        self.callbacks.append(callback)
+        self._callbacks = tuple(self.callbacks)
\ No newline at end of file
@@ -3,8 +3,11 @@ Notification Manager
 Handles notifications with multiple fallback channels
 """
 
+import os
 import smtplib
+import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import logging
 from email.mime.text import MIMEText
@@ -13,10 +16,51 @@ from typing import Dict, List, Optional
 import threading
 import queue
 import time
+from collections import ChainMap, deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Most queued notifications sent concurrently per drain of the queue
+SEND_BATCH_SIZE = 32
+
+# Worker threads draining the queue, so a slow channel (SMTP) does not hold up the others
+NOTIFY_WORKERS = 4
+
+# Telegram's per-message limit and the separator used when joining notifications into one message
+TELEGRAM_MAX_MESSAGE = 4096
+TELEGRAM_SEPARATOR = "\n---\n"
+
+LEVEL_EMOJI = {
+    'info': 'ℹ️',
+    'warning': '⚠️',
+    'error': '🚨',
+    'success': '✅'
+}
+
+TELEGRAM_TEMPLATE = "{emoji} *{LEVEL}*\n{message}"
+
+EMAIL_TEMPLATE = """
+Trading System Notification
+
+Level: {LEVEL}
+Time: {timestamp}
+
+Message:
+{message}
+
+---
+This is an automated notification from your trading system.
+"""
+
 class NotificationManager:
     def __init__(self, config: Dict):
         self.config = config
@@ -26,37 +70,87 @@ class NotificationManager:
         self.email_enabled = bool(config.get('email_settings'))
         self.webhook_enabled = bool(config.get('webhook_url'))
         
+        # Shared HTTP session keeps Telegram/webhook connections open between sends;
+        # one kept-alive connection per concurrent send so a whole batch is in flight at once
+        self._http = requests.Session()
+        self._http.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=SEND_BATCH_SIZE))
+        
         # Notification queue
         self.queue = queue.Queue()
         self.is_running = False
         
-        # Start worker thread
-        self.worker_thread = threading.Thread(target=self._process_notifications)
-        self.worker_thread.daemon = True
+        # Worker threads all consume the one queue; None is the per-worker stop sentinel
+        self._workers = [
+            threading.Thread(target=self._process_notifications, daemon=True)
+            for _ in range(NOTIFY_WORKERS)
+        ]
+        
+        # Sends are network-bound, so a batch goes out in parallel over the shared session
+        self._send_pool = ThreadPoolExecutor(max_workers=SEND_BATCH_SIZE, thread_name_prefix="notify")
+        
+        # Email goes out on one dedicated thread over one long-lived SMTP connection;
+        # the channel is limited to 10/min, so more sessions would only sit logged in
+        self._email_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notify-email")
+        self._smtp_server = None
         
-        # Notification history
-        self.history = []
-        self.max_history = 1000
+        # Notification history lives in SQLite; the deque mirrors the most recent entries
+        self.max_history = 100
+        self.history = deque(maxlen=self.max_history)
+        self._pending_history = []  # rows written once per processed batch
+        self._history_lock = threading.Lock()
+        self.db_path = config.get('history_db_path', 'data/notifications.db')
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._db_lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_db()
         
-        # Rate limiting
-        self.rate_limits = {
-            'telegram': {'count': 0, 'reset_time': time.time(), 'max_per_minute': 30},
-            'email': {'count': 0, 'reset_time': time.time(), 'max_per_minute': 10},
-            'webhook': {'count': 0, 'reset_time': time.time(), 'max_per_minute': 60}
-        }
+        # Rate limiting: max sends per minute, enforced by a token bucket per channel
+        self.rate_limits = {'telegram': 30, 'email': 10, 'webhook': 60}
+        now_ns = time.monotonic_ns()
+        self.buckets = {channel: [float(limit), now_ns] for channel, limit in self.rate_limits.items()}  # [tokens, last refill]
+        self._rate_lock = threading.Lock()
         
+    def _init_db(self):
+        """Create the history table; WAL lets readers query while the worker writes"""
+        with self._db_lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS notification_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    level TEXT,
+                    message TEXT,
+                    channels TEXT,
+                    tried_channels TEXT,
+                    successful_channel TEXT,
+                    success INTEGER
+                )
+            """)
+            self.db.commit()
+            
     def start(self):
         """Start notification processing"""
         if not self.is_running:
             self.is_running = True
-            self.worker_thread.start()
+            for worker in self._workers:
+                worker.start()
             logger.info("Notification manager started")
             
     def stop(self):
-        """Stop notification processing"""
+        """Stop notification processing once everything already queued has been sent"""
         self.is_running = False
-        if self.worker_thread.is_alive():
-            self.worker_thread.join()
+        for _ in self._workers:
+            self.queue.put(None)
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.join()
+        self._send_pool.shutdown(wait=True)
+        self._email_pool.shutdown(wait=True)
+        self._flush_history()
+        self._close_smtp()
+        with self._db_lock:
+            self.db.close()
             
     def send_notification(self, message: str, level: str = 'info', 
                         channels: List[str] = None):
@@ -76,51 +170,129 @@ class NotificationManager:
             
     def _process_notifications(self):
         """Process notification queue"""
-        while self.is_running:
+        while True:
             try:
-                # Get next notification
-                notification = self.queue.get(timeout=1)
-                
-                success = False
-                tried_channels = []
+                batch = self._drain()
+                if batch is None:
+                    break
+                if not batch:
+                    continue
+                    
+                # Telegram-first notifications in the batch share sendMessage calls
+                groups = self._telegram_groups(batch)
+                delivered = {
+                    id(notification)
+                    for group, sent in zip(groups, self._send_pool.map(self._send_telegram_group, groups))
+                    if sent
+                    for notification in group
+                }
                 
-                # Try each channel in order
-                for channel in notification['channels']:
-                    if self._can_send(channel):
-                        success = self._send_via_channel(channel, notification)
-                        tried_channels.append(channel)
-                        if success:
-                            break
-                            
-                # Log result
-                self._log_notification(notification, success, tried_channels)
+                # Send the rest concurrently; total wait is the slowest send, not the sum
+                rest = [n for n in batch if id(n) not in delivered]
+                results = dict(zip(map(id, rest), self._send_pool.map(self._deliver, rest)))
                 
-                # Store in history
-                self._store_notification(notification, success, tried_channels)
+                for notification in batch:
+                    if id(notification) in delivered:
+                        success, tried_channels = True, ['telegram']
+                    else:
+                        success, tried_channels = results[id(notification)]
+                        
+                    # Log result
+                    self._log_notification(notification, success, tried_channels)
+                    
+                    # Store in history
+                    self._store_notification(notification, success, tried_channels)
+                    
+                self._flush_history()
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"Error processing notification: {e}")
                 
-    def _can_send(self, channel: str) -> bool:
-        """Check if we can send via channel (rate limiting)"""
+    def _drain(self, max_batch: int = SEND_BATCH_SIZE, max_wait: float = 0.05) -> Optional[List[Dict]]:
+        """Wait for the next notification, then collect any arriving within max_wait seconds;
+        returns None once this worker takes a stop sentinel"""
         try:
-            limit = self.rate_limits[channel]
-            now = time.time()
+            first = self.queue.get(timeout=1)
+        except queue.Empty:
+            return []
+        if first is None:
+            return None
             
-            # Reset counter if minute has passed
-            if now - limit['reset_time'] > 60:
-                limit['count'] = 0
-                limit['reset_time'] = now
-                
-            # Check if under limit
-            return limit['count'] < limit['max_per_minute']
+        batch = [first]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                notification = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if notification is None:
+                # Leave the sentinel for the next drain so this batch still goes out
+                self.queue.put(None)
+                break
+            batch.append(notification)
+        return batch
+        
+    def _telegram_groups(self, batch: List[Dict]) -> List[List[Dict]]:
+        """Group telegram-first notifications into runs that fit in one Telegram message"""
+        if not self.telegram_enabled:
+            return []
             
-        except Exception as e:
-            logger.error(f"Error checking rate limit: {e}")
+        groups, group, size = [], [], 0
+        for notification in batch:
+            if notification['channels'][:1] != ['telegram']:
+                continue
+            length = len(self._format_telegram_message(notification))
+            if group and size + len(TELEGRAM_SEPARATOR) + length > TELEGRAM_MAX_MESSAGE:
+                groups.append(group)
+                group, size = [], 0
+            size += length + (len(TELEGRAM_SEPARATOR) if group else 0)
+            group.append(notification)
+        groups.append(group)
+        
+        # A lone notification gains nothing from joining; it goes through normal delivery
+        return [group for group in groups if len(group) > 1]
+        
+    def _send_telegram_group(self, group: List[Dict]) -> bool:
+        """Send several notifications as one Telegram message"""
+        if not self._can_send('telegram'):
+            return False
+            
+        text = TELEGRAM_SEPARATOR.join(self._format_telegram_message(n) for n in group)
+        return self._post_telegram(text)
+        
+    def _deliver(self, notification: Dict):
+        """Try each channel in order until one succeeds; returns (success, tried_channels)"""
+        success = False
+        tried_channels = []
+        
+        for channel in notification['channels']:
+            if self._can_send(channel):
+                success = self._send_via_channel(channel, notification)
+                tried_channels.append(channel)
+                if success:
+                    break
+                    
+        return success, tried_channels
+        
+    def _can_send(self, channel: str) -> bool:
+        """Take a send token for the channel if one is available (rate limiting)"""
+        bucket = self.buckets.get(channel)
+        if bucket is None:
             return False
             
+        limit = self.rate_limits[channel]
+        now_ns = time.monotonic_ns()
+        with self._rate_lock:
+            # Refill continuously at limit tokens per minute, capped at a minute's worth
+            tokens = min(limit, bucket[0] + (now_ns - bucket[1]) * limit / 60e9)
+            bucket[1] = now_ns
+            if tokens < 1:
+                bucket[0] = tokens
+                return False
+            bucket[0] = tokens - 1
+            return True
+            
     def _send_via_channel(self, channel: str, notification: Dict) -> bool:
         """Send notification via specified channel"""
         try:
@@ -133,9 +305,6 @@ class NotificationManager:
             else:
                 return False
                 
-            if success:
-                self.rate_limits[channel]['count'] += 1
-                
             return success
             
         except Exception as e:
@@ -144,20 +313,22 @@ class NotificationManager:
             
     def _send_telegram(self, notification: Dict) -> bool:
         """Send notification via Telegram"""
+        return self._post_telegram(self._format_telegram_message(notification))
+        
+    def _post_telegram(self, text: str) -> bool:
+        """Post a formatted message to the configured Telegram chat"""
         try:
             token = self.config['telegram_token']
             chat_id = self.config['telegram_chat_id']
             
-            formatted_message = self._format_telegram_message(notification)
-            
             url = f"https://api.telegram.org/bot{token}/sendMessage"
             data = {
                 'chat_id': chat_id,
-                'text': formatted_message,
+                'text': text,
                 'parse_mode': 'Markdown'
             }
             
-            response = requests.post(url, json=data, timeout=5)
+            response = self._http.post(url, json=data, timeout=5)
             return response.status_code == 200
             
         except Exception as e:
@@ -177,19 +348,57 @@ class NotificationManager:
             body = self._format_email_message(notification)
             msg.attach(MIMEText(body, 'plain'))
             
-            with smtplib.SMTP(settings['smtp_server'], settings['smtp_port']) as server:
-                if settings.get('use_tls'):
-                    server.starttls()
-                if settings.get('username'):
-                    server.login(settings['username'], settings['password'])
-                server.send_message(msg)
-                
-            return True
+            return self._email_pool.submit(self._send_smtp, settings, msg).result()
             
         except Exception as e:
             logger.error(f"Email send error: {e}")
             return False
             
+    def _send_smtp(self, settings: Dict, msg: MIMEMultipart) -> bool:
+        """Send a message over the shared SMTP connection (runs on the email thread)"""
+        try:
+            self._smtp(settings).send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped us between the NOOP and the send; reconnect once
+            self._drop_smtp()
+            self._smtp(settings).send_message(msg)
+        return True
+            
+    def _smtp(self, settings: Dict) -> smtplib.SMTP:
+        """The SMTP connection, reconnecting (TLS + login) only when the NOOP probe fails"""
+        server = self._smtp_server
+        if server is not None:
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            self._drop_smtp()
+            
+        server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'])
+        if settings.get('use_tls'):
+            server.starttls()
+        if settings.get('username'):
+            server.login(settings['username'], settings['password'])
+            
+        self._smtp_server = server
+        return server
+        
+    def _drop_smtp(self):
+        """Forget and close the SMTP connection"""
+        server, self._smtp_server = self._smtp_server, None
+        if server is not None:
+            server.close()
+        
+    def _close_smtp(self):
+        """Log out of the SMTP server; called once the email thread has stopped"""
+        server, self._smtp_server = self._smtp_server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+            
     def _send_webhook(self, notification: Dict) -> bool:
         """Send notification via webhook"""
         try:
@@ -201,9 +410,10 @@ class NotificationManager:
                 'timestamp': notification['timestamp']
             }
             
-            response = requests.post(
+            body = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode()
+            response = self._http.post(
                 webhook_url,
-                json=payload,
+                data=body,
                 headers={'Content-Type': 'application/json'},
                 timeout=5
             )
@@ -216,30 +426,15 @@ class NotificationManager:
             
     def _format_telegram_message(self, notification: Dict) -> str:
         """Format message for Telegram"""
-        level_emoji = {
-            'info': 'ℹ️',
-            'warning': '⚠️',
-            'error': '🚨',
-            'success': '✅'
-        }
-        
-        emoji = level_emoji.get(notification['level'], 'ℹ️')
-        return f"{emoji} *{notification['level'].upper()}*\n{notification['message']}"
+        level = notification['level']
+        return TELEGRAM_TEMPLATE.format_map(ChainMap(
+            {'emoji': LEVEL_EMOJI.get(level, 'ℹ️'), 'LEVEL': level.upper()},
+            notification
+        ))
         
     def _format_email_message(self, notification: Dict) -> str:
         """Format message for email"""
-        return f"""
-Trading System Notification
-
-Level: {notification['level'].upper()}
-Time: {notification['timestamp']}
-
-Message:
-{notification['message']}
-
----
-This is an automated notification from your trading system.
-"""
+        return EMAIL_TEMPLATE.format_map(ChainMap({'LEVEL': notification['level'].upper()}, notification))
         
     def _log_notification(self, notification: Dict, success: bool, 
                          tried_channels: List[str]):
@@ -260,15 +455,61 @@ This is an automated notification from your trading system.
                 'successful_channel': tried_channels[-1] if success else None
             }
             
-            self.history.append(entry)
+            row = (
+                notification['timestamp'],
+                notification['level'],
+                notification['message'],
+                json.dumps(notification['channels']),
+                json.dumps(tried_channels),
+                entry['successful_channel'],
+                int(success)
+            )
+            with self._history_lock:
+                self.history.append(entry)
+                self._pending_history.append(row)
             
-            # Trim history if needed
-            if len(self.history) > self.max_history:
-                self.history = self.history[-self.max_history:]
-                
         except Exception as e:
             logger.error(f"Error storing notification: {e}")
             
+    def _flush_history(self):
+        """Write buffered history rows in one transaction"""
+        with self._history_lock:
+            if not self._pending_history:
+                return
+            rows, self._pending_history = self._pending_history, []
+        try:
+            with self._db_lock:
+                self.db.executemany(
+                    "INSERT INTO notification_history "
+                    "(timestamp, level, message, channels, tried_channels, successful_channel, success) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self.db.commit()
+        except Exception as e:
+            logger.error(f"Error persisting notification history: {e}")
+            
     def get_notification_history(self, limit: int = 100) -> List[Dict]:
-        """Get recent notification history"""
-        return self.history[-limit:]
\ No newline at end of file
+        """Get recent notification history, oldest first"""
+        with self._history_lock:
+            if limit <= len(self.history):
+                return list(islice(self.history, len(self.history) - limit, None))
+            
+        with self._db_lock:
+            rows = self.db.execute(
+                "SELECT timestamp, level, message, channels, tried_channels, successful_channel, success "
+                "FROM notification_history ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {
+                'message': message,
+                'level': level,
+                'channels': json.loads(channels),
+                'timestamp': timestamp,
+                'success': bool(success),
+                'tried_channels': json.loads(tried_channels),
+                'successful_channel': successful_channel
+            }
+            for timestamp, level, message, channels, tried_channels, successful_channel, success in reversed(rows)
+        ]
\ No newline at end of file
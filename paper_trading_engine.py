@@ -3,50 +3,188 @@
 Virtual trading system for customers to practice risk-free
 """
 
+import atexit
 import json
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
-import uuid
-import random
+import heapq
+import itertools
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used without it
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Seconds the flusher waits after a mutation so a burst of trades becomes one file write
+FLUSH_DELAY = 0.1
+# Longest wait between retries while saves keep failing (disk full, read-only directory)
+FLUSH_MAX_BACKOFF = 30.0
+
+# Write buffer for the data file
+WRITE_BUFFER = 64 * 1024
+
 class PaperTradingEngine:
-    def __init__(self, initial_capital: float = 100000.0):
-        self.data_file = "paper_trading_data.json"
+    def __init__(self, initial_capital: float = 100000.0, data_file: str = "paper_trading_data.json"):
+        self.data_file = data_file
         self.accounts = {}
         self.initial_capital = initial_capital
+        
+        # Order IDs come from a counter seeded with the epoch, so restarts don't reuse them
+        self._order_seq = itertools.count(int(time.time()))
+        
+        # Mutations mark the data dirty; a background thread rewrites the file
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._dirty = threading.Event()
+        
+        # Struct-of-arrays index over every open position for vectorized price updates;
+        # the position dicts stay the persisted view and are written back lazily
+        self._book_stale = True
+        self._prices_pending = False
+        
         self.load_data()
+        
+        self._flush_thread = threading.Thread(target=self._flusher, daemon=True)
+        self._flush_thread.start()
+        atexit.register(self._flush_sync)
     
     def load_data(self):
         """Load paper trading data from file"""
         try:
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.accounts = data.get('accounts', {})
+                with open(self.data_file, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                self.accounts = data.get('accounts', {})
+                for portfolio in self.accounts.values():
+                    # Running sums over the positions, maintained by every mutation from here on
+                    positions = portfolio['positions'].values()
+                    portfolio.setdefault('positions_pnl_sum', sum(p['pnl'] for p in positions))
+                    portfolio.setdefault('positions_current_value_sum', sum(p['current_value'] for p in positions))
             else:
                 self.accounts = {}
         except Exception as e:
             logger.error(f"Error loading paper trading data: {e}")
             self.accounts = {}
     
-    def save_data(self):
-        """Save paper trading data to file"""
+    def save_data(self) -> bool:
+        """Save paper trading data to file, replacing it atomically; returns whether it was written"""
         try:
-            data = {
-                'accounts': self.accounts,
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with self._save_lock:
+                with self._lock:
+                    self._sync_positions()
+                    # Changes made after this snapshot set the flag again for the next flush
+                    self._dirty.clear()
+                    data = {
+                        'accounts': self.accounts,
+                        'last_updated': datetime.now().isoformat()
+                    }
+                    if orjson is not None:
+                        # Non-string keys are stringified, as the stdlib encoder does
+                        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                    else:
+                        payload = json.dumps(data, indent=2).encode()
+                    
+                tmp_file = f"{self.data_file}.tmp"
+                with open(tmp_file, 'wb', buffering=WRITE_BUFFER) as f:
+                    f.write(payload)
+                os.replace(tmp_file, self.data_file)
+            return True
         except Exception as e:
+            # The snapshot never reached disk; stay dirty so the next flush retries it
+            self._dirty.set()
             logger.error(f"Error saving paper trading data: {e}")
+            return False
+    
+    def _build_book(self):
+        """Index every open position into column arrays, with the rows holding each symbol"""
+        portfolios = list(self.accounts.values())
+        positions = []
+        owners = []
+        rows_by_symbol = {}
+        for owner, portfolio in enumerate(portfolios):
+            for symbol, position in portfolio['positions'].items():
+                rows_by_symbol.setdefault(symbol, []).append(len(positions))
+                positions.append(position)
+                owners.append(owner)
+                
+        n = len(positions)
+        self._book_portfolios = portfolios
+        self._book_positions = positions
+        self._book_owner = np.array(owners, dtype=np.intp)
+        self._book_rows = {symbol: np.array(rows, dtype=np.intp) for symbol, rows in rows_by_symbol.items()}
+        self._book_qty = np.fromiter((p['quantity'] for p in positions), dtype=np.float64, count=n)
+        self._book_avg = np.fromiter((p['avg_price'] for p in positions), dtype=np.float64, count=n)
+        self._book_price = np.empty(n)
+        self._book_value = np.fromiter((p['current_value'] for p in positions), dtype=np.float64, count=n)
+        self._book_pnl = np.fromiter((p['pnl'] for p in positions), dtype=np.float64, count=n)
+        self._book_updated = np.empty(n, dtype=object)
+        self._book_pending = np.zeros(n, dtype=bool)
+        # Per-portfolio changes to positions_pnl_sum and positions_current_value_sum
+        self._book_pnl_delta = np.zeros(len(portfolios))
+        self._book_value_delta = np.zeros(len(portfolios))
+        self._book_stale = False
+    
+    def _sync_positions(self):
+        """Write price updates held in the column arrays back into the position dicts"""
+        if not self._prices_pending:
+            return
+            
+        rows = np.flatnonzero(self._book_pending)
+        positions = self._book_positions
+        for i, price, value, pnl, updated in zip(
+            rows.tolist(),
+            self._book_price[rows].tolist(),
+            self._book_value[rows].tolist(),
+            self._book_pnl[rows].tolist(),
+            self._book_updated[rows]
+        ):
+            position = positions[i]
+            position['current_price'] = price
+            position['current_value'] = value
+            position['pnl'] = pnl
+            position['last_updated'] = updated
+            
+        owners = np.flatnonzero(np.logical_or(self._book_pnl_delta, self._book_value_delta))
+        for owner, pnl_delta, value_delta in zip(
+            owners.tolist(),
+            self._book_pnl_delta[owners].tolist(),
+            self._book_value_delta[owners].tolist()
+        ):
+            portfolio = self._book_portfolios[owner]
+            portfolio['positions_pnl_sum'] += pnl_delta
+            portfolio['positions_current_value_sum'] += value_delta
+            
+        self._book_pending[rows] = False
+        self._book_pnl_delta[:] = 0.0
+        self._book_value_delta[:] = 0.0
+        self._prices_pending = False
+    
+    def _flusher(self):
+        """Background writer: saves once per burst of mutations, backing off while saves fail"""
+        delay = FLUSH_DELAY
+        while True:
+            self._dirty.wait()
+            time.sleep(delay)
+            delay = FLUSH_DELAY if self.save_data() else min(delay * 2, FLUSH_MAX_BACKOFF)
+    
+    def _flush_sync(self):
+        """Write any unsaved changes now (registered with atexit)"""
+        if self._dirty.is_set():
+            self.save_data()
     
     def create_portfolio(self, user_id: str, initial_balance: float = 100000.0) -> Dict:
         """Create a new paper trading portfolio"""
+        user_id = str(user_id)  # accounts are keyed by string ids, as they are after a reload
+        now_iso = datetime.now().isoformat()
         portfolio = {
             'user_id': user_id,
             'balance': initial_balance,
@@ -54,197 +192,237 @@ class PaperTradingEngine:
             'positions': {},
             'trade_history': [],
             'pnl': 0.0,
+            'positions_pnl_sum': 0.0,
+            'positions_current_value_sum': 0.0,
             'total_trades': 0,
             'winning_trades': 0,
             'losing_trades': 0,
             'win_rate': 0.0,
             'max_profit': 0.0,
             'max_loss': 0.0,
-            'created_at': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
+            'created_at': now_iso,
+            'last_activity': now_iso
         }
         
-        self.accounts[user_id] = portfolio
-        self.save_data()
+        with self._lock:
+            self.accounts[user_id] = portfolio
+        self._dirty.set()
         
         logger.info(f"Created paper trading portfolio for user {user_id}")
         return portfolio
     
     def get_portfolio(self, user_id: str) -> Optional[Dict]:
         """Get user's paper trading portfolio"""
-        return self.portfolios.get(user_id)
+        with self._lock:
+            self._sync_positions()
+            return self.accounts.get(str(user_id))
     
     def place_order(self, user_id: str, symbol: str, quantity: int, 
                    price: float, order_type: str = "BUY") -> Dict:
         """Place a paper trading order"""
-        if user_id not in self.portfolios:
-            self.create_portfolio(user_id)
-        
-        portfolio = self.portfolios[user_id]
-        order_value = quantity * price
-        
-        # Generate order ID
-        order_id = str(uuid.uuid4())[:8]
-        
-        # Check if user has enough balance for BUY orders
-        if order_type == "BUY" and portfolio['balance'] < order_value:
-            return {
-                'success': False,
-                'message': 'Insufficient balance',
-                'required': order_value,
-                'available': portfolio['balance']
-            }
-        
-        # Check if user has the position for SELL orders
-        if order_type == "SELL":
-            if symbol not in portfolio['positions'] or portfolio['positions'][symbol]['quantity'] < quantity:
+        user_id = str(user_id)
+        with self._lock:
+            self._sync_positions()
+            portfolio = self.accounts.get(user_id)
+            if portfolio is None:
+                portfolio = self.create_portfolio(user_id)
+            
+            positions = portfolio['positions']
+            position = positions.get(symbol)
+            order_value = quantity * price
+            
+            # Generate order ID
+            order_id = format(next(self._order_seq), '08x')
+            
+            # Check if user has enough balance for BUY orders
+            if order_type == "BUY" and portfolio['balance'] < order_value:
                 return {
                     'success': False,
-                    'message': 'Insufficient quantity to sell',
-                    'available': portfolio['positions'].get(symbol, {}).get('quantity', 0)
+                    'message': 'Insufficient balance',
+                    'required': order_value,
+                    'available': portfolio['balance']
                 }
-        
-        # Execute the order
-        trade = {
-            'order_id': order_id,
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': price,
-            'order_type': order_type,
-            'timestamp': datetime.now().isoformat(),
-            'status': 'EXECUTED'
-        }
-        
-        if order_type == "BUY":
-            # Deduct money and add position
-            portfolio['balance'] -= order_value
             
-            if symbol in portfolio['positions']:
-                # Average price calculation
-                existing_qty = portfolio['positions'][symbol]['quantity']
-                existing_price = portfolio['positions'][symbol]['avg_price']
-                total_qty = existing_qty + quantity
-                avg_price = ((existing_qty * existing_price) + (quantity * price)) / total_qty
+            # Check if user has the position for SELL orders
+            if order_type == "SELL":
+                if position is None or position['quantity'] < quantity:
+                    return {
+                        'success': False,
+                        'message': 'Insufficient quantity to sell',
+                        'available': position['quantity'] if position is not None else 0
+                    }
+            
+            # Execute the order; one timestamp covers the trade, position and portfolio
+            now_iso = datetime.now().isoformat()
+            trade = {
+                'order_id': order_id,
+                'symbol': symbol,
+                'quantity': quantity,
+                'price': price,
+                'order_type': order_type,
+                'timestamp': now_iso,
+                'status': 'EXECUTED'
+            }
+            
+            if order_type == "BUY":
+                # Deduct money and add position
+                portfolio['balance'] -= order_value
                 
-                portfolio['positions'][symbol] = {
-                    'quantity': total_qty,
-                    'avg_price': avg_price,
-                    'current_price': price,
-                    'invested_amount': total_qty * avg_price,
-                    'current_value': total_qty * price,
-                    'pnl': (price - avg_price) * total_qty,
-                    'last_updated': datetime.now().isoformat()
-                }
-            else:
-                portfolio['positions'][symbol] = {
-                    'quantity': quantity,
-                    'avg_price': price,
-                    'current_price': price,
-                    'invested_amount': order_value,
-                    'current_value': order_value,
-                    'pnl': 0.0,
-                    'last_updated': datetime.now().isoformat()
-                }
-        
-        elif order_type == "SELL":
-            # Add money back and reduce position
-            portfolio['balance'] += order_value
-            position = portfolio['positions'][symbol]
+                if position is not None:
+                    # Average price calculation
+                    existing_qty = position['quantity']
+                    total_qty = existing_qty + quantity
+                    avg_price = ((existing_qty * position['avg_price']) + order_value) / total_qty
+                    new_pnl = (price - avg_price) * total_qty
+                    pnl_delta = new_pnl - position['pnl']
+                    value_delta = total_qty * price - position['current_value']
+                    
+                    positions[symbol] = {
+                        'quantity': total_qty,
+                        'avg_price': avg_price,
+                        'current_price': price,
+                        'invested_amount': total_qty * avg_price,
+                        'current_value': total_qty * price,
+                        'pnl': new_pnl,
+                        'last_updated': now_iso
+                    }
+                else:
+                    pnl_delta = 0.0
+                    value_delta = order_value
+                    positions[symbol] = {
+                        'quantity': quantity,
+                        'avg_price': price,
+                        'current_price': price,
+                        'invested_amount': order_value,
+                        'current_value': order_value,
+                        'pnl': 0.0,
+                        'last_updated': now_iso
+                    }
             
-            # Calculate P&L for this trade
-            trade_pnl = (price - position['avg_price']) * quantity
+            elif order_type == "SELL":
+                # Add money back and reduce position
+                portfolio['balance'] += order_value
+                avg_price = position['avg_price']
+                
+                # Calculate P&L for this trade
+                trade_pnl = (price - avg_price) * quantity
+                
+                # Update position
+                remaining_qty = position['quantity'] - quantity
+                if remaining_qty > 0:
+                    new_pnl = (price - avg_price) * remaining_qty
+                    pnl_delta = new_pnl - position['pnl']
+                    value_delta = remaining_qty * price - position['current_value']
+                    position['quantity'] = remaining_qty
+                    position['current_price'] = price
+                    position['current_value'] = remaining_qty * price
+                    position['pnl'] = new_pnl
+                else:
+                    # Position closed completely
+                    pnl_delta = -position['pnl']
+                    value_delta = -position['current_value']
+                    del positions[symbol]
+                
+                # Update trade statistics
+                portfolio['total_trades'] += 1
+                if trade_pnl > 0:
+                    portfolio['winning_trades'] += 1
+                    if trade_pnl > portfolio['max_profit']:
+                        portfolio['max_profit'] = trade_pnl
+                else:
+                    portfolio['losing_trades'] += 1
+                    if trade_pnl < portfolio['max_loss']:
+                        portfolio['max_loss'] = trade_pnl
+                
+                portfolio['win_rate'] = (portfolio['winning_trades'] / portfolio['total_trades']) * 100
+                trade['pnl'] = trade_pnl
             
-            # Update position
-            remaining_qty = position['quantity'] - quantity
-            if remaining_qty > 0:
-                portfolio['positions'][symbol]['quantity'] = remaining_qty
-                portfolio['positions'][symbol]['current_price'] = price
-                portfolio['positions'][symbol]['current_value'] = remaining_qty * price
-                portfolio['positions'][symbol]['pnl'] = (price - position['avg_price']) * remaining_qty
-            else:
-                # Position closed completely
-                del portfolio['positions'][symbol]
+            # Add to trade history
+            portfolio['trade_history'].append(trade)
+            portfolio['last_activity'] = now_iso
             
-            # Update trade statistics
-            portfolio['total_trades'] += 1
-            if trade_pnl > 0:
-                portfolio['winning_trades'] += 1
-                if trade_pnl > portfolio['max_profit']:
-                    portfolio['max_profit'] = trade_pnl
-            else:
-                portfolio['losing_trades'] += 1
-                if trade_pnl < portfolio['max_loss']:
-                    portfolio['max_loss'] = trade_pnl
+            # Only the traded position changed, so adjust the running sums by its deltas
+            portfolio['positions_pnl_sum'] += pnl_delta
+            portfolio['positions_current_value_sum'] += value_delta
+            portfolio['pnl'] = portfolio['balance'] - portfolio['initial_balance'] + portfolio['positions_pnl_sum']
             
-            portfolio['win_rate'] = (portfolio['winning_trades'] / portfolio['total_trades']) * 100
-            trade['pnl'] = trade_pnl
-        
-        # Add to trade history
-        portfolio['trade_history'].append(trade)
-        portfolio['last_activity'] = datetime.now().isoformat()
-        
-        # Calculate total P&L
-        total_pnl = portfolio['balance'] - portfolio['initial_balance']
-        for pos in portfolio['positions'].values():
-            total_pnl += pos['pnl']
-        portfolio['pnl'] = total_pnl
-        
-        self.save_data()
-        
-        return {
-            'success': True,
-            'message': f'{order_type} order executed successfully',
-            'order_id': order_id,
-            'trade': trade,
-            'portfolio_summary': {
-                'balance': portfolio['balance'],
-                'total_pnl': portfolio['pnl'],
-                'positions': len(portfolio['positions'])
+            self._book_stale = True
+            self._dirty.set()
+            
+            return {
+                'success': True,
+                'message': f'{order_type} order executed successfully',
+                'order_id': order_id,
+                'trade': trade,
+                'portfolio_summary': {
+                    'balance': portfolio['balance'],
+                    'total_pnl': portfolio['pnl'],
+                    'positions': len(positions)
+                }
             }
-        }
     
     def update_market_prices(self, price_data: Dict[str, float]):
         """Update current market prices for all positions"""
-        for user_id, portfolio in self.portfolios.items():
-            for symbol, position in portfolio['positions'].items():
-                if symbol in price_data:
-                    new_price = price_data[symbol]
-                    position['current_price'] = new_price
-                    position['current_value'] = position['quantity'] * new_price
-                    position['pnl'] = (new_price - position['avg_price']) * position['quantity']
-                    position['last_updated'] = datetime.now().isoformat()
+        with self._lock:
+            if self._book_stale:
+                self._build_book()
+                
+            symbols = [symbol for symbol in price_data if symbol in self._book_rows]
+            if symbols:
+                # One vectorized pass over every position in the updated symbols
+                rows = [self._book_rows[symbol] for symbol in symbols]
+                idx = np.concatenate(rows)
+                prices = np.repeat(
+                    np.fromiter((price_data[symbol] for symbol in symbols), dtype=np.float64, count=len(symbols)),
+                    [len(r) for r in rows]
+                )
+                qty = self._book_qty[idx]
+                owner = self._book_owner[idx]
+                n_portfolios = len(self._book_portfolios)
+                pnl = (prices - self._book_avg[idx]) * qty
+                value = prices * qty
+                self._book_pnl_delta += np.bincount(owner, weights=pnl - self._book_pnl[idx], minlength=n_portfolios)
+                self._book_value_delta += np.bincount(owner, weights=value - self._book_value[idx], minlength=n_portfolios)
+                self._book_price[idx] = prices
+                self._book_value[idx] = value
+                self._book_pnl[idx] = pnl
+                self._book_updated[idx] = datetime.now().isoformat()
+                self._book_pending[idx] = True
+                self._prices_pending = True
         
-        self.save_data()
+        self._dirty.set()
     
     def get_leaderboard(self, limit: int = 10) -> List[Dict]:
         """Get top performers leaderboard"""
-        users = []
-        for user_id, portfolio in self.portfolios.items():
-            # Calculate current portfolio value
-            current_value = portfolio['balance']
-            for position in portfolio['positions'].values():
-                current_value += position['current_value']
+        def return_pct(item):
+            portfolio = item[1]
+            current_value = portfolio['balance'] + portfolio['positions_current_value_sum']
+            return ((current_value - portfolio['initial_balance']) / portfolio['initial_balance']) * 100
             
-            return_pct = ((current_value - portfolio['initial_balance']) / portfolio['initial_balance']) * 100
+        with self._lock:
+            self._sync_positions()
+            # Top performers by return percentage; only the winners are built into rows
+            top = heapq.nlargest(limit, self.accounts.items(), key=return_pct)
             
+        users = []
+        for item in top:
+            user_id, portfolio = item
+            current_value = portfolio['balance'] + portfolio['positions_current_value_sum']
             users.append({
                 'user_id': user_id,
                 'portfolio_value': current_value,
                 'initial_balance': portfolio['initial_balance'],
                 'pnl': current_value - portfolio['initial_balance'],
-                'return_percentage': return_pct,
+                'return_percentage': return_pct(item),
                 'total_trades': portfolio['total_trades'],
                 'win_rate': portfolio['win_rate'],
                 'max_profit': portfolio['max_profit'],
                 'max_loss': portfolio['max_loss']
             })
-        
-        # Sort by return percentage
-        users.sort(key=lambda x: x['return_percentage'], reverse=True)
-        return users[:limit]
+        return users
     
-    def generate_demo_data(self):
-        """Generate demo portfolios for demonstration"""
+    def generate_demo_data(self, seed: Optional[int] = 0):
+        """Generate demo portfolios for demonstration (reproducible for a given seed)"""
         demo_users = [
             ('demo_trader_1', 150000, 250),
             ('demo_trader_2', 120000, 180),
@@ -255,36 +433,58 @@ class PaperTradingEngine:
         
         symbols = ['NIFTY', 'BANKNIFTY', 'RELIANCE', 'TCS', 'HDFC', 'ICICI']
         
-        for user_id, balance, trades in demo_users:
-            if user_id not in self.accounts:
-                portfolio = self.create_portfolio(user_id, 100000)
-                
-                # Set custom balance and trades
-                portfolio['balance'] = balance
-                portfolio['total_trades'] = trades
-                portfolio['winning_trades'] = int(trades * random.uniform(0.6, 0.8))
-                portfolio['losing_trades'] = trades - portfolio['winning_trades']
-                portfolio['win_rate'] = (portfolio['winning_trades'] / trades) * 100
-                portfolio['max_profit'] = random.uniform(5000, 15000)
-                portfolio['max_loss'] = random.uniform(-3000, -8000)
-                
-                # Add some positions
-                for _ in range(random.randint(2, 5)):
-                    symbol = random.choice(symbols)
-                    qty = random.randint(1, 10)
-                    price = random.uniform(100, 2000)
+        # Draw every random value up front: per-user stats, then one flat run of positions
+        rng = np.random.default_rng(seed)
+        n_users = len(demo_users)
+        win_ratios = rng.uniform(0.6, 0.8, n_users).tolist()
+        max_profits = rng.uniform(5000, 15000, n_users).tolist()
+        max_losses = rng.uniform(-8000, -3000, n_users).tolist()
+        counts = rng.integers(2, 6, n_users)
+        total = int(counts.sum())
+        starts = np.concatenate(([0], np.cumsum(counts))).tolist()
+        syms = rng.integers(0, len(symbols), total).tolist()
+        qtys = rng.integers(1, 11, total).tolist()
+        avg_prices = rng.uniform(100, 2000, total)
+        drift = rng.uniform(0.9, 1.1, (2, total))  # current price, per-unit current value
+        current_prices, unit_values = (avg_prices * drift).tolist()
+        avg_prices = avg_prices.tolist()
+        pnl_ratios = rng.uniform(-0.1, 0.1, total).tolist()
+        
+        with self._lock:
+            self._sync_positions()
+            self._book_stale = True
+            now_iso = datetime.now().isoformat()
+            for u, (user_id, balance, trades) in enumerate(demo_users):
+                if user_id not in self.accounts:
+                    portfolio = self.create_portfolio(user_id, 100000)
                     
-                    portfolio['positions'][f"{symbol}_CE"] = {
-                        'quantity': qty,
-                        'avg_price': price,
-                        'current_price': price * random.uniform(0.9, 1.1),
-                        'invested_amount': qty * price,
-                        'current_value': qty * price * random.uniform(0.9, 1.1),
-                        'pnl': qty * price * random.uniform(-0.1, 0.1),
-                        'last_updated': datetime.now().isoformat()
-                    }
+                    # Set custom balance and trades
+                    portfolio['balance'] = balance
+                    portfolio['total_trades'] = trades
+                    portfolio['winning_trades'] = int(trades * win_ratios[u])
+                    portfolio['losing_trades'] = trades - portfolio['winning_trades']
+                    portfolio['win_rate'] = (portfolio['winning_trades'] / trades) * 100
+                    portfolio['max_profit'] = max_profits[u]
+                    portfolio['max_loss'] = max_losses[u]
+                    
+                    # Add some positions
+                    for k in range(starts[u], starts[u + 1]):
+                        qty = qtys[k]
+                        price = avg_prices[k]
+                        portfolio['positions'][f"{symbols[syms[k]]}_CE"] = {
+                            'quantity': qty,
+                            'avg_price': price,
+                            'current_price': current_prices[k],
+                            'invested_amount': qty * price,
+                            'current_value': qty * unit_values[k],
+                            'pnl': qty * price * pnl_ratios[k],
+                            'last_updated': now_iso
+                        }
+                    positions = portfolio['positions'].values()
+                    portfolio['positions_pnl_sum'] = sum(p['pnl'] for p in positions)
+                    portfolio['positions_current_value_sum'] = sum(p['current_value'] for p in positions)
         
-        self.save_data()
+        self._dirty.set()
 
 # Global paper trading engine instance
 paper_trading_engine = PaperTradingEngine()
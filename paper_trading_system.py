@@ -2,17 +2,66 @@
 Paper Trading System for Options
 Simulates trading with virtual money for testing strategies
 """
+import gzip
 import json
 import logging
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, is_dataclass
 from typing import Dict, List, Optional
 from pathlib import Path
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Write buffer for the state files
+WRITE_BUFFER = 64 * 1024
+
+# Completed trades are appended to a gzipped JSON-lines log, one trade per line;
+# each run appends a new gzip member, and each trade is sync-flushed so it can be read back
+HISTORY_FILE = "paper_trading_history.jsonl.gz"
+# History files written by earlier versions, migrated once on startup: an uncompressed
+# JSON-lines log, then whole-list JSON files
+LEGACY_HISTORY_FILES = ("paper_trading_history.jsonl", "paper_trading_history.json.gz", "paper_trading_history.json")
+# gzip level for any .gz state path; level 1 keeps the CPU cost negligible on repetitive JSON
+HISTORY_COMPRESSLEVEL = 1
+
+def _json_default(obj):
+    """Stdlib-encoder fallback for the types orjson handles natively"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps(obj) -> bytes:
+    """Indented JSON bytes; orjson walks dataclasses and datetimes without an asdict() copy"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS)
+    return json.dumps(obj, indent=2, default=_json_default).encode()
+
+def _dumps_line(obj) -> bytes:
+    """Compact JSON bytes terminated by a newline, for the JSON-lines history log"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_DATACLASS)
+    return json.dumps(obj, default=_json_default).encode() + b"\n"
+
+def _open_state(path: Path, mode: str):
+    """Open a state file, streaming through gzip when the path ends in .gz"""
+    if path.suffix == '.gz':
+        return gzip.open(path, mode, compresslevel=HISTORY_COMPRESSLEVEL)
+    return open(path, mode, buffering=WRITE_BUFFER)
+
+def _loads(raw: bytes):
+    """Decode JSON bytes with orjson when available"""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+@dataclass(slots=True)
 class PaperTrade:
     trade_id: str
     entry_time: datetime
@@ -29,7 +78,7 @@ class PaperTrade:
     pnl: float = 0.0
     signal_id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class PaperAccount:
     initial_capital: float
     current_balance: float = None
@@ -49,16 +98,20 @@ class PaperAccount:
 class PaperTradingSystem:
     def __init__(self, initial_capital: float = 100000.0):
         self.data_file = Path("paper_trading_data.json")
+        self.history_file = Path(HISTORY_FILE)
         self.account = self.load_account(initial_capital)
         self.trade_history: List[PaperTrade] = []
+        # Option symbols of open positions, rebound (never mutated) so other threads can read it
+        self.open_symbols: frozenset = frozenset()
         self.load_history()
+        self._history_fp = _open_state(self.history_file, 'ab')
         
     def load_account(self, initial_capital: float) -> PaperAccount:
         """Load or create paper trading account"""
         try:
             if self.data_file.exists():
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.data_file, 'rb') as f:
+                    data = _loads(f.read())
                 return PaperAccount(**data)
         except Exception as e:
             logger.error(f"Error loading account: {e}")
@@ -67,26 +120,60 @@ class PaperTradingSystem:
         
     def load_history(self):
         """Load trade history"""
-        history_file = Path("paper_trading_history.json")
         try:
-            if history_file.exists():
-                with open(history_file, 'r') as f:
-                    data = json.load(f)
-                self.trade_history = [PaperTrade(**trade) for trade in data]
+            if self.history_file.exists():
+                trades = []
+                try:
+                    with _open_state(self.history_file, 'rb') as f:
+                        trades.extend(PaperTrade(**_loads(line)) for line in f if line.strip())
+                except EOFError:
+                    # The last run stopped without closing its gzip member; every flushed
+                    # trade was read, so rewrite the log as one complete member
+                    logger.warning("History log was not closed cleanly; rewriting it")
+                    self._rewrite_history(trades)
+                self.trade_history = trades
+                return
+                
+            # One-time switch from a history file written by an earlier version
+            for legacy_file in map(Path, LEGACY_HISTORY_FILES):
+                if legacy_file.exists():
+                    with _open_state(legacy_file, 'rb') as f:
+                        if legacy_file.name.endswith('.jsonl'):
+                            data = [_loads(line) for line in f if line.strip()]
+                        else:
+                            data = _loads(f.read())
+                    self.trade_history = [PaperTrade(**trade) for trade in data]
+                    self._rewrite_history(self.trade_history)
+                    break
         except Exception as e:
             logger.error(f"Error loading history: {e}")
             
+    def _rewrite_history(self, trades: List[PaperTrade]):
+        """Replace the history log with the given trades"""
+        with _open_state(self.history_file, 'wb') as f:
+            f.writelines(map(_dumps_line, trades))
+            
+    def _append_history(self, trade: PaperTrade):
+        """Append a completed trade to the history log"""
+        try:
+            self._history_fp.write(_dumps_line(trade))
+            self._history_fp.flush()
+        except Exception as e:
+            logger.error(f"Error writing history: {e}")
+            
+    def _refresh_open_symbols(self):
+        """Republish the open-position symbols after a position is entered or exited"""
+        self.open_symbols = frozenset(trade.option_symbol for trade in self.account.current_positions.values())
+            
+    def close(self):
+        """Close the history log"""
+        self._history_fp.close()
+            
     def save_state(self):
-        """Save current state to file"""
+        """Save account state to file; completed trades are appended to the history log"""
         try:
-            # Save account state
-            with open(self.data_file, 'w') as f:
-                json.dump(asdict(self.account), f, indent=2)
-                
-            # Save trade history
-            with open("paper_trading_history.json", 'w') as f:
-                history_data = [asdict(trade) for trade in self.trade_history]
-                json.dump(history_data, f, indent=2)
+            with _open_state(self.data_file, 'wb') as f:
+                f.write(_dumps(self.account))
                 
         except Exception as e:
             logger.error(f"Error saving state: {e}")
@@ -126,6 +213,7 @@ class PaperTradingSystem:
             
             # Update account
             self.account.current_positions[trade.trade_id] = trade
+            self._refresh_open_symbols()
             self.account.current_balance -= total_cost
             self.trade_history.append(trade)
             
@@ -146,8 +234,12 @@ class PaperTradingSystem:
     def update_positions(self, market_data: Dict):
         """Update open positions with current market data"""
         try:
-            for trade_id, trade in self.account.current_positions.items():
-                current_price = market_data.get(trade.option_symbol, {}).get('last_price')
+            # Snapshot the positions; exit_trade removes entries while we walk them
+            for trade_id, trade in list(self.account.current_positions.items()):
+                quote = market_data.get(trade.option_symbol)
+                if quote is None:
+                    continue
+                current_price = quote.get('last_price')
                 if not current_price:
                     continue
                     
@@ -205,7 +297,9 @@ class PaperTradingSystem:
             
             # Remove from current positions
             del self.account.current_positions[trade_id]
+            self._refresh_open_symbols()
             
+            self._append_history(trade)
             self.save_state()
             logger.info(
                 f"Exited trade {trade_id} with P&L: {trade.pnl:.2f} "
@@ -170,64 +170,112 @@ class ProTraderSetups:
         Analyze current market condition to determine optimal setup.
         """
         try:
-            analysis = {
-                'trend': None,
-                'volatility': None,
-                'volume_condition': None,
-                'recommended_setups': []
-            }
-            
             # Analyze trend using EMA
             ema_20 = df['close'].ewm(span=20).mean()
             ema_50 = df['close'].ewm(span=50).mean()
-            current_price = df['close'].iloc[-1]
-            
-            if current_price > ema_20.iloc[-1] > ema_50.iloc[-1]:
-                analysis['trend'] = 'strong_uptrend'
-            elif current_price < ema_20.iloc[-1] < ema_50.iloc[-1]:
-                analysis['trend'] = 'strong_downtrend'
-            else:
-                analysis['trend'] = 'sideways'
             
             # Analyze volatility using ATR
             atr = self._calculate_atr(df, self.settings['atr']['period'])
-            avg_atr = atr.mean()
-            current_atr = atr.iloc[-1]
-            
-            if current_atr > avg_atr * 1.5:
-                analysis['volatility'] = 'high'
-            elif current_atr < avg_atr * 0.5:
-                analysis['volatility'] = 'low'
-            else:
-                analysis['volatility'] = 'normal'
             
             # Analyze volume
             volume_ma = df['volume'].rolling(window=self.settings['volume']['ma_period']).mean()
-            current_volume = df['volume'].iloc[-1]
             
-            if current_volume > volume_ma.iloc[-1] * 1.5:
-                analysis['volume_condition'] = 'high'
-            elif current_volume < volume_ma.iloc[-1] * 0.5:
-                analysis['volume_condition'] = 'low'
-            else:
-                analysis['volume_condition'] = 'normal'
+            return self._classify_condition(
+                df['close'].iloc[-1], ema_20.iloc[-1], ema_50.iloc[-1],
+                atr.iloc[-1], atr.mean(),
+                df['volume'].iloc[-1], volume_ma.iloc[-1]
+            )
+            
+        except Exception as e:
+            logger.error(f"Error analyzing market condition: {e}")
+            return {'trend': None, 'volatility': None, 'volume_condition': None, 'recommended_setups': []}
+
+    def analyze_market_condition_bars(self, bars: np.ndarray) -> Dict:
+        """
+        Analyze market condition from an (n, 5) OHLCV array, oldest bar first.
+        Gives the same result as analyze_market_condition on the equivalent frame.
+        """
+        try:
+            high, low, close, volume = bars[:, 1], bars[:, 2], bars[:, 3], bars[:, 4]
+            n = len(close)
             
-            # Recommend setups based on conditions
-            if analysis['trend'] == 'strong_uptrend' and analysis['volume_condition'] == 'high':
-                analysis['recommended_setups'].append('momentum_pullback')
+            # Trend: only the latest EMA values are needed
+            ema_20 = self._ema_last(close, 20)
+            ema_50 = self._ema_last(close, 50)
             
-            if analysis['volatility'] == 'high' and analysis['volume_condition'] == 'high':
-                analysis['recommended_setups'].append('volume_breakout')
+            # Volatility: rolling-mean ATR over the window
+            period = self.settings['atr']['period']
+            tr = high - low
+            if n > 1:
+                prev_close = close[:-1]
+                tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+            if n >= period:
+                cs = np.cumsum(tr)
+                atr = (cs[period - 1:] - np.concatenate(([0.0], cs[:-period]))) / period
+                current_atr, avg_atr = atr[-1], atr.mean()
+            else:
+                current_atr = avg_atr = np.nan
             
-            if analysis['trend'] == 'sideways' and analysis['volatility'] == 'low':
-                analysis['recommended_setups'].append('opening_range_breakout')
+            # Volume against its moving average
+            ma_period = self.settings['volume']['ma_period']
+            volume_ma = volume[-ma_period:].mean() if n >= ma_period else np.nan
             
-            return analysis
+            return self._classify_condition(close[-1], ema_20, ema_50, current_atr, avg_atr, volume[-1], volume_ma)
             
         except Exception as e:
             logger.error(f"Error analyzing market condition: {e}")
             return {'trend': None, 'volatility': None, 'volume_condition': None, 'recommended_setups': []}
 
+    @staticmethod
+    def _ema_last(x: np.ndarray, span: int) -> float:
+        """Last value of pandas ewm(span=span).mean() without computing the whole series"""
+        decay = 1 - 2 / (span + 1)
+        weights = decay ** np.arange(len(x) - 1, -1, -1)
+        return float(weights @ x / weights.sum())
+
+    @staticmethod
+    def _classify_condition(current_price, ema_20, ema_50, current_atr, avg_atr, current_volume, volume_ma) -> Dict:
+        """Map the latest price, ATR and volume readings to a market condition"""
+        analysis = {
+            'trend': None,
+            'volatility': None,
+            'volume_condition': None,
+            'recommended_setups': []
+        }
+        
+        if current_price > ema_20 > ema_50:
+            analysis['trend'] = 'strong_uptrend'
+        elif current_price < ema_20 < ema_50:
+            analysis['trend'] = 'strong_downtrend'
+        else:
+            analysis['trend'] = 'sideways'
+        
+        if current_atr > avg_atr * 1.5:
+            analysis['volatility'] = 'high'
+        elif current_atr < avg_atr * 0.5:
+            analysis['volatility'] = 'low'
+        else:
+            analysis['volatility'] = 'normal'
+        
+        if current_volume > volume_ma * 1.5:
+            analysis['volume_condition'] = 'high'
+        elif current_volume < volume_ma * 0.5:
+            analysis['volume_condition'] = 'low'
+        else:
+            analysis['volume_condition'] = 'normal'
+        
+        # Recommend setups based on conditions
+        if analysis['trend'] == 'strong_uptrend' and analysis['volume_condition'] == 'high':
+            analysis['recommended_setups'].append('momentum_pullback')
+        
+        if analysis['volatility'] == 'high' and analysis['volume_condition'] == 'high':
+            analysis['recommended_setups'].append('volume_breakout')
+        
+        if analysis['trend'] == 'sideways' and analysis['volatility'] == 'low':
+            analysis['recommended_setups'].append('opening_range_breakout')
+        
+        return analysis
+
     def _calculate_atr(self, df: pd.DataFrame, period: int) -> pd.Series:
         """Calculate Average True Range"""
         high = df['high']
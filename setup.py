@@ -21,6 +21,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Slotted dataclasses (paper trading, live signals) need dataclass(slots=True)
+MIN_PYTHON = (3, 10)
+
+def check_python_version():
+    """Refuse to set up on an interpreter the platform cannot import on"""
+    if sys.version_info < MIN_PYTHON:
+        logger.error(
+            f"Python {'.'.join(map(str, MIN_PYTHON))}+ is required, "
+            f"found {sys.version.split()[0]}"
+        )
+        return False
+    return True
+
 def install_dependencies():
     """Install required Python packages"""
     try:
@@ -198,6 +211,10 @@ def main():
     """Main setup function"""
     logger.info("Starting FnO Trading Platform setup")
     
+    # Check interpreter version
+    if not check_python_version():
+        sys.exit(1)
+        
     # Setup directories
     if not setup_directories():
         sys.exit(1)
@@ -0,0 +1,80 @@
+"""
+Market Condition Equivalence Test
+Checks that the array path of the market condition analysis agrees with the DataFrame path
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from pro_trader_setups import ProTraderSetups
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def make_frame(rng, n, drift=0.0, volatility=1.0, volume_spike=1.0, vol_spike=1.0, vol_bars=14):
+    """
+    Random OHLCV frame. The last bar's volume is scaled by volume_spike and the
+    bar-to-bar noise of the last vol_bars bars by vol_spike.
+    """
+    scale = np.full(n, volatility)
+    scale[-vol_bars:] *= vol_spike
+    close = 20000 + np.cumsum(drift + rng.normal(0, 10, n) * scale)
+    open_ = close + rng.normal(0, 5, n) * scale
+    spread = np.abs(rng.normal(0, 10, n)) * scale
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(50_000, 150_000, n).astype(float)
+    volume[-1] *= volume_spike
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume})
+
+def test_bars_match_dataframe():
+    """analyze_market_condition_bars must classify every frame as analyze_market_condition does"""
+    rng = np.random.default_rng(22)
+    setups = ProTraderSetups()
+    cases = 0
+    seen = set()
+
+    for n in (1, 5, 13, 14, 19, 20, 50, 120, 375):
+        for drift in (-15.0, 0.0, 15.0):
+            for volume_spike in (0.2, 1.0, 3.0):
+                for vol_spike in (0.0, 1.0, 8.0):
+                    df = make_frame(rng, n, drift=drift, volume_spike=volume_spike, vol_spike=vol_spike)
+                    bars = df[['open', 'high', 'low', 'close', 'volume']].to_numpy()
+
+                    expected = setups.analyze_market_condition(df)
+                    result = setups.analyze_market_condition_bars(bars)
+                    assert result == expected, f"n={n} drift={drift} volume={volume_spike} range={vol_spike}: {result} != {expected}"
+
+                    seen.add((expected['trend'], expected['volatility'], expected['volume_condition']))
+                    cases += 1
+
+    # The cases must exercise every classification, not just the defaults
+    for field, values in (
+        (0, {'strong_uptrend', 'strong_downtrend', 'sideways'}),
+        (1, {'high', 'low', 'normal'}),
+        (2, {'high', 'low', 'normal'})
+    ):
+        assert {row[field] for row in seen} == values
+    logger.info(f"✅ Bars and DataFrame analysis agreed on {cases} frames")
+
+def test_ema_last_matches_pandas():
+    """_ema_last must equal the last value of pandas ewm(span).mean()"""
+    rng = np.random.default_rng(5)
+    for n in (1, 2, 20, 50, 500):
+        x = 20000 + np.cumsum(rng.normal(0, 10, n))
+        for span in (20, 50):
+            expected = pd.Series(x).ewm(span=span).mean().iloc[-1]
+            assert np.isclose(ProTraderSetups._ema_last(x, span), expected, rtol=1e-12)
+    logger.info("✅ EMA shortcut matched pandas")
+
+if __name__ == "__main__":
+    print("🧪 Market Condition Equivalence Test")
+    print("=" * 50)
+    test_bars_match_dataframe()
+    test_ema_last_matches_pandas()
+    print("✅ All market condition checks passed")
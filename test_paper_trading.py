@@ -0,0 +1,182 @@
+"""
+Paper Trading Engine Regression Test
+Checks the running position sums and the vectorized price book against a full recompute
+"""
+import math
+import os
+import random
+import tempfile
+import time
+import logging
+
+from paper_trading_engine import PaperTradingEngine
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SYMBOLS = ["NIFTY_CE", "NIFTY_PE", "BANKNIFTY_CE", "BANKNIFTY_PE", "FINNIFTY_CE"]
+USERS = [f"user_{i}" for i in range(6)]
+STEPS = 2000
+
+def make_engine():
+    """Engine writing to a scratch file, so the tracked data file is never touched"""
+    data_dir = tempfile.mkdtemp(prefix="paper_trading_test_")
+    return PaperTradingEngine(data_file=os.path.join(data_dir, "paper_trading_data.json"))
+
+def close(a, b):
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+def reference_order(book, user_id, symbol, quantity, price, order_type):
+    """Position bookkeeping of place_order, one dict per position"""
+    positions = book.setdefault(user_id, {})
+    position = positions.get(symbol)
+    if order_type == "BUY":
+        if position is not None:
+            total_qty = position['quantity'] + quantity
+            avg_price = (position['quantity'] * position['avg_price'] + quantity * price) / total_qty
+        else:
+            total_qty, avg_price = quantity, price
+        positions[symbol] = {'quantity': total_qty, 'avg_price': avg_price}
+    elif position['quantity'] - quantity > 0:
+        position['quantity'] -= quantity
+    else:
+        del positions[symbol]
+        return
+    positions[symbol]['current_price'] = price
+
+def reference_prices(book, price_data):
+    """The per-position loop update_market_prices replaced"""
+    for positions in book.values():
+        for symbol, position in positions.items():
+            if symbol in price_data:
+                position['current_price'] = price_data[symbol]
+
+def check_against_recompute(engine, book):
+    """Every position and running sum must equal a from-scratch recompute"""
+    for user_id in USERS:
+        portfolio = engine.get_portfolio(user_id)
+        if portfolio is None:
+            assert not book.get(user_id)
+            continue
+        positions = portfolio['positions']
+        expected = book.get(user_id, {})
+        assert set(positions) == set(expected), f"{user_id}: positions {sorted(positions)} != {sorted(expected)}"
+
+        for symbol, position in positions.items():
+            ref = expected[symbol]
+            qty = ref['quantity']
+            price = ref['current_price']
+            assert position['quantity'] == qty
+            assert close(position['avg_price'], ref['avg_price'])
+            assert close(position['current_price'], price)
+            assert close(position['current_value'], qty * price), f"{user_id}/{symbol}: current_value"
+            assert close(position['pnl'], (price - ref['avg_price']) * qty), f"{user_id}/{symbol}: pnl"
+
+        pnl_sum = sum(p['pnl'] for p in positions.values())
+        value_sum = sum(p['current_value'] for p in positions.values())
+        assert close(portfolio['positions_pnl_sum'], pnl_sum), \
+            f"{user_id}: positions_pnl_sum {portfolio['positions_pnl_sum']} != {pnl_sum}"
+        assert close(portfolio['positions_current_value_sum'], value_sum), \
+            f"{user_id}: positions_current_value_sum {portfolio['positions_current_value_sum']} != {value_sum}"
+
+def test_running_sums_match_full_recompute():
+    """Interleave orders and price updates, recomputing everything at checkpoints"""
+    rng = random.Random(7)
+    engine = make_engine()
+    book = {}
+
+    for step in range(STEPS):
+        user_id = rng.choice(USERS)
+        symbol = rng.choice(SYMBOLS)
+        action = rng.random()
+
+        if action < 0.35:
+            quantity = rng.randint(1, 50)
+            price = round(rng.uniform(50, 500), 2)
+            result = engine.place_order(user_id, symbol, quantity, price, "BUY")
+            if result['success']:
+                reference_order(book, user_id, symbol, quantity, price, "BUY")
+        elif action < 0.6:
+            held = book.get(user_id, {}).get(symbol)
+            quantity = rng.randint(1, held['quantity']) if held else rng.randint(1, 10)
+            price = round(rng.uniform(50, 500), 2)
+            result = engine.place_order(user_id, symbol, quantity, price, "SELL")
+            assert result['success'] == (held is not None)
+            if result['success']:
+                reference_order(book, user_id, symbol, quantity, price, "SELL")
+        else:
+            price_data = {s: round(rng.uniform(50, 500), 2) for s in rng.sample(SYMBOLS, rng.randint(1, len(SYMBOLS)))}
+            engine.update_market_prices(price_data)
+            reference_prices(book, price_data)
+
+        if step % 97 == 0:
+            check_against_recompute(engine, book)
+
+    check_against_recompute(engine, book)
+    logger.info(f"✅ Running sums matched a full recompute over {STEPS} interleaved operations")
+
+def test_leaderboard_matches_full_sort():
+    """The heap-selected leaderboard must match sorting every portfolio"""
+    rng = random.Random(11)
+    engine = make_engine()
+    for _ in range(500):
+        user_id = rng.choice(USERS)
+        symbol = rng.choice(SYMBOLS)
+        engine.place_order(user_id, symbol, rng.randint(1, 20), round(rng.uniform(50, 500), 2),
+                           rng.choice(["BUY", "BUY", "SELL"]))
+        engine.update_market_prices({s: round(rng.uniform(50, 500), 2) for s in SYMBOLS})
+
+    expected = []
+    for user_id in USERS:
+        portfolio = engine.get_portfolio(user_id)
+        if portfolio is None:
+            continue
+        value = portfolio['balance'] + sum(p['current_value'] for p in portfolio['positions'].values())
+        expected.append((user_id, (value - portfolio['initial_balance']) / portfolio['initial_balance'] * 100))
+    expected.sort(key=lambda row: row[1], reverse=True)
+
+    leaderboard = engine.get_leaderboard(limit=3)
+    assert [row['user_id'] for row in leaderboard] == [user_id for user_id, _ in expected[:3]]
+    for row, (_, return_pct) in zip(leaderboard, expected):
+        assert close(row['return_percentage'], return_pct)
+    logger.info("✅ Leaderboard matched a full sort")
+
+def test_failed_saves_back_off():
+    """A save that keeps failing is retried with growing delays, not every flush tick"""
+    missing_dir = os.path.join(tempfile.mkdtemp(prefix="paper_trading_test_"), "missing")
+    engine = PaperTradingEngine(data_file=os.path.join(missing_dir, "paper_trading_data.json"))
+    attempts = []
+    save_data = engine.save_data
+
+    def record():
+        attempts.append(time.monotonic())
+        return save_data()
+    engine.save_data = record
+
+    engine.place_order("user_0", SYMBOLS[0], 10, 100.0, "BUY")
+    time.sleep(1.6)
+
+    # Delays of 0.1, 0.2, 0.4 and 0.8s fit about four attempts; a fixed delay would make ~15
+    assert 2 <= len(attempts) <= 6, f"{len(attempts)} save attempts in 1.6s"
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert all(later > earlier for earlier, later in zip(gaps, gaps[1:]))
+
+    # Once the directory exists the next retry goes through
+    os.makedirs(missing_dir)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(engine.data_file) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert os.path.exists(engine.data_file)
+    logger.info(f"✅ Failed saves backed off ({len(attempts)} attempts)")
+
+if __name__ == "__main__":
+    print("🧪 Paper Trading Engine Regression Test")
+    print("=" * 50)
+    test_running_sums_match_full_recompute()
+    test_leaderboard_matches_full_sort()
+    test_failed_saves_back_off()
+    print("✅ All paper trading checks passed")